@@ -0,0 +1,174 @@
+"""
+Offline load benchmark of the chat pipeline against a mock LMS and stub model.
+
+Runs the fixed query corpus of benchmarks/stub_llm.py through ChatService at
+each concurrency level and prints p50/p95/p99 latency, throughput, upstream
+LMS calls and model calls. Needs no network access or credentials, so it can
+run in CI.
+
+    PYTHONPATH=. python benchmarks/load.py --concurrency 1 4 16 --repeat 5
+
+Caches and the entity mirror are emptied before each level unless ``--warm``
+is given; the answer cache stays off unless ``--answer-cache`` is given.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import time
+from typing import Any, Dict, List
+
+from agents import set_tracing_disabled
+
+from mock_lms import MockConfig, MockLMS
+from stub_llm import QUERIES, StubModel, use_stub_model
+
+
+def percentile(values: List[float], p: float) -> float:
+    """Nearest-rank percentile of ``values`` (0 for an empty list)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+
+def reset_state() -> None:
+    """Forget everything cached from earlier levels."""
+    from src.store.entity_store import entity_store
+    from src.tools.auth.auth_tools import token_cache
+    from src.utils.answer_cache import answer_cache
+    from src.utils.cache import response_cache
+
+    response_cache.invalidate()
+    answer_cache.invalidate()
+    entity_store.clear()
+    token_cache.clear()
+
+
+async def run_level(
+    service, lms: MockLMS, model: StubModel, concurrency: int, repeat: int
+) -> Dict[str, Any]:
+    queries = QUERIES * repeat
+    latencies: List[float] = []
+    errors = 0
+    next_query = iter(enumerate(queries))
+
+    async def worker() -> None:
+        nonlocal errors
+        for i, query in next_query:
+            start = time.perf_counter()
+            try:
+                await service.reply(query, request_id=f"bench-{i}", user_id="bench")
+            except Exception as e:
+                errors += 1
+                print(f"  query failed: {query!r}: {e}")
+            latencies.append(time.perf_counter() - start)
+
+    lms.reset_counts()
+    model_calls = model.calls
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "concurrency": concurrency,
+        "requests": len(queries),
+        "errors": errors,
+        "throughput": len(queries) / elapsed if elapsed else 0.0,
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+        "lms_calls": lms.total_calls(),
+        "lms_calls_by_endpoint": dict(lms.calls),
+        "model_calls": model.calls - model_calls,
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    config = MockConfig(
+        students=args.students,
+        courses=args.courses,
+        latency=args.lms_latency,
+        jitter=args.lms_jitter,
+        error_rate=args.error_rate,
+    )
+    with MockLMS(config) as lms:
+        # Settings are read from the environment on first import; the model
+        # is stubbed, so the API key is never sent anywhere
+        os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+        os.environ.setdefault("USERNAME", "benchmark")
+        os.environ.setdefault("PASSWORD", "benchmark")
+        os.environ["SYNC_ENABLED"] = "false"
+
+        from src.config.settings import settings
+
+        settings.API_ENDPOINTS["base_url"] = lms.url
+
+        from src.lms_agents.manager.manager_agent import ManagerAgent
+        from src.service.chat_service import ChatService
+        from src.utils.answer_cache import answer_cache
+
+        # Normally off without sync, but the mock LMS data never changes
+        answer_cache.enabled = args.answer_cache
+
+        model = StubModel(latency=args.llm_latency)
+        manager = ManagerAgent(topology=args.topology)
+        use_stub_model(manager, model)
+        service = ChatService(manager_agent=manager)
+
+        results = []
+        for concurrency in args.concurrency:
+            if not args.warm:
+                reset_state()
+            results.append(
+                await run_level(service, lms, model, concurrency, args.repeat)
+            )
+
+    header = (
+        f"{'conc':>5} {'reqs':>5} {'errors':>6} {'req/s':>8} {'p50 ms':>8} "
+        f"{'p95 ms':>8} {'p99 ms':>8} {'lms calls':>9} {'lms/req':>7} "
+        f"{'llm/req':>7}"
+    )
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(
+            f"{r['concurrency']:>5} {r['requests']:>5} {r['errors']:>6} "
+            f"{r['throughput']:>8.1f} {r['p50'] * 1000:>8.1f} "
+            f"{r['p95'] * 1000:>8.1f} {r['p99'] * 1000:>8.1f} "
+            f"{r['lms_calls']:>9} {r['lms_calls'] / r['requests']:>7.2f} "
+            f"{r['model_calls'] / r['requests']:>7.2f}"
+        )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--topology", choices=["nested", "flat"], default="nested")
+    parser.add_argument("--students", type=int, default=MockConfig.students)
+    parser.add_argument("--courses", type=int, default=MockConfig.courses)
+    parser.add_argument(
+        "--lms-latency", type=float, default=0.02, help="seconds per LMS request"
+    )
+    parser.add_argument("--lms-jitter", type=float, default=0.01)
+    parser.add_argument(
+        "--error-rate", type=float, default=0.0, help="share of LMS requests failing"
+    )
+    parser.add_argument(
+        "--llm-latency", type=float, default=0.05, help="seconds per model call"
+    )
+    parser.add_argument("--warm", action="store_true", help="keep caches across levels")
+    parser.add_argument("--answer-cache", action="store_true")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    # Nothing may leave the machine: traces are not exported
+    set_tracing_disabled(True)
+    asyncio.run(main(args))
@@ -0,0 +1,346 @@
+"""
+Local fake of the Mahan LMS ``/external-services/api/v1/`` endpoints.
+
+Serves a generated, seeded dataset (students, courses, lessons, grades,
+homeworks, homework-responses) with the API's pagination, detail routes and
+query filters, a token endpoint, and optional injected latency and 503
+errors. Counts every request per endpoint so benchmarks can report upstream
+calls.
+
+    PYTHONPATH=. python benchmarks/mock_lms.py --port 8100 --students 500
+
+Point the app at it with ``settings.API_ENDPOINTS["base_url"]`` (see
+benchmarks/load.py).
+"""
+
+import argparse
+import base64
+import json
+import random
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlparse
+
+API_PATH = "/external-services/api/v1/"
+
+RESOURCES = (
+    "students",
+    "courses",
+    "lessons",
+    "grades",
+    "homeworks",
+    "homework-responses",
+)
+
+# Record fields a query parameter filters on when it is not a paging option
+SEARCH_FIELDS = ("first_name", "last_name", "full_name", "title")
+
+FIRST_NAMES = ["Ali", "Sara", "Reza", "Maryam", "Hossein", "Zahra", "Mohammad"]
+LAST_NAMES = ["Ahmadi", "Karimi", "Hosseini", "Rahimi", "Moradi", "Jafari"]
+
+
+@dataclass
+class MockConfig:
+    """Dataset sizes, paging and injected faults of the fake LMS."""
+
+    students: int = 200
+    courses: int = 8
+    lessons_per_course: int = 5
+    homeworks_per_lesson: int = 3
+    # Lessons each student is enrolled in (one grade record per enrollment)
+    enrollments: int = 3
+    # Share of expected homework submissions that exist, and that are late
+    submission_rate: float = 0.8
+    late_rate: float = 0.1
+    default_page_size: int = 20
+    max_page_size: int = 100
+    # Seconds added to every request: ``latency`` plus up to ``jitter``
+    latency: float = 0.0
+    jitter: float = 0.0
+    # Share of requests answered with a 503
+    error_rate: float = 0.0
+    seed: int = 7
+
+
+def _token(lifetime: int) -> str:
+    """Build an unsigned JWT-shaped token with an ``exp`` claim."""
+    payload = json.dumps({"exp": int(time.time()) + lifetime}).encode()
+    body = base64.urlsafe_b64encode(payload).decode().rstrip("=")
+    return f"mock.{body}.signature"
+
+
+def build_dataset(config: MockConfig) -> Dict[str, List[Dict[str, Any]]]:
+    """Generate the records of every resource, deterministic per seed."""
+    rng = random.Random(config.seed)
+    data: Dict[str, List[Dict[str, Any]]] = {r: [] for r in RESOURCES}
+
+    for i in range(1, config.students + 1):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        data["students"].append(
+            {
+                "id": i,
+                "first_name": first,
+                "last_name": last,
+                "full_name": f"{first} {last}",
+                "national_code": f"{rng.randrange(10**9, 10**10)}",
+                "email": f"student{i}@example.com",
+            }
+        )
+
+    lesson_id = 0
+    for c in range(1, config.courses + 1):
+        data["courses"].append(
+            {"id": c, "title": f"Course {c}", "category": (c - 1) % 3 + 1}
+        )
+        for _ in range(config.lessons_per_course):
+            lesson_id += 1
+            data["lessons"].append(
+                {
+                    "id": lesson_id,
+                    "title": f"Lesson {lesson_id}",
+                    "course": c,
+                    "teacher": f"Teacher {rng.randrange(1, 20)}",
+                }
+            )
+
+    lesson_ids = [lesson["id"] for lesson in data["lessons"]]
+    rosters: Dict[int, List[int]] = {lesson: [] for lesson in lesson_ids}
+    for student in data["students"]:
+        count = min(config.enrollments, len(lesson_ids))
+        for lesson in rng.sample(lesson_ids, count):
+            rosters[lesson].append(student["id"])
+            data["grades"].append(
+                {
+                    "id": len(data["grades"]) + 1,
+                    "user": student["id"],
+                    "lesson": lesson,
+                    "total_score": round(rng.uniform(0, 20), 2),
+                    "nomrehozoor": round(rng.uniform(0, 5), 2),
+                }
+            )
+
+    now = time.time()
+    for lesson in lesson_ids:
+        for _ in range(config.homeworks_per_lesson):
+            homework_id = len(data["homeworks"]) + 1
+            deadline = now - rng.randrange(1, 60) * 86400
+            data["homeworks"].append(
+                {
+                    "id": homework_id,
+                    "title": f"Homework {homework_id}",
+                    "lesson": lesson,
+                    "deadline": time.strftime(
+                        "%Y-%m-%dT%H:%M:%SZ", time.gmtime(deadline)
+                    ),
+                }
+            )
+            for student in rosters[lesson]:
+                if rng.random() >= config.submission_rate:
+                    continue
+                offset = 86400 if rng.random() < config.late_rate else -3600
+                data["homework-responses"].append(
+                    {
+                        "id": len(data["homework-responses"]) + 1,
+                        "homework": homework_id,
+                        "user": student,
+                        "submitted_at": time.strftime(
+                            "%Y-%m-%dT%H:%M:%SZ", time.gmtime(deadline + offset)
+                        ),
+                    }
+                )
+    return data
+
+
+class MockLMS:
+    """
+    The fake LMS served from a background thread.
+
+    Use as a context manager, or call ``start()`` and ``stop()``. ``calls``
+    counts requests per ``"METHOD resource"``.
+    """
+
+    def __init__(
+        self,
+        config: Optional[MockConfig] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        self.config = config or MockConfig()
+        self.data = build_dataset(self.config)
+        self.by_id = {
+            resource: {str(r["id"]): r for r in records}
+            for resource, records in self.data.items()
+        }
+        self.calls: Counter = Counter()
+        self._rng = random.Random(self.config.seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "MockLMS":
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="mock-lms", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "MockLMS":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def reset_counts(self) -> None:
+        with self._lock:
+            self.calls.clear()
+
+    def total_calls(self) -> int:
+        with self._lock:
+            return sum(self.calls.values())
+
+    def _fault(self) -> Tuple[float, bool]:
+        """Return the delay to inject and whether to fail this request."""
+        with self._lock:
+            delay = self.config.latency + self._rng.uniform(0, self.config.jitter)
+            return delay, self._rng.random() < self.config.error_rate
+
+    def _list(self, resource: str, query: Dict[str, str], base: str) -> dict:
+        page_size_param = "page_size"
+        page = max(1, int(query.pop("page", 1)))
+        page_size = int(query.pop(page_size_param, self.config.default_page_size))
+        page_size = max(1, min(page_size, self.config.max_page_size))
+        search = query.pop("search", "").lower()
+        query.pop("ordering", None)
+
+        records = self.data[resource]
+        for field, value in query.items():
+            records = [r for r in records if str(r.get(field)) == value]
+        if search:
+            records = [
+                r
+                for r in records
+                if any(search in str(r.get(f, "")).lower() for f in SEARCH_FIELDS)
+            ]
+
+        start = (page - 1) * page_size
+        results = records[start : start + page_size]
+
+        def link(number: int) -> str:
+            params = {**query, page_size_param: page_size, "page": number}
+            if search:
+                params["search"] = search
+            return f"{base}?{urlencode(params)}"
+
+        return {
+            "count": len(records),
+            "next": link(page + 1) if start + page_size < len(records) else None,
+            "previous": link(page - 1) if page > 1 else None,
+            "results": results,
+        }
+
+    def _handler(self):
+        lms = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status: int, body: Any, headers=None) -> None:
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def _route(self, method: str) -> None:
+                # Drain the body first so keep-alive connections stay usable
+                length = int(self.headers.get("Content-Length") or 0)
+                if length:
+                    self.rfile.read(length)
+                url = urlparse(self.path)
+                if not url.path.startswith(API_PATH):
+                    return self._send(404, {"detail": "Not found."})
+                parts = url.path[len(API_PATH) :].strip("/").split("/")
+                resource = parts[0]
+                with lms._lock:
+                    lms.calls[f"{method} {resource}"] += 1
+
+                delay, fail = lms._fault()
+                if delay:
+                    time.sleep(delay)
+                if fail:
+                    return self._send(
+                        503, {"detail": "Service unavailable."}, {"Retry-After": "0"}
+                    )
+
+                if resource == "token" and method == "POST":
+                    return self._send(200, {"access": _token(3600), "expires_in": 3600})
+                if method != "GET" or resource not in lms.data:
+                    return self._send(404, {"detail": "Not found."})
+                if not self.headers.get("Authorization", "").startswith("Bearer "):
+                    return self._send(401, {"detail": "Authentication required."})
+
+                if len(parts) > 1 and parts[1]:
+                    record = lms.by_id[resource].get(parts[1])
+                    if record is None:
+                        return self._send(404, {"detail": "Not found."})
+                    return self._send(200, record)
+
+                query = dict(parse_qsl(url.query))
+                base = f"{lms.url}{API_PATH}{resource}/"
+                try:
+                    return self._send(200, lms._list(resource, query, base))
+                except ValueError:
+                    return self._send(400, {"detail": "Invalid page."})
+
+            def do_GET(self):
+                self._route("GET")
+
+            def do_POST(self):
+                self._route("POST")
+
+        return Handler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--students", type=int, default=MockConfig.students)
+    parser.add_argument("--courses", type=int, default=MockConfig.courses)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    config = MockConfig(
+        students=args.students,
+        courses=args.courses,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+    )
+    with MockLMS(config, port=args.port) as lms:
+        print(f"Mock LMS serving {lms.url}{API_PATH} (Ctrl+C to stop)")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
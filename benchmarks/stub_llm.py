@@ -0,0 +1,267 @@
+"""
+Deterministic stand-in for the OpenAI model, driven by canned scripts.
+
+``SCRIPTS`` maps a message to the tool calls the model makes for it, one
+list per model turn. The manager calls the specialist agent tools with the
+messages keyed further down, so nested runs follow their own scripts; with
+the "flat" topology, agent tools the manager does not have are replaced by
+the first turn of their script. Once a script is exhausted the model answers
+with a summary of the last tool output.
+"""
+
+import asyncio
+import itertools
+import json
+import time
+from typing import Any, Dict, List, Set, Tuple
+
+from agents import Model, ModelResponse, Usage
+from openai.types.responses import (
+    Response,
+    ResponseCompletedEvent,
+    ResponseFunctionToolCall,
+    ResponseOutputMessage,
+    ResponseOutputText,
+    ResponseUsage,
+)
+from openai.types.responses.response_usage import (
+    InputTokensDetails,
+    OutputTokensDetails,
+)
+
+Call = Tuple[str, Dict[str, Any]]
+
+# Fixed query corpus: plain lookups the intent router answers without a
+# model, and questions that need one or more agents (some in parallel)
+QUERIES = [
+    "List all courses",
+    "How many students are there?",
+    "Show the grades of lesson 3",
+    "نمرات دانش آموز 5 را نشان بده",
+    "What is the average score in lesson 3 and how many students failed?",
+    "Which homeworks of lesson 3 have the lowest completion rate?",
+    "Find the student named Sara and show the grades of the first match",
+    "Compare the grades and homework completion of lesson 4",
+    "Which lessons does course 2 have?",
+    "Show the grades of students 1, 2 and 3",
+    "درس‌های دوره 3 کدامند و چه تکالیفی دارند؟",
+]
+
+SCRIPTS: Dict[str, List[List[Call]]] = {
+    # Manager turns
+    QUERIES[4]: [[("grades_tool", {"input": "grade statistics of lesson 3"})]],
+    QUERIES[5]: [[("homework_tool", {"input": "homework completion of lesson 3"})]],
+    QUERIES[6]: [
+        [("students_tool", {"input": "find student Sara"})],
+        [("grades_tool", {"input": "grades of student 1"})],
+    ],
+    QUERIES[7]: [
+        [
+            ("grades_tool", {"input": "grade statistics of lesson 4"}),
+            ("homework_tool", {"input": "homework completion of lesson 4"}),
+        ]
+    ],
+    QUERIES[8]: [[("lessons_tool", {"input": "lessons of course 2"})]],
+    QUERIES[9]: [[("grades_tool", {"input": "grades of students 1 2 3"})]],
+    QUERIES[10]: [
+        [("lessons_tool", {"input": "lessons of course 3"})],
+        [
+            ("homework_tool", {"input": "homeworks of lesson 11"}),
+            ("homework_tool", {"input": "homeworks of lesson 12"}),
+        ],
+    ],
+    # Specialist turns
+    "grade statistics of lesson 3": [[("get_grade_statistics", {"lesson_id": "3"})]],
+    "grade statistics of lesson 4": [[("get_grade_statistics", {"lesson_id": "4"})]],
+    "homework completion of lesson 3": [
+        [("get_homework_completion", {"lesson_id": "3"})]
+    ],
+    "homework completion of lesson 4": [
+        [("get_homework_completion", {"lesson_id": "4"})]
+    ],
+    "find student Sara": [[("get_student_by_name", {"student_name": "Sara"})]],
+    "grades of student 1": [[("get_student_grades", {"student_id": "1"})]],
+    "grades of students 1 2 3": [
+        [("get_grades_for_students", {"student_ids": ["1", "2", "3"]})]
+    ],
+    "lessons of course 2": [[("get_lessons_by_course", {"course_id": "2"})]],
+    "lessons of course 3": [[("get_lessons_by_course", {"course_id": "3"})]],
+    "homeworks of lesson 11": [[("get_homeworks_by_lesson", {"lesson_id": "11"})]],
+    "homeworks of lesson 12": [[("get_homeworks_by_lesson", {"lesson_id": "12"})]],
+}
+
+
+def _items(input: Any) -> List[Dict[str, Any]]:
+    if isinstance(input, str):
+        return [{"role": "user", "content": input}]
+    return [i if isinstance(i, dict) else i.model_dump() for i in input]
+
+
+def _text(content: Any) -> str:
+    if isinstance(content, str):
+        return content
+    return " ".join(part.get("text", "") for part in content or [])
+
+
+def _conversation(input: Any) -> Tuple[str, int, str]:
+    """Return the last user message, model turns since, and the last tool output."""
+    items = _items(input)
+    start = max(
+        (i for i, item in enumerate(items) if item.get("role") == "user"), default=0
+    )
+    message = _text(items[start].get("content"))
+    turns, output, previous = 0, "", None
+    for item in items[start + 1 :]:
+        kind = item.get("type")
+        if kind == "function_call" and previous != "function_call":
+            turns += 1
+        if kind == "function_call_output":
+            output = str(item.get("output", ""))
+        previous = kind
+    return message, turns, output
+
+
+def _calls(message: str, turn: int, tools: Set[str]) -> List[Call]:
+    """Scripted calls for a turn, expanding agent tools the model does not have."""
+    turns = SCRIPTS.get(message, [])
+    if turn >= len(turns):
+        return []
+    calls = []
+    for name, arguments in turns[turn]:
+        if name in tools:
+            calls.append((name, arguments))
+        elif "input" in arguments:
+            calls.extend(_calls(arguments["input"], 0, tools))
+    return calls
+
+
+class StubModel(Model):
+    """
+    Model that plays ``SCRIPTS`` after sleeping ``latency`` seconds per call.
+
+    ``calls`` counts model calls; token usage is estimated from the input.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls = 0
+        self._ids = itertools.count(1)
+
+    def _output(self, input: Any, tools: List[Any]) -> List[Any]:
+        message, turn, tool_output = _conversation(input)
+        calls = _calls(message, turn, {tool.name for tool in tools})
+        if calls:
+            return [
+                ResponseFunctionToolCall(
+                    type="function_call",
+                    id=f"fc_{n}",
+                    call_id=f"call_{n}",
+                    name=name,
+                    arguments=json.dumps(arguments),
+                    status="completed",
+                )
+                for name, arguments in calls
+                for n in [next(self._ids)]
+            ]
+
+        text = (
+            f"Based on the LMS data: {tool_output[:300]}"
+            if tool_output
+            else "I can only help with questions about the LMS."
+        )
+        return [
+            ResponseOutputMessage(
+                type="message",
+                id=f"msg_{next(self._ids)}",
+                role="assistant",
+                status="completed",
+                content=[
+                    ResponseOutputText(type="output_text", text=text, annotations=[])
+                ],
+            )
+        ]
+
+    async def _respond(self, input: Any, tools: List[Any]) -> Tuple[List[Any], Usage]:
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        output = self._output(input, tools)
+        input_tokens = len(json.dumps(_items(input), ensure_ascii=False)) // 4
+        output_tokens = sum(len(item.model_dump_json()) for item in output) // 4
+        usage = Usage(
+            requests=1,
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            total_tokens=input_tokens + output_tokens,
+        )
+        return output, usage
+
+    async def get_response(
+        self,
+        system_instructions,
+        input,
+        model_settings,
+        tools,
+        output_schema,
+        handoffs,
+        tracing,
+        *,
+        previous_response_id=None,
+        conversation_id=None,
+        prompt=None,
+    ) -> ModelResponse:
+        output, usage = await self._respond(input, tools)
+        return ModelResponse(output=output, usage=usage, response_id=None)
+
+    async def stream_response(
+        self,
+        system_instructions,
+        input,
+        model_settings,
+        tools,
+        output_schema,
+        handoffs,
+        tracing,
+        *,
+        previous_response_id=None,
+        conversation_id=None,
+        prompt=None,
+    ):
+        output, usage = await self._respond(input, tools)
+        response = Response(
+            id=f"resp_{next(self._ids)}",
+            created_at=time.time(),
+            model="stub",
+            object="response",
+            output=output,
+            parallel_tool_calls=True,
+            tool_choice="auto",
+            tools=[],
+            usage=ResponseUsage(
+                input_tokens=usage.input_tokens,
+                input_tokens_details=InputTokensDetails(
+                    cached_tokens=0, cache_write_tokens=0
+                ),
+                output_tokens=usage.output_tokens,
+                output_tokens_details=OutputTokensDetails(reasoning_tokens=0),
+                total_tokens=usage.total_tokens,
+            ),
+        )
+        yield ResponseCompletedEvent(
+            type="response.completed", response=response, sequence_number=0
+        )
+
+
+def use_stub_model(manager, model: StubModel) -> None:
+    """Point a ``ManagerAgent`` and all of its specialists at ``model``."""
+    specialists = (
+        manager.course_agent,
+        manager.lessons_agent,
+        manager.students_agent,
+        manager.grades_agent,
+        manager.homeworks_agent,
+        manager.auth_agent,
+    )
+    # Agent tools and handoffs wrap these same Agent objects
+    for agent in [manager.agent] + [specialist.agent for specialist in specialists]:
+        agent.model = model
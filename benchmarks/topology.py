@@ -0,0 +1,146 @@
+"""
+Compare the manager agent topologies on a fixed set of queries.
+
+For every query and topology this records the number of model calls, the
+input/output tokens they used and the wall-clock latency, then prints the
+mean per topology. Needs working OpenAI and LMS credentials.
+
+    PYTHONPATH=. python benchmarks/topology.py --topologies nested flat --repeat 3
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from collections import defaultdict
+from typing import Any, Dict, List
+
+from agents import Runner, add_trace_processor, trace
+from agents.tracing import TracingProcessor
+
+from src.lms_agents.manager.manager_agent import ManagerAgent
+
+# Mix of single lookups, cross-resource questions and aggregates, in both
+# languages the assistant answers in
+QUERIES = [
+    "List all courses",
+    "How many students are there?",
+    "Show the grades of lesson 12",
+    "What is the average score in lesson 12 and how many students failed?",
+    "Which homeworks of lesson 12 have the lowest completion rate?",
+    "نمرات دانش آموز 5 را نشان بده",
+    "درس‌های دوره 3 کدامند؟",
+    "کدام دانش آموزان در درس 12 مردود شده‌اند و تکالیفشان را تحویل نداده‌اند؟",
+]
+
+
+class UsageCollector(TracingProcessor):
+    """Count model calls and token usage per trace."""
+
+    def __init__(self):
+        self.calls: Dict[str, int] = defaultdict(int)
+        self.input_tokens: Dict[str, int] = defaultdict(int)
+        self.output_tokens: Dict[str, int] = defaultdict(int)
+
+    def on_span_end(self, span) -> None:
+        data = span.span_data
+        if data.type == "response":
+            usage = getattr(data.response, "usage", None)
+            input_tokens = getattr(usage, "input_tokens", 0)
+            output_tokens = getattr(usage, "output_tokens", 0)
+        elif data.type == "generation":
+            usage = data.usage or {}
+            input_tokens = usage.get("input_tokens", 0)
+            output_tokens = usage.get("output_tokens", 0)
+        else:
+            return
+        self.calls[span.trace_id] += 1
+        self.input_tokens[span.trace_id] += input_tokens or 0
+        self.output_tokens[span.trace_id] += output_tokens or 0
+
+    def on_trace_start(self, trace) -> None:
+        pass
+
+    def on_trace_end(self, trace) -> None:
+        pass
+
+    def on_span_start(self, span) -> None:
+        pass
+
+    def shutdown(self) -> None:
+        pass
+
+    def force_flush(self) -> None:
+        pass
+
+
+async def run_query(
+    manager: ManagerAgent, collector: UsageCollector, query: str
+) -> Dict[str, Any]:
+    with trace(f"Topology benchmark ({manager.topology})") as current:
+        start = time.perf_counter()
+        try:
+            await Runner.run(manager.agent, query, max_turns=50)
+            error = None
+        except Exception as e:
+            error = str(e)
+        latency = time.perf_counter() - start
+
+    trace_id = current.trace_id
+    return {
+        "query": query,
+        "latency": latency,
+        "calls": collector.calls.get(trace_id, 0),
+        "input_tokens": collector.input_tokens.get(trace_id, 0),
+        "output_tokens": collector.output_tokens.get(trace_id, 0),
+        "error": error,
+    }
+
+
+def summarize(rows: List[Dict[str, Any]]) -> Dict[str, float]:
+    latencies = [row["latency"] for row in rows]
+    return {
+        "calls": statistics.mean(row["calls"] for row in rows),
+        "input_tokens": statistics.mean(row["input_tokens"] for row in rows),
+        "output_tokens": statistics.mean(row["output_tokens"] for row in rows),
+        "latency_p50": statistics.median(latencies),
+        "latency_mean": statistics.mean(latencies),
+        "errors": sum(1 for row in rows if row["error"]),
+    }
+
+
+async def main(topologies: List[str], repeat: int) -> None:
+    collector = UsageCollector()
+    add_trace_processor(collector)
+
+    results = {}
+    for topology in topologies:
+        manager = ManagerAgent(topology=topology)
+        rows = []
+        for _ in range(repeat):
+            for query in QUERIES:
+                rows.append(await run_query(manager, collector, query))
+        results[topology] = summarize(rows)
+
+    header = (
+        f"{'topology':<10} {'calls':>7} {'in tok':>9} {'out tok':>9} "
+        f"{'p50 s':>7} {'mean s':>7} {'errors':>6}"
+    )
+    print(header)
+    print("-" * len(header))
+    for topology, s in results.items():
+        print(
+            f"{topology:<10} {s['calls']:>7.2f} {s['input_tokens']:>9.0f} "
+            f"{s['output_tokens']:>9.0f} {s['latency_p50']:>7.2f} "
+            f"{s['latency_mean']:>7.2f} {s['errors']:>6}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--topologies", nargs="+", default=list(ManagerAgent.TOPOLOGIES)
+    )
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args()
+    asyncio.run(main(args.topologies, args.repeat))
@@ -1,33 +1,43 @@
 import gradio as gr
-import asyncio
 import logging
 
-from agents import Runner, trace
-from src.lms_agents.auth import auth_agent
-from src.lms_agents.manager.manager_agent import ManagerAgent
+from src.config.settings import settings
+from src.service.chat_service import chat_service
+from src.utils.instrumentation import metrics
 
 logger = logging.getLogger(__name__)
 
-# Initialize agent once
-manager_agent = ManagerAgent()
 
+def _render(progress, text):
+    """Show tool progress above the partial answer."""
+    lines = [f"- _{line}_" for line in progress]
+    return "\n".join(lines) + ("\n\n" + text if text else "")
 
-async def agent_reply(message, history):
+
+async def agent_reply(message, history, session_id=None):
+    """
+    Yield the reply while it is produced.
+
+    Tool calls are shown as they start and answer tokens as they arrive; the
+    last value is the final answer on its own.
+    """
     try:
-        with trace("User Assistant Session"):
-            result = await Runner.run(
-                manager_agent.agent,
-                message,
-                max_turns=50,
-            )
-            return result.final_output or "❌ No response generated"
+        progress, text = [], ""
+        async for event in chat_service.stream(
+            message, session_id=session_id, history=history
+        ):
+            if event.kind == "final":
+                yield event.text or "❌ No response generated"
+                return
+            if event.kind == "progress":
+                progress.append(event.text)
+                text = ""
+            else:
+                text = event.text
+            yield _render(progress, text)
     except Exception as e:
         logger.error(f"Error in agent reply: {e}")
-        return f"❌ Application failed: {e}"
-
-
-def chat(message, history):
-    return asyncio.run(agent_reply(message, history))
+        yield f"❌ Application failed: {e}"
 
 
 with gr.Blocks(theme=gr.themes.Soft()) as demo:
@@ -61,14 +71,33 @@ with gr.Blocks(theme=gr.themes.Soft()) as demo:
             send = gr.Button("🚀 Send", scale=1)
         clear = gr.Button("🗑️ Clear Chat", variant="stop")
 
-    def user_submit(user_message, history):
-        history = history + [(user_message, chat(user_message, history))]
-        return "", history
+    async def user_submit(user_message, history, request: gr.Request):
+        history = history + [(user_message, "")]
+        # Each browser session keeps its own conversation memory and answers
+        async for partial in agent_reply(
+            user_message, history[:-1], request.session_hash
+        ):
+            history[-1] = (user_message, partial)
+            yield "", history
+
+    def clear_chat(request: gr.Request):
+        chat_service.clear_session(request.session_hash)
+        return None
 
-    msg.submit(user_submit, [msg, chatbot], [msg, chatbot])
-    send.click(user_submit, [msg, chatbot], [msg, chatbot])
-    clear.click(lambda: None, None, chatbot, queue=False)
+    # Both triggers share one concurrency slot pool
+    msg.submit(user_submit, [msg, chatbot], [msg, chatbot], concurrency_id="chat")
+    send.click(user_submit, [msg, chatbot], [msg, chatbot], concurrency_id="chat")
+    clear.click(clear_chat, None, chatbot, queue=False)
 
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO)
+    chat_service.start()
+    if settings.METRICS_PORT:
+        metrics.serve(settings.METRICS_PORT)
+    # The handlers are coroutines, so every message runs on Gradio's single
+    # server loop and reuses the async LMS client pool bound to it
+    demo.queue(
+        default_concurrency_limit=settings.UI_CONCURRENCY_LIMIT,
+        max_size=settings.UI_MAX_QUEUE_SIZE or None,
+    )
     demo.launch()
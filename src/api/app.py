@@ -0,0 +1,198 @@
+"""
+Headless HTTP API for the assistant.
+
+    POST /v1/chat          {"message", "session_id"?, "user_id"?}
+                           -> {"request_id", "session_id", "reply"}
+    POST /v1/chat/stream   same body, answered as server-sent events
+    GET  /healthz
+    GET  /metrics          Prometheus metrics (needs prometheus_client)
+
+Every response carries an ``X-Request-ID`` header (taken from the request
+when given). Messages sharing a ``session_id`` are answered with that
+conversation's memory, which lives in the worker process, so route a
+session to one worker (or resend it and accept a cold memory). Cached
+answers are only shared between requests with the same ``user_id`` (or,
+without one, the same ``session_id``).
+
+Install the ``api`` extra (``pip install .[api]``) and run with
+``python -m src.api.app``; ``API_WORKERS`` > 1 starts several
+worker processes, each with its own agents and connection pools.
+"""
+
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+import asyncio
+import json
+import logging
+import uuid
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+from src.config.settings import settings
+from src.service.chat_service import chat_service
+from src.utils.instrumentation import metrics as prometheus_metrics
+from src.utils.lms_client import async_lms_client
+
+logger = logging.getLogger(__name__)
+
+REQUEST_ID_HEADER = "X-Request-ID"
+
+
+class BadRequest(Exception):
+    pass
+
+
+def _request_id(request: Request) -> str:
+    return request.headers.get(REQUEST_ID_HEADER, "")[:128] or uuid.uuid4().hex
+
+
+def _error(status: int, message: str, request_id: str) -> JSONResponse:
+    return JSONResponse(
+        {"request_id": request_id, "error": message},
+        status_code=status,
+        headers={REQUEST_ID_HEADER: request_id},
+    )
+
+
+async def _message(request: Request) -> Tuple[str, Optional[str], Optional[str]]:
+    """Read and validate the ``message``, ``session_id`` and ``user_id`` fields."""
+    try:
+        body = await request.json()
+    except ValueError:
+        raise BadRequest("Request body must be JSON")
+
+    message = body.get("message") if isinstance(body, dict) else None
+    if not isinstance(message, str) or not message.strip():
+        raise BadRequest("'message' must be a non-empty string")
+    if len(message) > settings.API_MAX_MESSAGE_CHARS:
+        raise BadRequest(
+            f"'message' is longer than {settings.API_MAX_MESSAGE_CHARS} characters"
+        )
+
+    ids = []
+    for name in ("session_id", "user_id"):
+        value = body.get(name)
+        if value is not None and not isinstance(value, str):
+            raise BadRequest(f"'{name}' must be a string")
+        ids.append(value or None)
+    return message.strip(), ids[0], ids[1]
+
+
+async def chat(request: Request) -> JSONResponse:
+    request_id = _request_id(request)
+    try:
+        message, session_id, user_id = await _message(request)
+        async with asyncio.timeout(settings.API_TIMEOUT):
+            reply = await chat_service.reply(
+                message, request_id, session_id, user_id=user_id
+            )
+    except BadRequest as e:
+        return _error(400, str(e), request_id)
+    except TimeoutError:
+        logger.warning(f"[{request_id}] Chat timed out after {settings.API_TIMEOUT}s")
+        return _error(504, "Timed out while generating the reply", request_id)
+    except Exception as e:
+        logger.error(f"[{request_id}] Chat failed: {e}")
+        return _error(500, f"Application failed: {e}", request_id)
+
+    return JSONResponse(
+        {"request_id": request_id, "session_id": session_id, "reply": reply},
+        headers={REQUEST_ID_HEADER: request_id},
+    )
+
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def _event_stream(
+    message: str,
+    request_id: str,
+    session_id: Optional[str],
+    user_id: Optional[str],
+) -> AsyncIterator[str]:
+    """Relay the chat events as SSE, ending with a "final" or "error" event."""
+    try:
+        async with asyncio.timeout(settings.API_TIMEOUT):
+            events = chat_service.stream(
+                message, request_id, session_id, user_id=user_id
+            )
+            async for event in events:
+                yield _sse(event.kind, {"request_id": request_id, "text": event.text})
+    except TimeoutError:
+        logger.warning(f"[{request_id}] Stream timed out after {settings.API_TIMEOUT}s")
+        yield _sse(
+            "error",
+            {"request_id": request_id, "error": "Timed out while generating"},
+        )
+    except Exception as e:
+        logger.error(f"[{request_id}] Stream failed: {e}")
+        yield _sse(
+            "error", {"request_id": request_id, "error": f"Application failed: {e}"}
+        )
+
+
+async def chat_stream(request: Request) -> Response:
+    request_id = _request_id(request)
+    try:
+        message, session_id, user_id = await _message(request)
+    except BadRequest as e:
+        return _error(400, str(e), request_id)
+
+    return StreamingResponse(
+        _event_stream(message, request_id, session_id, user_id),
+        media_type="text/event-stream",
+        headers={
+            REQUEST_ID_HEADER: request_id,
+            "Cache-Control": "no-cache",
+            # Keep reverse proxies from buffering the stream
+            "X-Accel-Buffering": "no",
+        },
+    )
+
+
+async def healthz(request: Request) -> JSONResponse:
+    return JSONResponse({"status": "ok"})
+
+
+async def metrics(request: Request) -> Response:
+    scrape = prometheus_metrics.render()
+    if scrape is None:
+        return JSONResponse({"error": "Metrics are disabled"}, status_code=404)
+    body, content_type = scrape
+    return Response(body, media_type=content_type)
+
+
+@asynccontextmanager
+async def lifespan(app: Starlette):
+    chat_service.start()
+    try:
+        yield
+    finally:
+        chat_service.stop()
+        await async_lms_client.aclose()
+
+
+app = Starlette(
+    routes=[
+        Route("/v1/chat", chat, methods=["POST"]),
+        Route("/v1/chat/stream", chat_stream, methods=["POST"]),
+        Route("/healthz", healthz, methods=["GET"]),
+        Route("/metrics", metrics, methods=["GET"]),
+    ],
+    lifespan=lifespan,
+)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    uvicorn.run(
+        "src.api.app:app",
+        host=settings.API_HOST,
+        port=settings.API_PORT,
+        workers=settings.API_WORKERS,
+    )
@@ -1,7 +1,7 @@
 """Configuration settings for the Student Assistant System."""
 
 import os
-from typing import Dict, Any
+from typing import Dict, Any, List
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -22,9 +22,161 @@ class Settings:
     USERNAME = os.getenv("USERNAME")
     PASSWORD = os.getenv("PASSWORD")
 
+    # Seconds before expiry at which cached access tokens are refreshed
+    TOKEN_REFRESH_MARGIN: float = float(os.getenv("TOKEN_REFRESH_MARGIN", "60"))
+
     # API Endpoints
     API_ENDPOINTS: Dict[str, str] = {"base_url": "https://api.mahanls.com"}
 
+    # LMS HTTP client (connection pooling and timeouts)
+    LMS_POOL_CONNECTIONS: int = int(os.getenv("LMS_POOL_CONNECTIONS", "10"))
+    LMS_POOL_MAXSIZE: int = int(os.getenv("LMS_POOL_MAXSIZE", "20"))
+    LMS_POOL_BLOCK: bool = os.getenv("LMS_POOL_BLOCK", "true").lower() == "true"
+    LMS_KEEP_ALIVE: bool = os.getenv("LMS_KEEP_ALIVE", "true").lower() == "true"
+    LMS_CONNECT_TIMEOUT: float = float(os.getenv("LMS_CONNECT_TIMEOUT", "5"))
+    LMS_READ_TIMEOUT: float = float(os.getenv("LMS_READ_TIMEOUT", "10"))
+    LMS_KEEPALIVE_EXPIRY: float = float(os.getenv("LMS_KEEPALIVE_EXPIRY", "30"))
+    # Only used by the async client, and only when the h2 package is installed
+    LMS_HTTP2: bool = os.getenv("LMS_HTTP2", "false").lower() == "true"
+    # Requests in flight towards the LMS per process (per event loop for the
+    # async client); 0 disables the limit
+    LMS_MAX_CONCURRENCY: int = int(os.getenv("LMS_MAX_CONCURRENCY", "8"))
+    # Identical GETs already in flight (same URL, params and credentials) are
+    # joined instead of sent again
+    LMS_SINGLE_FLIGHT: bool = os.getenv("LMS_SINGLE_FLIGHT", "true").lower() == "true"
+    # Client-side limits per endpoint family (API resource, e.g. "grades"):
+    # requests per second with a burst allowance, and requests in flight;
+    # 0 disables a limit. The dicts override single families.
+    LMS_RATE_LIMIT: float = float(os.getenv("LMS_RATE_LIMIT", "10"))
+    LMS_RATE_BURST: int = int(os.getenv("LMS_RATE_BURST", "20"))
+    LMS_RATE_LIMITS: Dict[str, float] = {"token": 2}
+    LMS_FAMILY_CONCURRENCY: int = int(os.getenv("LMS_FAMILY_CONCURRENCY", "4"))
+    LMS_FAMILY_CONCURRENCY_LIMITS: Dict[str, int] = {"token": 1}
+    # Batch tools: ids fetched at once on a cache miss, and ids per call
+    LMS_BATCH_CONCURRENCY: int = int(os.getenv("LMS_BATCH_CONCURRENCY", "4"))
+    LMS_BATCH_MAX_IDS: int = int(os.getenv("LMS_BATCH_MAX_IDS", "100"))
+
+    # Retries: backoff cap (and the longest Retry-After honored), and the
+    # retry budget shared by the process: retries allowed per request sent,
+    # plus a floor of retries per second
+    RETRY_MAX_DELAY: float = float(os.getenv("RETRY_MAX_DELAY", "8"))
+    RETRY_BUDGET_RATIO: float = float(os.getenv("RETRY_BUDGET_RATIO", "0.2"))
+    RETRY_BUDGET_MIN_PER_SECOND: float = float(
+        os.getenv("RETRY_BUDGET_MIN_PER_SECOND", "1")
+    )
+    # Per-endpoint circuit breaker: consecutive failures that open it (0
+    # disables it) and seconds before a probe request is let through
+    CIRCUIT_FAILURE_THRESHOLD: int = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+    CIRCUIT_RESET_TIMEOUT: float = float(os.getenv("CIRCUIT_RESET_TIMEOUT", "30"))
+
+    # Page size requested from list endpoints (0 keeps the API default)
+    LMS_PAGE_SIZE: int = int(os.getenv("LMS_PAGE_SIZE", "100"))
+    LMS_PAGE_SIZE_PARAM: str = os.getenv("LMS_PAGE_SIZE_PARAM", "page_size")
+
+    # Response cache (TTL in seconds per API resource, size in bytes)
+    CACHE_ENABLED: bool = os.getenv("CACHE_ENABLED", "true").lower() == "true"
+    # One of "memory", "sqlite" or "redis"; the last two are shared by workers
+    CACHE_BACKEND: str = os.getenv("CACHE_BACKEND", "memory")
+    CACHE_SQLITE_PATH: str = os.getenv("CACHE_SQLITE_PATH", ".cache/lms_cache.db")
+    CACHE_REDIS_URL: str = os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0")
+    CACHE_MAX_BYTES: int = int(os.getenv("CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+    CACHE_DEFAULT_TTL: float = float(os.getenv("CACHE_DEFAULT_TTL", "60"))
+    CACHE_TTLS: Dict[str, float] = {
+        "courses": 3600,
+        "lessons": 1800,
+        "students": 600,
+        "homeworks": 300,
+        "grades": 120,
+        "homework-responses": 30,
+    }
+
+    # Local entity mirror; data older than these ages (seconds) is refetched.
+    # With SYNC_ENABLED, synced resources stay fresh for 2 * SYNC_INTERVAL
+    ENTITY_STORE_ENABLED: bool = (
+        os.getenv("ENTITY_STORE_ENABLED", "true").lower() == "true"
+    )
+    ENTITY_STORE_MAX_AGE: Dict[str, float] = dict(CACHE_TTLS)
+
+    # Tool results: rows returned to the model per list (0 = no cap) and
+    # most frequent values listed in the summary of a capped list
+    RESULT_MAX_ROWS: int = int(os.getenv("RESULT_MAX_ROWS", "50"))
+    RESULT_TOP_N: int = int(os.getenv("RESULT_TOP_N", "5"))
+
+    # How ManagerAgent reaches the specialists: "nested" (agents as tools),
+    # "flat" (all function tools on the manager) or "handoffs"
+    AGENT_TOPOLOGY: str = os.getenv("AGENT_TOPOLOGY", "nested")
+    # Let the model issue independent tool calls in one turn; they run
+    # concurrently
+    PARALLEL_TOOL_CALLS: bool = (
+        os.getenv("PARALLEL_TOOL_CALLS", "true").lower() == "true"
+    )
+
+    # Gradio queue: chat requests served at once per process, and requests
+    # allowed to wait before new ones are turned away (0 = unbounded)
+    UI_CONCURRENCY_LIMIT: int = int(os.getenv("UI_CONCURRENCY_LIMIT", "8"))
+    UI_MAX_QUEUE_SIZE: int = int(os.getenv("UI_MAX_QUEUE_SIZE", "64"))
+
+    # HTTP API (src/api/app.py); the timeout in seconds covers a whole reply
+    API_HOST: str = os.getenv("API_HOST", "0.0.0.0")
+    API_PORT: int = int(os.getenv("API_PORT", "8000"))
+    API_WORKERS: int = int(os.getenv("API_WORKERS", "1"))
+    API_TIMEOUT: float = float(os.getenv("API_TIMEOUT", "120"))
+    API_MAX_MESSAGE_CHARS: int = int(os.getenv("API_MAX_MESSAGE_CHARS", "4000"))
+
+    # Conversation memory: tokens of history sent with each message, tokens of
+    # older turns that trigger a summary, and resolved ids kept per entity kind
+    SESSION_MEMORY_ENABLED: bool = (
+        os.getenv("SESSION_MEMORY_ENABLED", "true").lower() == "true"
+    )
+    SESSION_TOKEN_BUDGET: int = int(os.getenv("SESSION_TOKEN_BUDGET", "2000"))
+    SESSION_SUMMARY_TRIGGER: int = int(os.getenv("SESSION_SUMMARY_TRIGGER", "1000"))
+    SESSION_SUMMARY_MODEL: str = os.getenv("SESSION_SUMMARY_MODEL", OPENAI_MODEL)
+    SESSION_MAX_ENTITIES: int = int(os.getenv("SESSION_MAX_ENTITIES", "5"))
+    SESSION_MAX_SESSIONS: int = int(os.getenv("SESSION_MAX_SESSIONS", "1000"))
+    SESSION_TTL: float = float(os.getenv("SESSION_TTL", "3600"))
+
+    # Semantic answer cache: minimum cosine similarity for two questions to
+    # share an answer, and how long (seconds) an answer may be reused. Only
+    # used with SYNC_ENABLED, which drops the cached answers when data changes
+    ANSWER_CACHE_ENABLED: bool = (
+        os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+    )
+    ANSWER_CACHE_THRESHOLD: float = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.9"))
+    ANSWER_CACHE_TTL: float = float(os.getenv("ANSWER_CACHE_TTL", "300"))
+    ANSWER_CACHE_MAX_ENTRIES: int = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "2000"))
+
+    # Instrumentation: Prometheus metrics (needs prometheus_client; the API
+    # serves them at /metrics, the Gradio app on METRICS_PORT if set) and
+    # OpenTelemetry export of the agent traces (needs opentelemetry-api and a
+    # tracer provider configured by the deployment)
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    METRICS_PORT: int = int(os.getenv("METRICS_PORT", "0"))
+    OTEL_ENABLED: bool = os.getenv("OTEL_ENABLED", "false").lower() == "true"
+
+    # Answer simple lookups from templates without calling the agents
+    ROUTER_ENABLED: bool = os.getenv("ROUTER_ENABLED", "true").lower() == "true"
+
+    # Grade analytics: score fields of grade records and the passing score
+    GRADE_SCORE_FIELD: str = os.getenv("GRADE_SCORE_FIELD", "total_score")
+    GRADE_ATTENDANCE_FIELD: str = os.getenv("GRADE_ATTENDANCE_FIELD", "nomrehozoor")
+    GRADE_PASS_MARK: float = float(os.getenv("GRADE_PASS_MARK", "10"))
+
+    # Background sync of the entity mirror (intervals in seconds)
+    SYNC_ENABLED: bool = os.getenv("SYNC_ENABLED", "false").lower() == "true"
+    SYNC_RESOURCES: List[str] = os.getenv(
+        "SYNC_RESOURCES", "students,courses,lessons,homeworks,grades,homework-responses"
+    ).split(",")
+    SYNC_INTERVAL: float = float(os.getenv("SYNC_INTERVAL", "60"))
+    # Deltas cannot see deletions, so a full diff is forced this often
+    SYNC_FULL_INTERVAL: float = float(os.getenv("SYNC_FULL_INTERVAL", "3600"))
+    # Checkpoints hold full student and grade records (personal data); the
+    # directory and its files are readable by the service user only
+    SYNC_STATE_DIR: str = os.getenv("SYNC_STATE_DIR", ".cache/sync")
+    # Record field and query parameters used for modified-since fetches
+    SYNC_MODIFIED_FIELD: str = os.getenv("SYNC_MODIFIED_FIELD", "modified")
+    SYNC_MODIFIED_PARAM: str = os.getenv("SYNC_MODIFIED_PARAM", "modified__gte")
+    SYNC_ORDERING_PARAM: str = os.getenv("SYNC_ORDERING_PARAM", "ordering")
+
     # Validation
     def validate(self) -> None:
         """Validate critical settings."""
@@ -1,8 +1,6 @@
 from typing import List
 from src.lms_agents.base_agent import BaseAgent
-from src.tools.auth.auth_tools import (
-    authenticate_user,
-)
+from src.tools.auth.auth_tools import authenticate_user_async_tool
 
 
 class AuthenticationAgent(BaseAgent):
@@ -30,7 +28,7 @@ class AuthenticationAgent(BaseAgent):
 
     def __init__(self):
         tools = [
-            authenticate_user,
+            authenticate_user_async_tool,
         ]
 
         super().__init__(
@@ -1,10 +1,13 @@
 from abc import ABC, abstractmethod
 from typing import List, Any, Optional, Dict
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
+import json
 import logging
-from agents import Agent
+from agents import Agent, FunctionTool, ModelSettings
 from smolagents import LiteLLMModel, CodeAgent
 from src.config.settings import settings
+from src.utils.cache import response_cache
+from src.service.session_memory import record_tool_call
 
 logger = logging.getLogger(__name__)
 
@@ -18,6 +21,25 @@ class AgentResponse:
     error: Optional[str] = None
     metadata: Dict[str, Any] = None
 
+    def to_compact(self) -> str:
+        """Serialize to minified JSON, leaving out empty fields."""
+        payload = {"success": self.success}
+        if self.data is not None:
+            payload["data"] = self.data
+        if self.error:
+            payload["error"] = self.error
+        if self.metadata:
+            payload["metadata"] = {
+                k: v for k, v in self.metadata.items() if v is not None
+            }
+        return json.dumps(
+            payload, ensure_ascii=False, separators=(",", ":"), default=str
+        )
+
+    def __str__(self) -> str:
+        # Tool results are handed to the model as str(result)
+        return self.to_compact()
+
 
 class BaseAgent(ABC):
     """Abstract base class for all agents in the system."""
@@ -54,9 +76,35 @@ class BaseAgent(ABC):
             name=self.name,
             instructions=self.instructions,
             model=self.model,
-            tools=self.tools,
+            tools=[self._apply_cache_policy(tool) for tool in self.tools],
+            model_settings=ModelSettings(
+                parallel_tool_calls=settings.PARALLEL_TOOL_CALLS
+            ),
         )
 
+    def _apply_cache_policy(self, tool: Any) -> Any:
+        """
+        Run a function tool with the response cache switched per ``cache_enabled``.
+
+        The entity ids a call uses are recorded in the conversation's memory.
+        """
+        if not isinstance(tool, FunctionTool):
+            return tool
+
+        invoke = tool.on_invoke_tool
+        cache_enabled = self.cache_enabled
+
+        async def on_invoke_tool(ctx, arguments):
+            token = response_cache.enabled.set(cache_enabled)
+            try:
+                result = await invoke(ctx, arguments)
+            finally:
+                response_cache.enabled.reset(token)
+            record_tool_call(tool.name, arguments, result)
+            return result
+
+        return replace(tool, on_invoke_tool=on_invoke_tool)
+
     @abstractmethod
     def get_capabilities(self) -> List[str]:
         """Return list of capabilities this agent provides."""
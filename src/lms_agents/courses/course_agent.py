@@ -1,8 +1,8 @@
 from typing import List
 from src.lms_agents.base_agent import BaseAgent
 from src.tools.course.course_tools import (
-    get_all_courses,
-    get_courses_by_category,
+    get_all_courses_async,
+    get_courses_by_category_async,
 )
 
 
@@ -20,6 +20,7 @@ class CourseAgent(BaseAgent):
     - Always validate input parameters before making API calls
     - Provide helpful error messages when operations fail
     - Include relevant metadata in your responses (course count, categories, etc.)
+    - Tools return a compact set of fields and at most a page of rows with a summary; pass `fields` to ask for other fields, or ["*"] for full records
     - Be conversational and helpful in your responses
     - If a request fails, suggest alternative approaches
     """
@@ -35,8 +36,8 @@ class CourseAgent(BaseAgent):
     def __init__(self):
         """Initialize the Course Agent with enhanced tools."""
         tools = [
-            get_all_courses,
-            get_courses_by_category,
+            get_all_courses_async,
+            get_courses_by_category_async,
         ]
 
         super().__init__(
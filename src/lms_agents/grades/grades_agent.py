@@ -2,9 +2,14 @@ from typing import List
 from src.config.settings import settings
 from src.lms_agents.base_agent import BaseAgent
 from src.tools.grades.grades_tools import (
-    get_all_grades,
-    get_lesson_grades,
-    get_student_grades,
+    get_all_grades_async,
+    get_lesson_grades_async,
+    get_student_grades_async,
+    get_grades_for_students_async,
+)
+from src.tools.grades.grades_analytics import (
+    get_grade_rollup_async,
+    get_grade_statistics_async,
 )
 
 
@@ -18,11 +23,19 @@ class GradesAgent(BaseAgent):
     - Retrieve all available grades
     - Filter grades by lesson
     - Filter grades by student
+    - Retrieve the grades of several students in one call
+    - Compute grade statistics (mean, median, percentiles, pass rate, nomrehozoor)
+    - Roll grades up per student or per lesson, e.g. to find failing students
     
     Guidelines:
+    - Prefer the statistics and rollup tools over fetching grade lists for any
+      question about averages, distributions, pass rates or rankings
+    - When a question involves several students, pass all their ids to one batch
+      tool call instead of calling a single-id tool per student
     - Always validate input parameters before making API calls
     - Provide helpful error messages when operations fail
     - Include relevant metadata in your responses (grade course, grade lesson, etc.)
+    - Tools return a compact set of fields and at most a page of rows with a summary; pass `fields` to ask for other fields, or ["*"] for full records
     - Be conversational and helpful in your responses
     - If a request fails, suggest alternative approaches
     """
@@ -32,16 +45,21 @@ class GradesAgent(BaseAgent):
     - Getting all grades
     - Filtering grades by lesson
     - Filtering grades by student
+    - Grades of several students at once
     - Grade information retrieval
+    - Grade statistics and per-student/per-lesson averages and pass rates
     Use this when users ask about grades, scores, or academic performance.
     """
 
     def __init__(self):
         """Initialize the Grades Agent with external tools."""
         tools = [
-            get_all_grades,
-            get_lesson_grades,
-            get_student_grades,
+            get_all_grades_async,
+            get_lesson_grades_async,
+            get_student_grades_async,
+            get_grades_for_students_async,
+            get_grade_statistics_async,
+            get_grade_rollup_async,
         ]
         super().__init__(
             name="Grades Services Agent", instructions=self.INSTRUCTIONS, tools=tools
@@ -58,4 +76,7 @@ class GradesAgent(BaseAgent):
             "get_all_grades",
             "get_lesson_grades",
             "get_student_grades",
+            "get_grades_for_students",
+            "get_grade_statistics",
+            "get_grade_rollup",
         ]
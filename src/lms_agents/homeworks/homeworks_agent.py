@@ -4,12 +4,14 @@ import requests
 from src.config.settings import settings
 from src.lms_agents.base_agent import BaseAgent
 from src.tools.homeworks.homeworks_tools import (
-    get_all_homework_responses,
-    get_all_homeworks,
-    get_homeworks_by_lesson,
-    get_homeworks_responses_by_user,
-    get_all_homework_responses_by_homework,
+    get_all_homework_responses_async,
+    get_all_homeworks_async,
+    get_homeworks_by_lesson_async,
+    get_homeworks_responses_by_user_async,
+    get_homeworks_responses_by_users_async,
+    get_all_homework_responses_by_homework_async,
 )
+from src.tools.homeworks.homeworks_analytics import get_homework_completion_async
 
 
 class HomeworksAgent(BaseAgent):
@@ -24,11 +26,19 @@ class HomeworksAgent(BaseAgent):
     - Filter homework-responses by homework
     - Filter homeworks by lesson
     - Filter homework-responses by user
+    - Retrieve the homework-responses of several users in one call
+    - Report missing submissions, late rates and completion per homework and lesson
     
     Guidelines:
+    - Use the homework completion tool for questions about who has or has not
+      submitted, late submissions or completion rates, instead of chaining
+      the list tools
+    - When a question involves several students, pass all their ids to one batch
+      tool call instead of calling a single-id tool per student
     - Always validate input parameters before making API calls
     - Provide helpful error messages when operations fail
     - Include relevant metadata in your responses (homeworks count, homework-responses count, etc.)
+    - Tools return a compact set of fields and at most a page of rows with a summary; pass `fields` to ask for other fields, or ["*"] for full records
     - Be conversational and helpful in your responses
     - If a request fails, suggest alternative approaches
     """
@@ -40,19 +50,23 @@ class HomeworksAgent(BaseAgent):
     - Filtering homework-responses by homework
     - Filtering homeworks by lesson
     - Filtering homework-responses by student
+    - Homework-responses of several students at once
     - Homework information retrieval
     - Homework-response information retrieval
+    - Missing submissions, late rates and completion per homework and lesson
     Use this when users ask about homeworks, homework information, or homeworks related content.
     """
 
     def __init__(self):
         """Initialize the Homeworks Services Agent with external tools."""
         tools = [
-            get_all_homeworks,
-            get_all_homework_responses,
-            get_homeworks_by_lesson,
-            get_homeworks_responses_by_user,
-            get_all_homework_responses_by_homework,
+            get_all_homeworks_async,
+            get_all_homework_responses_async,
+            get_homeworks_by_lesson_async,
+            get_homeworks_responses_by_user_async,
+            get_homeworks_responses_by_users_async,
+            get_all_homework_responses_by_homework_async,
+            get_homework_completion_async,
         ]
         super().__init__(
             name="Homeworks Services Agent", instructions=self.INSTRUCTIONS, tools=tools
@@ -70,5 +84,7 @@ class HomeworksAgent(BaseAgent):
             "get_all_homework_responses",
             "get_homeworks_by_lesson",
             "get_homeworks_responses_by_user",
+            "get_homeworks_responses_by_users",
             "get_all_homework_responses_by_homework",
+            "get_homework_completion",
         ]
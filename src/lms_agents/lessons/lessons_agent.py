@@ -4,8 +4,8 @@ import requests
 from src.config.settings import settings
 from src.lms_agents.base_agent import BaseAgent
 from src.tools.lessons.lessons_tools import (
-    get_all_lessons,
-    get_lessons_by_course,
+    get_all_lessons_async,
+    get_lessons_by_course_async,
 )
 
 
@@ -23,6 +23,7 @@ class LessonsAgent(BaseAgent):
     - Always validate input parameters before making API calls
     - Provide helpful error messages when operations fail
     - Include relevant metadata in your responses (lesson count, etc.)
+    - Tools return a compact set of fields and at most a page of rows with a summary; pass `fields` to ask for other fields, or ["*"] for full records
     - Be conversational and helpful in your responses
     - If a request fails, suggest alternative approaches
     """
@@ -39,8 +40,8 @@ class LessonsAgent(BaseAgent):
     def __init__(self):
         """Initialize the Lessons Agent with external tools."""
         tools = [
-            get_all_lessons,
-            get_lessons_by_course,
+            get_all_lessons_async,
+            get_lessons_by_course_async,
         ]
         super().__init__(
             name="Lessons Services Agent", instructions=self.INSTRUCTIONS, tools=tools
@@ -11,7 +11,7 @@ from src.lms_agents.auth.auth_agent import AuthenticationAgent
 
 from agents import Agent, ModelSettings
 from src.config.settings import settings
-from typing import Dict, List
+from typing import Any, Dict, List
 import logging
 
 logger = logging.getLogger(__name__)
@@ -44,10 +44,48 @@ class ManagerAgent:
     - Grades Agent: Retrieve and analyze grade information
     
     For complex requests, break them down into steps and use multiple agents as needed.
+    Call agents whose work does not depend on each other in the same turn so they
+    run in parallel. When a question covers several students, ask for all of
+    them in one call rather than one call per student: the batch tools
+    (get_students_by_ids, get_grades_for_students, get_homeworks_responses_by_users)
+    take a list of student ids.
     """
 
-    def __init__(self):
-        """Initialize the Manager Agent with enhanced coordination."""
+    # Replaces the "Available Agents" section in flat mode, where the manager
+    # calls the LMS tools itself
+    FLAT_INSTRUCTIONS = """
+    You have direct access to the LMS tools for courses, lessons, students,
+    grades, homeworks and authentication. Call them yourself, in parallel when
+    the calls are independent, and combine their results in your answer.
+    Prefer the statistics, rollup and homework completion tools over fetching
+    and aggregating raw lists.
+    """
+
+    # Appended to each specialist's instructions in handoffs mode
+    RETURN_INSTRUCTIONS = """
+    If the question, or part of it, is outside your area, hand the
+    conversation back to the Educational Manager Agent instead of answering it.
+    """
+
+    TOPOLOGIES = ("nested", "flat", "handoffs")
+
+    def __init__(self, topology: str = None):
+        """
+        Initialize the Manager Agent with enhanced coordination.
+
+        Args:
+            topology: How the specialists are wired in (defaults to
+                ``settings.AGENT_TOPOLOGY``):
+                "nested" exposes each specialist as a tool backed by its own
+                model conversation; "flat" gives the manager every
+                specialist's function tools directly; "handoffs" lets the
+                manager hand the conversation over to a specialist, which
+                hands it back for anything outside its area.
+        """
+        self.topology = (topology or settings.AGENT_TOPOLOGY).lower()
+        if self.topology not in self.TOPOLOGIES:
+            raise ValueError(f"Unknown agent topology: {self.topology}")
+
         # Initialize specialized agents
         self.course_agent = CourseAgent()
         self.lessons_agent = LessonsAgent()
@@ -56,26 +94,61 @@ class ManagerAgent:
         self.homeworks_agent = HomeworksAgent()
         self.auth_agent = AuthenticationAgent()
 
+        specialists = [
+            self.course_agent,
+            self.lessons_agent,
+            self.students_agent,
+            self.grades_agent,
+            self.homeworks_agent,
+            self.auth_agent,
+        ]
+
+        instructions = self.INSTRUCTIONS
+        tools, handoffs = [], []
+        if self.topology == "nested":
+            tools = [specialist.agent_tool for specialist in specialists]
+        elif self.topology == "flat":
+            instructions = (
+                self.INSTRUCTIONS.split("Available Agents:")[0] + self.FLAT_INSTRUCTIONS
+            )
+            tools = self._flatten_tools(specialists)
+        else:
+            handoffs = [specialist.agent for specialist in specialists]
+
         # Create main coordinating agent
         self.agent = Agent(
             name="Educational Manager Agent",
-            instructions=self.INSTRUCTIONS,
-            tools=[
-                self.course_agent.agent_tool,
-                self.lessons_agent.agent_tool,
-                self.students_agent.agent_tool,
-                self.grades_agent.agent_tool,
-                self.homeworks_agent.agent_tool,
-                self.auth_agent.agent_tool,
-            ],
+            instructions=instructions,
+            tools=tools,
+            handoffs=handoffs,
             model=settings.OPENAI_MODEL,
             model_settings=ModelSettings(
                 verbosity="medium",
                 max_tokens=2000,  # Allow for more comprehensive responses
+                parallel_tool_calls=settings.PARALLEL_TOOL_CALLS,
             ),
         )
 
-        logger.info("Manager Agent initialized with all specialized agents")
+        if self.topology == "handoffs":
+            # The specialists belong to this manager, so wiring the way back
+            # into their agents does not affect any other topology
+            for specialist in specialists:
+                specialist.agent.instructions += self.RETURN_INSTRUCTIONS
+                specialist.agent.handoffs = [self.agent]
+
+        logger.info(
+            f"Manager Agent initialized with all specialized agents ({self.topology})"
+        )
+
+    @staticmethod
+    def _flatten_tools(specialists: List[Any]) -> List[Any]:
+        """Collect the specialists' function tools, first one wins per name."""
+        tools = {}
+        for specialist in specialists:
+            # ``agent.tools`` carries each specialist's cache policy
+            for tool in specialist.agent.tools:
+                tools.setdefault(tool.name, tool)
+        return list(tools.values())
 
     def get_available_capabilities(self) -> Dict[str, List[str]]:
         """Return all capabilities across agents."""
@@ -0,0 +1,354 @@
+"""Rule-based fast path that answers simple lookups without the agent graph."""
+
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Pattern, Tuple
+import logging
+import re
+import time
+
+from src.config.settings import settings
+from src.lms_agents.base_agent import AgentResponse
+from src.tools.course.course_tools import aget_all_courses, aget_courses_by_category
+from src.tools.grades.grades_tools import aget_lesson_grades, aget_student_grades
+from src.tools.homeworks.homeworks_tools import (
+    aget_all_homeworks,
+    aget_homeworks_by_lesson,
+)
+from src.tools.lessons.lessons_tools import aget_all_lessons, aget_lessons_by_course
+from src.tools.students.students_tools import aget_all_students, aget_student_by_id
+from src.utils.text import normalize_text
+
+logger = logging.getLogger(__name__)
+
+# Patterns are matched against ``normalize_text`` output: lower case, no
+# punctuation, ASCII digits and Persian letters (ی, ک, ا for آ, ZWNJ as a
+# space). Every pattern must match the whole message, so anything beyond a
+# plain lookup falls through to the agents.
+_EN_ASK = (
+    r"(?:(?:please |can you |could you )?"
+    r"(?:list|show|get|give|display|fetch|find|what are|which are)"
+    r"(?: me)? )?(?:all |the |all the |all of the )?"
+)
+_EN_END = r"(?: please)?"
+_FA_ASK = r"(?:لطفا )?(?:لیست |فهرست |همه |همه ی |تمام |تمامی )?"
+_FA_END = (
+    r"(?: (?:رو|را))?"
+    r"(?: (?:نشون بده|نشان بده|بده|بیار|لیست کن|میخوام|می خوام"
+    r"|چیه|چی هست|کدامند))?"
+    r"(?: لطفا)?"
+)
+_EN_COUNT = r"(?:how many|number of|count(?: of)?|total)"
+_FA_COUNT_BEFORE = r"(?:تعداد|چند تا|چندتا|چند)"
+_FA_COUNT_AFTER = r"(?: (?:داریم|هست|وجود دارد|وجود داره|موجوده|است))?"
+_ID = r"(?: (?:id|no|number|with id|شماره|کد|با شماره|با کد|با ایدی|ایدی))? ?"
+
+# English and Persian nouns per resource
+_NOUNS = {
+    "courses": (r"courses?", r"دوره ?(?:ها|های)?"),
+    "lessons": (r"lessons?", r"(?:درس ?(?:ها|های)?|دروس)"),
+    "students": (
+        r"students?",
+        r"(?:دانشجو ?(?:یان|ها|های)?|دانش ?اموز ?(?:ان|ها|های)?)",
+    ),
+    "homeworks": (
+        r"(?:homeworks?|assignments?)",
+        r"(?:تکالیف|تکلیف ?(?:ها|های)?)",
+    ),
+    "grades": (r"(?:grades?|scores?|marks?)", r"(?:نمرات|نمره ?(?:ها|های)?)"),
+    "course": (r"course", r"دوره ?ی?"),
+    "lesson": (r"lesson", r"درس ?ی?"),
+    "student": (r"(?:student|user)", r"(?:دانشجو ?ی?|دانش ?اموز ?ی?)"),
+    "category": (r"category", r"دسته ?(?:بندی)? ?ی?"),
+}
+
+
+def _en(resource: str) -> str:
+    return _NOUNS[resource][0]
+
+
+def _fa(resource: str) -> str:
+    return _NOUNS[resource][1]
+
+
+def _list_patterns(resource: str) -> List[str]:
+    return [
+        rf"{_EN_ASK}{_en(resource)}(?: (?:list|are there|available))?{_EN_END}",
+        rf"{_FA_ASK}{_fa(resource)}(?: موجود)?{_FA_END}",
+    ]
+
+
+def _count_patterns(resource: str) -> List[str]:
+    return [
+        rf"{_EN_COUNT} {_en(resource)}(?: (?:are there|do we have|exist))?{_EN_END}",
+        rf"{_FA_COUNT_BEFORE} {_fa(resource)}{_FA_COUNT_AFTER}",
+    ]
+
+
+def _related_patterns(items: str, owner: str, group: str) -> List[str]:
+    """Patterns for "<items> of <owner> <id>" in both languages."""
+    number = rf"(?P<{group}>\d+)"
+    return [
+        rf"{_EN_ASK}{_en(items)} (?:of|for|in) (?:the )?{_en(owner)}{_ID}{number}"
+        rf"{_EN_END}",
+        rf"{_EN_ASK}{_en(owner)}{_ID}{number}(?: s)? {_en(items)}{_EN_END}",
+        rf"{_FA_ASK}{_fa(items)} ?ی? {_fa(owner)}{_ID}{number}{_FA_END}",
+    ]
+
+
+def _compile(patterns: List[str]) -> Tuple[Pattern, ...]:
+    return tuple(re.compile(p) for p in patterns)
+
+
+@dataclass(frozen=True)
+class Intent:
+    """A simple lookup: the messages that ask for it and how to answer it."""
+
+    name: str
+    resource: str
+    patterns: Tuple[Pattern, ...]
+    handler: Callable[..., Awaitable[AgentResponse]]
+    # "list", "count" or "record"
+    answer: str = "list"
+
+
+@dataclass
+class RouteMatch:
+    intent: Intent
+    arguments: Dict[str, str]
+
+
+INTENTS: Tuple[Intent, ...] = (
+    Intent(
+        "list_courses", "courses", _compile(_list_patterns("courses")), aget_all_courses
+    ),
+    Intent(
+        "count_courses",
+        "courses",
+        _compile(_count_patterns("courses")),
+        aget_all_courses,
+        answer="count",
+    ),
+    Intent(
+        "courses_by_category",
+        "courses",
+        _compile(_related_patterns("courses", "category", "category_id")),
+        aget_courses_by_category,
+    ),
+    Intent(
+        "list_lessons", "lessons", _compile(_list_patterns("lessons")), aget_all_lessons
+    ),
+    Intent(
+        "count_lessons",
+        "lessons",
+        _compile(_count_patterns("lessons")),
+        aget_all_lessons,
+        answer="count",
+    ),
+    Intent(
+        "lessons_by_course",
+        "lessons",
+        _compile(_related_patterns("lessons", "course", "course_id")),
+        aget_lessons_by_course,
+    ),
+    Intent(
+        "list_students",
+        "students",
+        _compile(_list_patterns("students")),
+        aget_all_students,
+    ),
+    Intent(
+        "count_students",
+        "students",
+        _compile(_count_patterns("students")),
+        aget_all_students,
+        answer="count",
+    ),
+    Intent(
+        "student_by_id",
+        "students",
+        _compile(
+            [
+                rf"{_EN_ASK}{_en('student')}{_ID}(?P<student_id>\d+){_EN_END}",
+                rf"{_FA_ASK}{_fa('student')}{_ID}(?P<student_id>\d+){_FA_END}",
+            ]
+        ),
+        aget_student_by_id,
+        answer="record",
+    ),
+    Intent(
+        "student_grades",
+        "grades",
+        _compile(_related_patterns("grades", "student", "student_id")),
+        aget_student_grades,
+    ),
+    Intent(
+        "lesson_grades",
+        "grades",
+        _compile(_related_patterns("grades", "lesson", "lesson_id")),
+        aget_lesson_grades,
+    ),
+    Intent(
+        "list_homeworks",
+        "homeworks",
+        _compile(_list_patterns("homeworks")),
+        aget_all_homeworks,
+    ),
+    Intent(
+        "count_homeworks",
+        "homeworks",
+        _compile(_count_patterns("homeworks")),
+        aget_all_homeworks,
+        answer="count",
+    ),
+    Intent(
+        "homeworks_by_lesson",
+        "homeworks",
+        _compile(_related_patterns("homeworks", "lesson", "lesson_id")),
+        aget_homeworks_by_lesson,
+    ),
+)
+
+
+# Response templates: (English, Persian)
+_TEMPLATES = {
+    "count": ("There are {count} {plural}.", "{count} {singular} وجود دارد."),
+    "list": ("{title} ({count}):", "{title} ({count}):"),
+    "more": ("…and {count} more.", "…و {count} مورد دیگر."),
+    "empty": ("No {plural} found.", "موردی پیدا نشد."),
+    "id": ("id", "شناسه"),
+}
+# Resource nouns: (English plural, Persian singular, Persian plural)
+_RESOURCE_NOUNS = {
+    "courses": ("courses", "دوره", "دوره‌ها"),
+    "lessons": ("lessons", "درس", "درس‌ها"),
+    "students": ("students", "دانشجو", "دانشجویان"),
+    "homeworks": ("homeworks", "تکلیف", "تکالیف"),
+    "grades": ("grades", "نمره", "نمرات"),
+}
+_LABEL_FIELDS = ("full_name", "name", "title", "username")
+_GRADE_FIELDS = ("total_score", "score", "nomrehozoor")
+
+_PERSIAN_SCRIPT = re.compile(r"[\u0600-\u06FF]")
+
+
+def _language(message: str) -> int:
+    """Template index: 0 for English, 1 for Persian."""
+    return 1 if _PERSIAN_SCRIPT.search(message) else 0
+
+
+def _label(record: Any) -> str:
+    if not isinstance(record, dict):
+        return str(record)
+    if record.get("first_name") or record.get("last_name"):
+        return " ".join(
+            str(record[f]) for f in ("first_name", "last_name") if record.get(f)
+        )
+    for f in _LABEL_FIELDS:
+        if record.get(f):
+            return str(record[f])
+    return str(record.get("id", ""))
+
+
+def _render_row(record: Any, resource: str, lang: int) -> str:
+    if not isinstance(record, dict):
+        return f"- {record}"
+    id_word = _TEMPLATES["id"][lang]
+    if resource == "grades":
+        parts = [
+            _label(record[f]) for f in ("user", "lesson") if record.get(f) is not None
+        ]
+        scores = ", ".join(
+            f"{f}: {record[f]}" for f in _GRADE_FIELDS if record.get(f) is not None
+        )
+        return f"- {' / '.join(parts)} — {scores}"
+    return f"- {_label(record)} ({id_word} {record.get('id')})"
+
+
+def render(intent: Intent, response: AgentResponse, lang: int) -> str:
+    """Render a tool response with the intent's template."""
+    english, singular, persian = _RESOURCE_NOUNS[intent.resource]
+    nouns = {
+        "plural": english,
+        "singular": singular,
+        "title": persian if lang else english.capitalize(),
+    }
+    data = response.data
+    if intent.answer == "record":
+        if not isinstance(data, dict) or not data:
+            return _TEMPLATES["empty"][lang].format(**nouns)
+        return "\n".join(
+            f"- {k}: {_label(v)}" for k, v in data.items() if v not in (None, "")
+        )
+
+    rows = data if isinstance(data, list) else []
+    summary = (response.metadata or {}).get("summary") or {}
+    total = summary.get("total", len(rows))
+    if intent.answer == "count":
+        return _TEMPLATES["count"][lang].format(count=total, **nouns)
+    if not rows:
+        return _TEMPLATES["empty"][lang].format(**nouns)
+
+    lines = [_TEMPLATES["list"][lang].format(count=total, **nouns)]
+    lines += [_render_row(row, intent.resource, lang) for row in rows]
+    if total > len(rows):
+        lines.append(_TEMPLATES["more"][lang].format(count=total - len(rows)))
+    return "\n".join(lines)
+
+
+class IntentRouter:
+    """
+    Answers simple lookups ("list all courses", "نمرات دانشجو ۱۲") by calling
+    the tool directly and rendering a template, skipping the manager and
+    sub-agent model calls. Anything that is not an exact, unambiguous match
+    returns None and should go to the agent graph.
+    """
+
+    def __init__(self, intents: Tuple[Intent, ...] = INTENTS, enabled: bool = True):
+        self.intents = intents
+        self.enabled = enabled
+
+    def route(self, message: str) -> Optional[RouteMatch]:
+        """Return the single intent matching the whole message, if any."""
+        if not self.enabled or not message:
+            return None
+        text = normalize_text(message)
+        matches = []
+        for intent in self.intents:
+            for pattern in intent.patterns:
+                found = pattern.fullmatch(text)
+                if found:
+                    arguments = {k: v for k, v in found.groupdict().items() if v}
+                    matches.append(RouteMatch(intent, arguments))
+                    break
+        if len(matches) != 1:
+            if matches:
+                logger.debug(
+                    f"Ambiguous fast-path match: {[m.intent.name for m in matches]}"
+                )
+            return None
+        return matches[0]
+
+    async def answer(
+        self, message: str, match: Optional[RouteMatch] = None
+    ) -> Optional[str]:
+        """Answer ``message`` from a template, or None to fall through."""
+        match = match or self.route(message)
+        if match is None:
+            return None
+
+        started = time.perf_counter()
+        response = await match.intent.handler(**match.arguments)
+        if not isinstance(response, AgentResponse) or not response.success:
+            # Let the agents explain failures and suggest alternatives
+            logger.info(f"Fast path {match.intent.name} failed; using the agents")
+            return None
+
+        reply = render(match.intent, response, _language(message))
+        logger.info(
+            f"Answered {match.intent.name} on the fast path in "
+            f"{(time.perf_counter() - started) * 1000:.1f}ms"
+        )
+        return reply
+
+
+intent_router = IntentRouter(enabled=settings.ROUTER_ENABLED)
@@ -1,9 +1,10 @@
 from typing import List
 from src.lms_agents.base_agent import BaseAgent
 from src.tools.students.students_tools import (
-    get_all_students,
-    get_student_by_id,
-    get_student_by_name,
+    get_all_students_async,
+    get_student_by_id_async,
+    get_student_by_name_async,
+    get_students_by_ids_async,
 )
 
 
@@ -17,11 +18,15 @@ class StudentsAgent(BaseAgent):
     - Retrieve all available students
     - Filter students by name
     - Filter students by id
+    - Look up several students by id in one call
     
     Guidelines:
+    - When a question involves several students, pass all their ids to one batch
+      tool call instead of calling a single-id tool per student
     - Always validate input parameters before making API calls
     - Provide helpful error messages when operations fail
     - Include relevant metadata in your responses (course count, categories, etc.)
+    - Tools return a compact set of fields and at most a page of rows with a summary; pass `fields` to ask for other fields, or ["*"] for full records
     - Be conversational and helpful in your responses
     - If a request fails, suggest alternative approaches
     """
@@ -30,6 +35,7 @@ class StudentsAgent(BaseAgent):
     Comprehensive tool for student-related operations including:
     - Getting all students
     - Filtering students by id
+    - Looking up several students by id at once
     - Filtering students by email
     - Student information retrieval (name, id, email, job, phone number, etc.)
     Use this when users ask about students, student information, or student related queries.
@@ -37,7 +43,12 @@ class StudentsAgent(BaseAgent):
 
     def __init__(self):
         """Initialize the Students Agent with external tools."""
-        tools = [get_all_students, get_student_by_id, get_student_by_name]
+        tools = [
+            get_all_students_async,
+            get_student_by_id_async,
+            get_student_by_name_async,
+            get_students_by_ids_async,
+        ]
         super().__init__(
             name="Students Services Agent", instructions=self.INSTRUCTIONS, tools=tools
         )
@@ -53,4 +64,5 @@ class StudentsAgent(BaseAgent):
             "get_all_students",
             "get_student_by_id",
             "get_student_by_name",
+            "get_students_by_ids",
         ]
@@ -0,0 +1,221 @@
+"""Chat pipeline shared by the Gradio demo and the HTTP API."""
+
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, List, Optional
+import logging
+import threading
+
+from agents import RunConfig, Runner
+from openai.types.responses import ResponseTextDeltaEvent
+
+from src.config.settings import settings
+from src.lms_agents.manager.manager_agent import ManagerAgent
+from src.lms_agents.router.intent_router import IntentRouter, intent_router
+from src.service.session_memory import (
+    SessionStore,
+    current_session,
+    remember_arguments,
+    session_store,
+)
+from src.store.sync import SyncWorker, start_sync_worker
+from src.utils.answer_cache import AnswerCache, answer_cache
+from src.utils.instrumentation import setup_instrumentation
+from src.utils.rate_limit import request_owner
+
+logger = logging.getLogger(__name__)
+
+WORKFLOW_NAME = "User Assistant Session"
+
+
+@dataclass
+class ChatEvent:
+    """
+    One step of a streamed reply.
+
+    ``kind`` is "progress" (a tool call or agent switch started), "delta"
+    (answer text, cumulative since the last tool call) or "final" (the
+    complete answer).
+    """
+
+    kind: str
+    text: str
+
+
+def _tool_label(item) -> str:
+    name = getattr(item.raw_item, "name", None) or "tool"
+    return name.replace("_", " ")
+
+
+class ChatService:
+    """
+    Answers chat messages: the intent router first, then the manager agent.
+
+    One instance is shared by every front end in a process, so they use the
+    same agents, caches and connection pools. Messages that carry a session
+    id are answered with that conversation's memory. Questions that do not
+    depend on earlier turns are looked up in the semantic answer cache
+    before the agents run.
+    """
+
+    def __init__(
+        self,
+        manager_agent: Optional[ManagerAgent] = None,
+        router: Optional[IntentRouter] = None,
+        memory: Optional[SessionStore] = None,
+        answers: Optional[AnswerCache] = None,
+        max_turns: int = 50,
+    ):
+        self.manager_agent = manager_agent or ManagerAgent()
+        self.router = router or intent_router
+        self.memory = memory or (
+            session_store if settings.SESSION_MEMORY_ENABLED else None
+        )
+        self.answers = answers or answer_cache
+        self.max_turns = max_turns
+        self._sync_worker: Optional[SyncWorker] = None
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        """
+        Start the background sync worker if it is enabled (once per process).
+
+        Also registers the metrics and OpenTelemetry trace processors.
+        """
+        setup_instrumentation()
+        with self._lock:
+            if settings.SYNC_ENABLED and self._sync_worker is None:
+                self._sync_worker = start_sync_worker()
+
+    def stop(self) -> None:
+        with self._lock:
+            if self._sync_worker is not None:
+                self._sync_worker.stop()
+                self._sync_worker = None
+
+    def clear_session(self, session_id: str) -> None:
+        if self.memory is not None:
+            self.memory.clear(session_id)
+
+    async def stream(
+        self,
+        message: str,
+        request_id: Optional[str] = None,
+        session_id: Optional[str] = None,
+        history: Optional[List[Any]] = None,
+        user_id: Optional[str] = None,
+    ) -> AsyncIterator[ChatEvent]:
+        """
+        Yield the reply to ``message`` as it is produced, ending with "final".
+
+        ``history`` holds (user, assistant) pairs a client kept itself; it
+        only seeds a session this process does not know yet. Cached answers
+        are only shared between messages with the same ``user_id`` or,
+        without one, the same ``session_id``; others are not cached.
+        """
+        session = None
+        if self.memory is not None and session_id:
+            session = self.memory.get(session_id)
+            self.memory.seed(session, history)
+
+        # LMS requests are queued fairly across conversations
+        owner = session_id or user_id or request_id or ""
+
+        # Simple lookups are answered without any model call
+        match = self.router.route(message)
+        routed = None
+        if match:
+            owner_token = request_owner.set(owner)
+            try:
+                routed = await self.router.answer(message, match)
+            finally:
+                request_owner.reset(owner_token)
+        if routed is not None:
+            if session is not None:
+                remember_arguments(session, match.arguments)
+                self.memory.add_turn(session, message, routed)
+            yield ChatEvent("final", routed)
+            return
+
+        # Follow-ups may refer to earlier turns, so only opening questions
+        # share answers
+        if user_id:
+            scope = f"user:{user_id}"
+        elif session_id:
+            scope = f"session:{session_id}"
+        else:
+            scope = None
+        cacheable = scope is not None and (
+            session is None or not (session.turns or session.summary)
+        )
+        version = self.answers.version
+        cached = self.answers.get(message, scope) if cacheable else None
+        if cached is not None:
+            if session is not None:
+                self.memory.add_turn(session, message, cached)
+            yield ChatEvent("final", cached)
+            return
+
+        # Streamed runs outlive the caller's context, so the SDK opens and
+        # closes the session trace itself
+        run_config = RunConfig(
+            workflow_name=WORKFLOW_NAME,
+            trace_metadata={"request_id": request_id} if request_id else None,
+        )
+        # The run task copies this context, so its tool calls see the session
+        token = current_session.set(session)
+        owner_token = request_owner.set(owner)
+        try:
+            result = Runner.run_streamed(
+                self.manager_agent.agent,
+                self.memory.build_input(session, message) if session else message,
+                max_turns=self.max_turns,
+                run_config=run_config,
+            )
+        finally:
+            request_owner.reset(owner_token)
+            current_session.reset(token)
+        text = ""
+        try:
+            async for event in result.stream_events():
+                if event.type == "raw_response_event":
+                    if isinstance(event.data, ResponseTextDeltaEvent):
+                        text += event.data.delta
+                        yield ChatEvent("delta", text)
+                elif event.type == "run_item_stream_event":
+                    if event.name == "tool_called":
+                        # Text before a tool call is a preamble, not the answer
+                        text = ""
+                        yield ChatEvent("progress", f"🔧 {_tool_label(event.item)}…")
+                elif event.type == "agent_updated_stream_event":
+                    yield ChatEvent("progress", f"↪️ {event.new_agent.name}")
+        finally:
+            # Closing the stream early (timeout, client gone) stops the run
+            if not result.is_complete:
+                result.cancel()
+
+        final = result.final_output or text or ""
+        if cacheable and final:
+            self.answers.put(message, final, scope, version)
+        if session is not None and final:
+            self.memory.add_turn(session, message, final)
+        yield ChatEvent("final", final)
+
+    async def reply(
+        self,
+        message: str,
+        request_id: Optional[str] = None,
+        session_id: Optional[str] = None,
+        history: Optional[List[Any]] = None,
+        user_id: Optional[str] = None,
+    ) -> str:
+        """Return the complete reply to ``message``."""
+        final = ""
+        events = self.stream(message, request_id, session_id, history, user_id)
+        async for event in events:
+            if event.kind == "final":
+                final = event.text
+        return final
+
+
+# Process-wide service used by main.py and src/api/app.py
+chat_service = ChatService()
@@ -0,0 +1,290 @@
+"""Per-conversation memory: a token-budgeted window, a summary and known ids."""
+
+from collections import OrderedDict
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+import asyncio
+import json
+import logging
+import threading
+import time
+
+from agents import Agent, ModelSettings, Runner
+
+from src.config.settings import settings
+from src.store.entity_store import entity_store
+
+logger = logging.getLogger(__name__)
+
+# Tool arguments that name an entity, and the entity kind they name
+ENTITY_ARGUMENTS = {
+    "student_id": "student",
+    "student_ids": "student",
+    "lesson_id": "lesson",
+    "course_id": "course",
+    "homework_id": "homework",
+}
+
+# Entity kind -> API resource, used to label ids from the entity store
+ENTITY_RESOURCES = {
+    "student": "students",
+    "lesson": "lessons",
+    "course": "courses",
+    "homework": "homeworks",
+}
+
+# Tools that resolve a name to records; their results are remembered too
+NAME_LOOKUPS = {"get_student_by_name": "student"}
+
+SUMMARY_INSTRUCTIONS = """
+You maintain the running summary of a conversation between a user and an
+educational assistant for the Mahan LMS. Merge the previous summary and the
+new turns into one short summary (at most 150 words) in the language of the
+conversation. Keep what later questions may refer to: who and what was asked
+about, ids, numbers and conclusions. Leave out greetings and formatting.
+"""
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count; about four UTF-8 bytes per token for EN and FA text."""
+    return len(text.encode("utf-8")) // 4 + 4
+
+
+def _label(record: Any) -> Optional[str]:
+    if not isinstance(record, dict):
+        return None
+    name = " ".join(
+        str(record[f]) for f in ("first_name", "last_name") if record.get(f)
+    )
+    return name or record.get("full_name") or record.get("name") or record.get("title")
+
+
+@dataclass
+class Session:
+    """History of one conversation."""
+
+    id: str
+    # {"role": "user" | "assistant", "content": str}, oldest first
+    turns: List[Dict[str, str]] = field(default_factory=list)
+    summary: str = ""
+    # kind -> {id: label}, most recently used last
+    entities: Dict[str, Dict[str, Optional[str]]] = field(default_factory=dict)
+    updated_at: float = field(default_factory=time.time)
+    summarizing: bool = False
+
+    def remember(self, kind: str, entity_id: Any, label: Optional[str] = None) -> None:
+        """Remember a resolved entity id, keeping the newest per kind."""
+        entity_id = str(entity_id)
+        ids = self.entities.setdefault(kind, {})
+        label = label or ids.pop(entity_id, None)
+        resource = ENTITY_RESOURCES.get(kind)
+        if label is None and resource:
+            label = _label(entity_store.get(resource, entity_id))
+        ids.pop(entity_id, None)
+        ids[entity_id] = label
+        while len(ids) > settings.SESSION_MAX_ENTITIES:
+            del ids[next(iter(ids))]
+
+    def context(self) -> str:
+        """Render the summary and known entities for the model, or ""."""
+        parts = []
+        if self.summary:
+            parts.append(f"Summary of the earlier conversation:\n{self.summary}")
+        known = []
+        for kind, ids in self.entities.items():
+            for entity_id, label in reversed(ids.items()):
+                known.append(f"- {kind} {entity_id}" + (f" ({label})" if label else ""))
+        if known:
+            parts.append(
+                "Entities already resolved in this conversation, newest first. "
+                "Reuse these ids for follow-up questions instead of looking "
+                "them up again:\n" + "\n".join(known)
+            )
+        return "\n\n".join(parts)
+
+
+# Session of the run in progress; tool calls record resolved ids into it
+current_session: ContextVar[Optional[Session]] = ContextVar(
+    "current_session", default=None
+)
+
+
+def _arguments(arguments: Any) -> Dict[str, Any]:
+    if isinstance(arguments, str):
+        try:
+            arguments = json.loads(arguments or "{}")
+        except ValueError:
+            return {}
+    return arguments if isinstance(arguments, dict) else {}
+
+
+def remember_arguments(session: Session, arguments: Any) -> None:
+    """Remember the entity ids named by tool arguments."""
+    for name, value in _arguments(arguments).items():
+        kind = ENTITY_ARGUMENTS.get(name)
+        if kind is None or value in (None, ""):
+            continue
+        for entity_id in value if isinstance(value, list) else [value]:
+            session.remember(kind, entity_id)
+
+
+def record_tool_call(tool_name: str, arguments: Any, result: Any) -> None:
+    """Remember the entity ids a tool call used or resolved, if a session is active."""
+    session = current_session.get()
+    if session is None:
+        return
+
+    remember_arguments(session, arguments)
+
+    kind = NAME_LOOKUPS.get(tool_name)
+    data = getattr(result, "data", None)
+    if kind and getattr(result, "success", False) and isinstance(data, list):
+        # Only an unambiguous match identifies the entity the user meant
+        if len(data) == 1 and isinstance(data[0], dict) and "id" in data[0]:
+            session.remember(kind, data[0]["id"], _label(data[0]))
+
+
+class SessionStore:
+    """
+    Bounded in-process store of conversation sessions.
+
+    Sessions idle for ``ttl`` seconds are dropped, and the least recently
+    used ones once there are more than ``max_sessions``.
+    """
+
+    def __init__(
+        self,
+        token_budget: int = 2000,
+        summary_trigger: int = 1000,
+        max_sessions: int = 1000,
+        ttl: float = 3600,
+        summary_model: Optional[str] = None,
+    ):
+        self.token_budget = token_budget
+        self.summary_trigger = summary_trigger
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.summary_model = summary_model or settings.OPENAI_MODEL
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._tasks: set = set()
+        self._summarizer: Optional[Agent] = None
+
+    @classmethod
+    def from_settings(cls) -> "SessionStore":
+        return cls(
+            token_budget=settings.SESSION_TOKEN_BUDGET,
+            summary_trigger=settings.SESSION_SUMMARY_TRIGGER,
+            max_sessions=settings.SESSION_MAX_SESSIONS,
+            ttl=settings.SESSION_TTL,
+            summary_model=settings.SESSION_SUMMARY_MODEL,
+        )
+
+    def get(self, session_id: str) -> Session:
+        """Return the session, creating it if it is new or expired."""
+        now = time.time()
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+            if session is None or now - session.updated_at > self.ttl:
+                session = Session(id=session_id)
+            session.updated_at = now
+            self._sessions[session_id] = session
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+            return session
+
+    def clear(self, session_id: str) -> None:
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def seed(self, session: Session, history: List[Any]) -> None:
+        """Load (user, assistant) pairs kept by a client into an empty session."""
+        if session.turns or session.summary:
+            return
+        for pair in history or ():
+            if not isinstance(pair, (list, tuple)) or len(pair) != 2:
+                continue
+            for role, content in zip(("user", "assistant"), pair):
+                if isinstance(content, str) and content:
+                    session.turns.append({"role": role, "content": content})
+
+    def _window_start(self, session: Session) -> int:
+        """Index of the oldest turn that fits the token budget."""
+        budget = self.token_budget - estimate_tokens(session.context())
+        start = len(session.turns)
+        while start > 0:
+            budget -= estimate_tokens(session.turns[start - 1]["content"])
+            if budget < 0:
+                break
+            start -= 1
+        return start
+
+    def build_input(self, session: Session, message: str) -> List[Dict[str, str]]:
+        """Model input for ``message``: context, the recent window, the message."""
+        items = []
+        context = session.context()
+        if context:
+            items.append({"role": "system", "content": context})
+        items.extend(
+            dict(turn) for turn in session.turns[self._window_start(session) :]
+        )
+        items.append({"role": "user", "content": message})
+        return items
+
+    def add_turn(self, session: Session, message: str, reply: str) -> None:
+        """Append an exchange and summarize turns that left the window."""
+        session.turns.append({"role": "user", "content": message})
+        session.turns.append({"role": "assistant", "content": reply})
+        session.updated_at = time.time()
+
+        evicted = session.turns[: self._window_start(session)]
+        if session.summarizing or not evicted:
+            return
+        if sum(estimate_tokens(t["content"]) for t in evicted) < self.summary_trigger:
+            return
+
+        session.summarizing = True
+        task = asyncio.ensure_future(self._summarize(session, len(evicted)))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    @property
+    def summarizer(self) -> Agent:
+        if self._summarizer is None:
+            self._summarizer = Agent(
+                name="Conversation Summarizer",
+                instructions=SUMMARY_INSTRUCTIONS,
+                model=self.summary_model,
+                model_settings=ModelSettings(max_tokens=400),
+            )
+        return self._summarizer
+
+    async def _summarize(self, session: Session, count: int) -> None:
+        """Fold the oldest ``count`` turns into the session summary."""
+        turns = session.turns[:count]
+        transcript = "\n".join(f"{t['role']}: {t['content']}" for t in turns)
+        prompt = (
+            f"Previous summary:\n{session.summary or '(none)'}\n\n"
+            f"New turns:\n{transcript}"
+        )
+        try:
+            result = await Runner.run(self.summarizer, prompt, max_turns=1)
+            summary = (result.final_output or "").strip()
+        except Exception as e:
+            # The turns are outside the window anyway; dropping them keeps a
+            # failing summarizer from being retried on every message
+            logger.warning(f"Summarizing session {session.id} failed: {e}")
+            summary = ""
+        finally:
+            session.summarizing = False
+
+        # Turns appended meanwhile sit after the summarized ones
+        del session.turns[:count]
+        if summary:
+            session.summary = summary
+            logger.info(f"Summarized {count} turns of session {session.id}")
+
+
+# Process-wide session store used by the chat service
+session_store = SessionStore.from_settings()
@@ -0,0 +1,320 @@
+"""In-memory, indexed mirror of LMS entities."""
+
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+import logging
+import threading
+import time
+
+from src.config.settings import settings
+from src.utils.text import normalize_text, tokenize
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ResourceSchema:
+    """Which fields of a resource are indexed."""
+
+    foreign_keys: Tuple[str, ...] = ()
+    name_fields: Tuple[str, ...] = ()
+
+
+# Indexed fields per API resource
+SCHEMAS: Dict[str, ResourceSchema] = {
+    "students": ResourceSchema(
+        name_fields=("first_name", "last_name", "full_name", "name", "username"),
+    ),
+    "courses": ResourceSchema(
+        foreign_keys=("category",),
+        name_fields=("name", "title"),
+    ),
+    "lessons": ResourceSchema(
+        foreign_keys=("course", "teacher"),
+        name_fields=("name", "title"),
+    ),
+    "homeworks": ResourceSchema(
+        foreign_keys=("lesson",),
+        name_fields=("name", "title"),
+    ),
+    "grades": ResourceSchema(foreign_keys=("user", "lesson")),
+    "homework-responses": ResourceSchema(foreign_keys=("user", "homework")),
+}
+
+
+def _ref(value: Any) -> Optional[str]:
+    """Return a referenced id as a string, accepting nested ``{"id": ...}`` objects."""
+    if isinstance(value, dict):
+        value = value.get("id")
+    return None if value is None else str(value)
+
+
+@dataclass
+class EntityTable:
+    """Records of one resource with hash indexes on id, foreign keys and names."""
+
+    schema: ResourceSchema
+    records: Dict[str, dict] = field(default_factory=dict)
+    foreign_keys: Dict[str, Dict[str, Set[str]]] = field(
+        default_factory=lambda: defaultdict(lambda: defaultdict(set))
+    )
+    names: Dict[str, str] = field(default_factory=dict)
+    name_tokens: Dict[str, Set[str]] = field(default_factory=lambda: defaultdict(set))
+    loaded_at: Dict[str, float] = field(default_factory=dict)
+    # Time at which the whole resource, or a (field, value) slice of it, was
+    # last loaded in full
+    complete_at: Optional[float] = None
+    scopes: Dict[Tuple[str, str], float] = field(default_factory=dict)
+
+    def put(self, record: dict) -> None:
+        record_id = _ref(record.get("id"))
+        if record_id is None:
+            return
+        if record_id in self.records:
+            self.discard(record_id)
+
+        self.records[record_id] = record
+        self.loaded_at[record_id] = time.time()
+        for fk in self.schema.foreign_keys:
+            ref = _ref(record.get(fk))
+            if ref is not None:
+                self.foreign_keys[fk][ref].add(record_id)
+
+        name = normalize_text(
+            " ".join(str(record[f]) for f in self.schema.name_fields if record.get(f))
+        )
+        if name:
+            self.names[record_id] = name
+            for token in name.split():
+                self.name_tokens[token].add(record_id)
+
+    def discard(self, record_id: str) -> None:
+        record = self.records.pop(record_id, None)
+        if record is None:
+            return
+        self.loaded_at.pop(record_id, None)
+        for fk in self.schema.foreign_keys:
+            ref = _ref(record.get(fk))
+            if ref is not None:
+                self.foreign_keys[fk][ref].discard(record_id)
+        for token in self.names.pop(record_id, "").split():
+            self.name_tokens[token].discard(record_id)
+
+
+class EntityStore:
+    """
+    Thread-safe local mirror of LMS entities.
+
+    Tools write every record they fetch into the store and answer id,
+    foreign-key and name lookups from it when the relevant data was loaded
+    in full recently enough, so joins such as "grades of student X in
+    lesson Y" run in memory instead of as a chain of HTTP calls.
+    """
+
+    def __init__(
+        self,
+        max_age: Optional[Dict[str, float]] = None,
+        default_max_age: float = 60.0,
+        enabled: bool = True,
+    ):
+        self.enabled = enabled
+        self.max_age = dict(max_age or {})
+        self.default_max_age = default_max_age
+        self._tables: Dict[str, EntityTable] = {
+            resource: EntityTable(schema) for resource, schema in SCHEMAS.items()
+        }
+        self._lock = threading.RLock()
+
+    def _table(self, resource: str) -> EntityTable:
+        table = self._tables.get(resource)
+        if table is None:
+            raise KeyError(f"Unknown resource: {resource}")
+        return table
+
+    def _fresh(self, resource: str, loaded_at: Optional[float]) -> bool:
+        if not self.enabled:
+            return False
+        max_age = self.max_age.get(resource, self.default_max_age)
+        return loaded_at is not None and time.time() - loaded_at < max_age
+
+    # Writes
+
+    def upsert(self, resource: str, records: Iterable[dict]) -> None:
+        """Insert or replace records without changing completeness."""
+        if not self.enabled:
+            return
+        with self._lock:
+            table = self._table(resource)
+            for record in records:
+                if isinstance(record, dict):
+                    table.put(record)
+
+    def replace(
+        self,
+        resource: str,
+        records: Iterable[dict],
+        scope: Optional[Tuple[str, Any]] = None,
+    ) -> None:
+        """
+        Load a complete listing of a resource, or of one ``(field, value)`` slice.
+
+        Records of the resource (or slice) that are not in ``records`` are
+        removed, and the listing is marked complete as of now.
+        """
+        if not self.enabled:
+            return
+        records = [r for r in records if isinstance(r, dict)]
+        with self._lock:
+            table = self._table(resource)
+            if scope is None:
+                stale = set(table.records)
+            else:
+                fk, value = scope
+                stale = set(table.foreign_keys[fk].get(_ref(value), ()))
+            stale -= {_ref(r.get("id")) for r in records}
+            for record_id in stale:
+                table.discard(record_id)
+            for record in records:
+                table.put(record)
+
+            if scope is None:
+                table.complete_at = time.time()
+                table.scopes.clear()
+            else:
+                table.scopes[(scope[0], _ref(scope[1]))] = time.time()
+
+    def remove(self, resource: str, ids: Iterable[Any]) -> None:
+        with self._lock:
+            table = self._table(resource)
+            for record_id in ids:
+                table.discard(_ref(record_id))
+
+    def mark_complete(self, resource: str, at: Optional[float] = None) -> None:
+        """Record that the mirror of ``resource`` is complete as of ``at``."""
+        with self._lock:
+            self._table(resource).complete_at = time.time() if at is None else at
+
+    def clear(self, resource: Optional[str] = None) -> None:
+        with self._lock:
+            resources = [resource] if resource else list(self._tables)
+            for name in resources:
+                self._tables[name] = EntityTable(SCHEMAS[name])
+
+    # Reads. Each returns None when the store cannot answer authoritatively,
+    # so callers fall back to the API.
+
+    def is_complete(self, resource: str) -> bool:
+        with self._lock:
+            return self._fresh(resource, self._table(resource).complete_at)
+
+    def all(self, resource: str) -> Optional[List[dict]]:
+        """Return every record of a resource if the mirror is complete."""
+        with self._lock:
+            table = self._table(resource)
+            if not self._fresh(resource, table.complete_at):
+                return None
+            return list(table.records.values())
+
+    def get(self, resource: str, record_id: Any) -> Optional[dict]:
+        """Return one record by id if it was loaded recently enough."""
+        with self._lock:
+            table = self._table(resource)
+            record_id = _ref(record_id)
+            # Records of a mirror kept complete (e.g. by the sync worker) stay fresh
+            if self._fresh(resource, table.complete_at):
+                return table.records.get(record_id)
+            if not self._fresh(resource, table.loaded_at.get(record_id)):
+                return None
+            return table.records.get(record_id)
+
+    def filter(self, resource: str, **criteria: Any) -> Optional[List[dict]]:
+        """
+        Return records matching every ``foreign_key=value`` criterion.
+
+        Answers when the whole resource, or the slice for one of the
+        criteria, was loaded in full recently enough.
+        """
+        with self._lock:
+            table = self._table(resource)
+            refs = {fk: _ref(value) for fk, value in criteria.items()}
+            covered = self._fresh(resource, table.complete_at) or any(
+                self._fresh(resource, table.scopes.get((fk, ref)))
+                for fk, ref in refs.items()
+            )
+            if not covered:
+                return None
+
+            ids: Optional[Set[str]] = None
+            for fk, ref in refs.items():
+                matches = table.foreign_keys[fk].get(ref, set())
+                ids = set(matches) if ids is None else ids & matches
+            if ids is None:
+                return list(table.records.values())
+            # Keep the API's ordering
+            return [r for i, r in table.records.items() if i in ids]
+
+    def search(self, resource: str, name: str) -> Optional[List[dict]]:
+        """
+        Return records whose normalized name contains every token of ``name``.
+
+        Tokens match whole words first and fall back to prefixes, so
+        "ali rez" finds "Ali Rezaei" and Persian spelling variants match.
+        """
+        tokens = tokenize(name)
+        with self._lock:
+            table = self._table(resource)
+            if not self._fresh(resource, table.complete_at):
+                return None
+            if not tokens:
+                return []
+
+            ids: Optional[Set[str]] = None
+            for token in tokens:
+                matches = table.name_tokens.get(token)
+                if not matches:
+                    matches = {
+                        record_id
+                        for indexed, record_ids in table.name_tokens.items()
+                        if indexed.startswith(token)
+                        for record_id in record_ids
+                    }
+                ids = set(matches) if ids is None else ids & matches
+                if not ids:
+                    return []
+            return [r for i, r in table.records.items() if i in ids]
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {
+                resource: {
+                    "records": len(table.records),
+                    "complete": self._fresh(resource, table.complete_at),
+                    "scopes": len(table.scopes),
+                }
+                for resource, table in self._tables.items()
+            }
+
+
+def _max_ages() -> Dict[str, float]:
+    """
+    Per-resource max ages from the settings.
+
+    Resources kept up to date by the background sync stay fresh for two
+    sync intervals, so reads are served from the mirror between passes
+    instead of falling through to the API once the cache TTL runs out.
+    """
+    max_age = dict(settings.ENTITY_STORE_MAX_AGE)
+    if settings.SYNC_ENABLED:
+        for resource in settings.SYNC_RESOURCES:
+            current = max_age.get(resource, settings.CACHE_DEFAULT_TTL)
+            max_age[resource] = max(current, 2 * settings.SYNC_INTERVAL)
+    return max_age
+
+
+# Process-wide mirror shared by all LMS tools
+entity_store = EntityStore(
+    max_age=_max_ages(),
+    default_max_age=settings.CACHE_DEFAULT_TTL,
+    enabled=settings.ENTITY_STORE_ENABLED,
+)
@@ -0,0 +1,346 @@
+"""Incremental background sync of the entity mirror."""
+
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Iterable, List, Optional
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+from src.config.settings import settings
+from src.tools.auth import auth_tools
+from src.store.entity_store import EntityStore, _ref, entity_store
+from src.utils.cache import response_cache
+from src.utils.answer_cache import answer_cache
+from src.utils.lms_client import LMSClient, lms_client
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SyncState:
+    """Sync cursor of one resource, checkpointed to disk."""
+
+    resource: str
+    # "delta" once the API is known to honor modified-since filters, "diff"
+    # when it does not, None until probed
+    strategy: Optional[str] = None
+    # Highest modified timestamp seen, as sent by the API
+    cursor: Optional[str] = None
+    synced_at: Optional[float] = None
+    full_synced_at: Optional[float] = None
+
+
+@dataclass
+class SyncResult:
+    """Outcome of one sync pass over a resource."""
+
+    resource: str
+    mode: str
+    fetched: int = 0
+    changed: int = 0
+    removed: int = 0
+    duration: float = 0.0
+
+
+class SyncCheckpoints:
+    """
+    Two JSON files per resource: its mirrored records and its cursor.
+
+    The records are only rewritten when they changed; every pass rewrites
+    the small cursor file. Files are written to a temporary name and
+    renamed into place, so a crash mid-write leaves the previous checkpoint
+    intact. The records include personal data (names, national codes,
+    grades), so the directory is created with mode 0700 and the files with
+    0600.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def _path(self, resource: str) -> str:
+        return os.path.join(self.directory, f"{resource}.json")
+
+    def _state_path(self, resource: str) -> str:
+        return os.path.join(self.directory, f"{resource}.state.json")
+
+    def has_records(self, resource: str) -> bool:
+        return os.path.exists(self._path(resource))
+
+    def load(self, resource: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._path(resource), encoding="utf-8") as f:
+                checkpoint = json.load(f)
+            state = checkpoint["state"]
+            # The cursor file is newer unless a crash came between the writes
+            try:
+                with open(self._state_path(resource), encoding="utf-8") as f:
+                    newer = json.load(f)
+                if (newer.get("synced_at") or 0) >= (state.get("synced_at") or 0):
+                    state = newer
+            except FileNotFoundError:
+                pass
+            return {
+                "state": SyncState(**state),
+                "records": checkpoint["records"],
+            }
+        except FileNotFoundError:
+            return None
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            logger.warning(f"Ignoring unreadable sync checkpoint for {resource}: {e}")
+            return None
+
+    def _write(self, path: str, payload: Any) -> None:
+        os.makedirs(self.directory, mode=0o700, exist_ok=True)
+        os.chmod(self.directory, 0o700)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            os.fchmod(fd, 0o600)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(payload, f, ensure_ascii=False, default=str)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def save(self, state: SyncState, records: Optional[Iterable[dict]] = None) -> None:
+        """Checkpoint the cursor, and the records too when they are given."""
+        if records is not None:
+            self._write(
+                self._path(state.resource),
+                {"state": asdict(state), "records": list(records)},
+            )
+        self._write(self._state_path(state.resource), asdict(state))
+
+
+class SyncEngine:
+    """
+    Keeps the entity mirror in step with the LMS API.
+
+    A pass over a resource asks only for records modified since its cursor
+    (``?modified__gte=<cursor>&ordering=modified`` by default). If the API
+    turns out to ignore the filter, the resource falls back to a paged diff:
+    every page is fetched and compared with the mirror so that only changed
+    and deleted records are applied. Deltas cannot see deletions, so a full
+    diff also runs every ``full_interval`` seconds.
+
+    Cursors are compared as strings, which orders ISO 8601 timestamps
+    correctly as long as the API formats them consistently.
+    """
+
+    def __init__(
+        self,
+        store: EntityStore,
+        client: LMSClient,
+        checkpoints: SyncCheckpoints,
+        resources: List[str],
+        full_interval: float,
+        modified_field: str = "modified",
+        modified_param: str = "modified__gte",
+        ordering_param: str = "ordering",
+    ):
+        self.store = store
+        self.client = client
+        self.checkpoints = checkpoints
+        self.resources = resources
+        self.full_interval = full_interval
+        self.modified_field = modified_field
+        self.modified_param = modified_param
+        self.ordering_param = ordering_param
+        self._states: Dict[str, SyncState] = {r: SyncState(r) for r in resources}
+        self._records: Dict[str, Dict[str, dict]] = {r: {} for r in resources}
+        self._lock = threading.Lock()
+
+    def restore(self) -> None:
+        """Load checkpointed records and cursors into the mirror."""
+        for resource in self.resources:
+            checkpoint = self.checkpoints.load(resource)
+            if checkpoint is None:
+                continue
+            state, records = checkpoint["state"], checkpoint["records"]
+            self._states[resource] = state
+            self._records[resource] = {_ref(r.get("id")): r for r in records}
+            self.store.replace(resource, records)
+            # Only as fresh as the last successful sync
+            self.store.mark_complete(resource, at=state.synced_at or 0.0)
+            logger.info(
+                f"Restored {len(records)} {resource} from checkpoint "
+                f"(cursor {state.cursor})"
+            )
+
+    def sync(self, resource: str, full: bool = False) -> SyncResult:
+        """Bring one resource up to date and checkpoint it."""
+        token_response = auth_tools.authenticate_user()
+        if not token_response.success:
+            raise RuntimeError(f"Authentication failed: {token_response.error}")
+        headers = {"Authorization": f"Bearer {token_response.data['access']}"}
+
+        # Sync must see the API, not responses cached by the tools
+        cache_token = response_cache.enabled.set(False)
+        try:
+            with self._lock:
+                return self._sync(resource, headers, full)
+        finally:
+            response_cache.enabled.reset(cache_token)
+
+    def sync_all(self, full: bool = False) -> List[SyncResult]:
+        results = []
+        for resource in self.resources:
+            try:
+                results.append(self.sync(resource, full=full))
+            except Exception as e:
+                logger.error(f"Sync of {resource} failed: {e}")
+        return results
+
+    def _sync(self, resource: str, headers: Dict[str, str], full: bool) -> SyncResult:
+        started = time.time()
+        state = self._states[resource]
+        full = (
+            full
+            or state.cursor is None
+            or state.strategy == "diff"
+            or state.full_synced_at is None
+            or started - state.full_synced_at >= self.full_interval
+        )
+
+        if full:
+            records = self._fetch(resource, headers)
+            result = self._apply_full(resource, records)
+        else:
+            records = self._fetch(
+                resource,
+                headers,
+                {
+                    self.modified_param: state.cursor,
+                    self.ordering_param: self.modified_field,
+                },
+            )
+            if self._honors_filter(records, state.cursor):
+                state.strategy = "delta"
+                result = self._apply_delta(resource, records)
+            else:
+                # The API returned everything, which is as good as a full pass
+                logger.info(f"{resource} ignores modified-since; using paged diff")
+                state.strategy = "diff"
+                result = self._apply_full(resource, records)
+
+        state.synced_at = started
+        if result.mode == "full":
+            state.full_synced_at = started
+        state.cursor = self._max_modified(self._records[resource].values())
+        if state.cursor is None:
+            state.strategy = "diff"
+
+        self.store.mark_complete(resource, at=started)
+        changed = bool(result.changed or result.removed)
+        if changed:
+            response_cache.invalidate(resource)
+            answer_cache.invalidate()
+        # An unchanged pass only moves the cursor and timestamps
+        if changed or not self.checkpoints.has_records(resource):
+            self.checkpoints.save(state, self._records[resource].values())
+        else:
+            self.checkpoints.save(state)
+
+        result.duration = time.time() - started
+        logger.info(
+            f"Synced {resource} ({result.mode}): {result.fetched} fetched, "
+            f"{result.changed} changed, {result.removed} removed "
+            f"in {result.duration:.2f}s"
+        )
+        return result
+
+    def _fetch(
+        self,
+        resource: str,
+        headers: Dict[str, str],
+        params: Optional[Dict[str, Any]] = None,
+    ) -> List[dict]:
+        return [
+            record
+            for record in self.client.iter_results(
+                f"{resource}/", params=params, headers=headers
+            )
+            if isinstance(record, dict) and record.get("id") is not None
+        ]
+
+    def _honors_filter(self, records: List[dict], cursor: str) -> bool:
+        for record in records:
+            modified = record.get(self.modified_field)
+            if modified is None or str(modified) < cursor:
+                return False
+        return True
+
+    def _max_modified(self, records: Iterable[dict]) -> Optional[str]:
+        cursor = None
+        for record in records:
+            modified = record.get(self.modified_field)
+            if modified is None:
+                return None
+            if cursor is None or str(modified) > cursor:
+                cursor = str(modified)
+        return cursor
+
+    def _apply_delta(self, resource: str, records: List[dict]) -> SyncResult:
+        mirrored = self._records[resource]
+        # The filter is inclusive, so records at the cursor come back unchanged
+        changed = [r for r in records if mirrored.get(_ref(r["id"])) != r]
+        for record in changed:
+            mirrored[_ref(record["id"])] = record
+        self.store.upsert(resource, changed)
+        return SyncResult(resource, "delta", fetched=len(records), changed=len(changed))
+
+    def _apply_full(self, resource: str, records: List[dict]) -> SyncResult:
+        mirrored = self._records[resource]
+        latest = {_ref(r["id"]): r for r in records}
+        changed = sum(1 for i, r in latest.items() if mirrored.get(i) != r)
+        removed = len(mirrored.keys() - latest.keys())
+        self._records[resource] = latest
+        self.store.replace(resource, records)
+        return SyncResult(
+            resource, "full", fetched=len(records), changed=changed, removed=removed
+        )
+
+
+class SyncWorker(threading.Thread):
+    """Daemon thread running ``SyncEngine.sync_all`` every ``interval`` seconds."""
+
+    def __init__(self, engine: SyncEngine, interval: float):
+        super().__init__(name="lms-sync", daemon=True)
+        self.engine = engine
+        self.interval = interval
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        try:
+            self.engine.restore()
+        except Exception as e:
+            logger.error(f"Restoring sync checkpoints failed: {e}")
+        while not self._stop_event.is_set():
+            self.engine.sync_all()
+            self._stop_event.wait(self.interval)
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop_event.set()
+        self.join(timeout)
+
+
+sync_engine = SyncEngine(
+    store=entity_store,
+    client=lms_client,
+    checkpoints=SyncCheckpoints(settings.SYNC_STATE_DIR),
+    resources=[r.strip() for r in settings.SYNC_RESOURCES if r.strip()],
+    full_interval=settings.SYNC_FULL_INTERVAL,
+    modified_field=settings.SYNC_MODIFIED_FIELD,
+    modified_param=settings.SYNC_MODIFIED_PARAM,
+    ordering_param=settings.SYNC_ORDERING_PARAM,
+)
+
+
+def start_sync_worker() -> SyncWorker:
+    """Start the background sync worker for the process-wide mirror."""
+    worker = SyncWorker(sync_engine, interval=settings.SYNC_INTERVAL)
+    worker.start()
+    return worker
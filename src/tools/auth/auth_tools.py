@@ -1,33 +1,438 @@
 from agents import function_tool
 from src.utils.utils import retry_on_failure
+from src.utils.lms_client import async_lms_client, lms_client
+import asyncio
+import httpx
 import requests
 from src.config.settings import settings
+from src.utils.cache import cache_backend
+from src.utils.cache_backends import MISS, CacheBackend
+from src.utils.instrumentation import timed_span
 from src.lms_agents.base_agent import AgentResponse
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+import base64
+import hashlib
+import json
 import logging
+import threading
 import time
 
 logger = logging.getLogger(__name__)
 
 
-@retry_on_failure(max_retries=3)
-def authenticate_user(username: str = None, password: str = None) -> AgentResponse:
+@dataclass
+class CachedToken:
+    """An access token together with its lifetime bookkeeping."""
+
+    access: str
+    expires_in: float
+    fetched_at: float
+    last_used: float
+
+    @property
+    def expires_at(self) -> float:
+        return self.fetched_at + self.expires_in
+
+
+class TokenCache:
     """
-    Authenticate a user and retrieve an access token.
+    Thread-safe cache of access tokens keyed by credential pair.
 
-    If username/password not provided, uses default system credentials.
+    Tokens are refreshed in the background ``refresh_margin`` seconds before
+    they expire, and concurrent refreshes for the same credentials are
+    coalesced into a single upstream request. When a shared ``backend`` is
+    given, tokens are published to it and worker processes coalesce their
+    refreshes through a lock entry, so a node holds one token per credential
+    pair.
     """
 
+    RESOURCE = "tokens"
+
+    def __init__(
+        self,
+        refresh_margin: float = 60.0,
+        backend: Optional[CacheBackend] = None,
+        lock_timeout: float = 10.0,
+    ):
+        self.refresh_margin = refresh_margin
+        self.backend = backend
+        self.lock_timeout = lock_timeout
+        self._lock = threading.Lock()
+        self._tokens: Dict[str, CachedToken] = {}
+        self._inflight: Dict[str, Future] = {}
+        self._timers: Dict[str, threading.Timer] = {}
+        # Access token -> (credential key, expiry) of every unexpired token
+        # issued, so a token the API rejects can be traced to its credentials
+        self._issued: Dict[str, Tuple[str, float]] = {}
+
+    @staticmethod
+    def _key(username: str, password: str) -> str:
+        # Never keep raw passwords around as dictionary keys.
+        return hashlib.sha256(f"{username}\0{password}".encode()).hexdigest()
+
+    def get_token(self, username: str, password: str) -> AgentResponse:
+        """Return a valid token for the credentials, fetching one if needed."""
+        key = self._key(username, password)
+        return self._lookup(key, username, password) or self._refresh(
+            key, username, password
+        )
+
+    async def aget_token(self, username: str, password: str) -> AgentResponse:
+        """Async variant of ``get_token`` that fetches with the async client."""
+        key = self._key(username, password)
+        cached = await self._alookup(key, username, password)
+        if cached:
+            return cached
+
+        future, owner = self._claim(key)
+        if not owner:
+            return await asyncio.wrap_future(future)
+
+        try:
+            response = await self._afetch(key, username, password)
+        except BaseException as e:
+            self._fail(key, future, e)
+            raise
+        self._complete(key, username, password, future, response)
+        return response
+
+    def _local_lookup(self, key: str) -> Optional[AgentResponse]:
+        """Return the token held by this process if it is not yet due for a refresh."""
+        now = time.time()
+        with self._lock:
+            cached = self._tokens.get(key)
+            if cached and now < cached.expires_at - self.refresh_margin:
+                cached.last_used = now
+                return self._to_response(cached, cached=True)
+        return None
+
+    def _lookup(
+        self, key: str, username: str, password: str
+    ) -> Optional[AgentResponse]:
+        """Return the cached token if it is not yet due for a refresh."""
+        local = self._local_lookup(key)
+        if local:
+            return local
+
+        shared = self._shared_lookup(key)
+        if shared:
+            self._store(key, username, password, shared)
+        return shared
+
+    async def _alookup(
+        self, key: str, username: str, password: str
+    ) -> Optional[AgentResponse]:
+        """Async variant of ``_lookup``; backend reads run in a worker thread."""
+        local = self._local_lookup(key)
+        if local or self.backend is None:
+            return local
+
+        shared = await asyncio.to_thread(self._shared_lookup, key)
+        if shared:
+            self._store(key, username, password, shared)
+        return shared
+
+    def _shared_lookup(self, key: str) -> Optional[AgentResponse]:
+        """Return a token another worker published, if it is still fresh."""
+        if self.backend is None:
+            return None
+        try:
+            entry = self.backend.get(key, self.RESOURCE)
+        except Exception as e:
+            logger.warning(f"Token backend read failed: {e}")
+            return None
+        if entry is MISS:
+            return None
+
+        remaining = entry["expires_at"] - time.time()
+        if remaining <= self.refresh_margin:
+            return None
+        return AgentResponse(
+            success=True,
+            data={"access": entry["access"], "expires_in": remaining},
+            metadata={"timestamp": time.time(), "cached": True},
+        )
+
+    def _publish(self, key: str, response: AgentResponse) -> None:
+        """Share a freshly fetched token with the other workers."""
+        expires_in = float(response.data["expires_in"])
+        entry = {
+            "access": response.data["access"],
+            "expires_at": time.time() + expires_in,
+        }
+        try:
+            self.backend.set(
+                key,
+                entry,
+                ttl=expires_in,
+                resource=self.RESOURCE,
+            )
+        except Exception as e:
+            logger.warning(f"Token backend write failed: {e}")
+
+    def _try_lock(self, key: str) -> bool:
+        """Take the cross-process refresh lock for ``key``."""
+        try:
+            return self.backend.add(
+                f"{key}:lock", True, ttl=self.lock_timeout, resource=self.RESOURCE
+            )
+        except Exception as e:
+            logger.warning(f"Token backend lock failed: {e}")
+            return True
+
+    def _unlock(self, key: str) -> None:
+        try:
+            self.backend.delete(f"{key}:lock", self.RESOURCE)
+        except Exception as e:
+            logger.warning(f"Token backend unlock failed: {e}")
+
+    def _fetch(self, key: str, username: str, password: str) -> AgentResponse:
+        """Request a token, letting only one worker hit the LMS at a time."""
+        if self.backend is None:
+            return _request_token(username, password)
+
+        if self._try_lock(key):
+            try:
+                response = _request_token(username, password)
+                if response.success:
+                    self._publish(key, response)
+                return response
+            finally:
+                self._unlock(key)
+
+        # Another worker is refreshing: wait for it to publish the token.
+        deadline = time.time() + self.lock_timeout
+        while time.time() < deadline:
+            time.sleep(0.05)
+            shared = self._shared_lookup(key)
+            if shared:
+                return shared
+        return _request_token(username, password)
+
+    async def _afetch(self, key: str, username: str, password: str) -> AgentResponse:
+        """
+        Async variant of ``_fetch``.
+
+        The SQLite and Redis backends block, so their calls run in worker
+        threads instead of on the event loop.
+        """
+        if self.backend is None:
+            return await _arequest_token(username, password)
+
+        if await asyncio.to_thread(self._try_lock, key):
+            try:
+                response = await _arequest_token(username, password)
+                if response.success:
+                    await asyncio.to_thread(self._publish, key, response)
+                return response
+            finally:
+                await asyncio.to_thread(self._unlock, key)
+
+        deadline = time.time() + self.lock_timeout
+        while time.time() < deadline:
+            await asyncio.sleep(0.05)
+            shared = await asyncio.to_thread(self._shared_lookup, key)
+            if shared:
+                return shared
+        return await _arequest_token(username, password)
+
+    def invalidate(self, username: str = None, password: str = None) -> None:
+        """Drop the cached token, e.g. after the API rejected it with a 401."""
+        key = self._key(username or settings.USERNAME, password or settings.PASSWORD)
+        with self._lock:
+            self._tokens.pop(key, None)
+            timer = self._timers.pop(key, None)
+        if timer:
+            timer.cancel()
+        if self.backend is not None:
+            try:
+                self.backend.delete(key, self.RESOURCE)
+            except Exception as e:
+                logger.warning(f"Token backend delete failed: {e}")
+
+    def _rejected(self, key: str, access: str) -> Optional[bool]:
+        """
+        Look up a token the API rejected: None if it was not issued for
+        ``key``, else whether it is still the cached token.
+        """
+        with self._lock:
+            issued = self._issued.get(access)
+            if issued is None or issued[0] != key:
+                return None
+            cached = self._tokens.get(key)
+            return cached is not None and cached.access == access
+
+    def replace_rejected(
+        self, username: str, password: str, access: str
+    ) -> Optional[AgentResponse]:
+        """
+        Return a fresh token after the API rejected ``access`` with a 401.
+
+        Returns None if ``access`` was not issued for these credentials. The
+        token is only dropped while it is still the cached one, so requests
+        rejected together share a single refresh.
+        """
+        stale = self._rejected(self._key(username, password), access)
+        if stale is None:
+            return None
+        if stale:
+            self.invalidate(username, password)
+        return self.get_token(username, password)
+
+    async def areplace_rejected(
+        self, username: str, password: str, access: str
+    ) -> Optional[AgentResponse]:
+        """Async variant of ``replace_rejected``."""
+        stale = self._rejected(self._key(username, password), access)
+        if stale is None:
+            return None
+        if stale:
+            await asyncio.to_thread(self.invalidate, username, password)
+        return await self.aget_token(username, password)
+
+    def clear(self) -> None:
+        """Drop every cached token and cancel pending background refreshes."""
+        with self._lock:
+            self._tokens.clear()
+            timers = list(self._timers.values())
+            self._timers.clear()
+        for timer in timers:
+            timer.cancel()
+
+    def _refresh(self, key: str, username: str, password: str) -> AgentResponse:
+        """Fetch a new token, sharing one request between concurrent callers."""
+        future, owner = self._claim(key)
+        if not owner:
+            return future.result()
+
+        try:
+            response = self._fetch(key, username, password)
+        except BaseException as e:
+            self._fail(key, future, e)
+            raise
+        self._complete(key, username, password, future, response)
+        return response
+
+    def _claim(self, key: str) -> Tuple[Future, bool]:
+        """Return the in-flight refresh for ``key`` and whether the caller owns it."""
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                return future, False
+            future = Future()
+            self._inflight[key] = future
+            return future, True
+
+    def _complete(
+        self,
+        key: str,
+        username: str,
+        password: str,
+        future: Future,
+        response: AgentResponse,
+    ) -> None:
+        if response.success:
+            self._store(key, username, password, response)
+        with self._lock:
+            self._inflight.pop(key, None)
+        future.set_result(response)
+
+    def _fail(self, key: str, future: Future, error: BaseException) -> None:
+        with self._lock:
+            self._inflight.pop(key, None)
+        future.set_exception(error)
+
+    def _store(
+        self, key: str, username: str, password: str, response: AgentResponse
+    ) -> None:
+        now = time.time()
+        token = CachedToken(
+            access=response.data["access"],
+            expires_in=float(response.data["expires_in"]),
+            fetched_at=now,
+            last_used=now,
+        )
+
+        with self._lock:
+            self._tokens[key] = token
+            self._issued = {
+                access: issued
+                for access, issued in self._issued.items()
+                if issued[1] > now
+            }
+            self._issued[token.access] = (key, token.expires_at)
+            previous = self._timers.pop(key, None)
+            delay = token.expires_in - self.refresh_margin
+            if delay > 0:
+                timer = threading.Timer(
+                    delay, self._background_refresh, args=(key, username, password)
+                )
+                timer.daemon = True
+                self._timers[key] = timer
+                timer.start()
+
+        if previous:
+            previous.cancel()
+
+    def _background_refresh(self, key: str, username: str, password: str) -> None:
+        """Refresh a token ahead of expiry if it was used since it was issued."""
+        with self._lock:
+            cached = self._tokens.get(key)
+            self._timers.pop(key, None)
+            if not cached or cached.last_used <= cached.fetched_at:
+                # Idle credentials are not kept warm forever.
+                return
+
+        try:
+            response = self._refresh(key, username, password)
+            if not response.success:
+                logger.warning(f"Background token refresh failed: {response.error}")
+        except Exception as e:
+            logger.warning(f"Background token refresh failed: {e}")
+
+    @staticmethod
+    def _to_response(token: CachedToken, cached: bool) -> AgentResponse:
+        return AgentResponse(
+            success=True,
+            data={
+                "access": token.access,
+                "expires_in": max(0, int(token.expires_at - time.time())),
+            },
+            metadata={"timestamp": time.time(), "cached": cached},
+        )
+
+
+def _token_lifetime(data: dict, token: str) -> float:
+    """Read the token lifetime from ``expires_in``, falling back to the JWT ``exp``."""
+    if data.get("expires_in"):
+        return float(data["expires_in"])
+
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        exp = json.loads(base64.urlsafe_b64decode(payload)).get("exp")
+        if exp:
+            return max(0.0, float(exp) - time.time())
+    except (IndexError, ValueError):
+        pass
+
+    return 3600.0
+
+
+@retry_on_failure(max_retries=3)
+def _request_token(username: str, password: str) -> AgentResponse:
+    """Request a fresh access token from the LMS, bypassing the cache."""
+
     payload = {
-        "national_code": username or settings.USERNAME,
-        "password": password or settings.PASSWORD,
+        "national_code": username,
+        "password": password,
     }
 
     try:
-        response = requests.post(
-            f"{settings.API_ENDPOINTS['base_url']}/external-services/api/v1/token/",
-            json=payload,
-            timeout=10,
-        )
+        # Issuing a token has no side effects, so failed attempts are retried
+        response = lms_client.post("token/", json=payload, idempotent=True)
         response.raise_for_status()
         data = response.json()
 
@@ -43,10 +448,118 @@ def authenticate_user(username: str = None, password: str = None) -> AgentRespon
 
         return AgentResponse(
             success=True,
-            data={"access": token, "expires_in": data.get("expires_in", 3600)},
-            metadata={"timestamp": time.time()},
+            data={"access": token, "expires_in": _token_lifetime(data, token)},
+            metadata={"timestamp": time.time(), "cached": False},
         )
 
     except requests.RequestException as e:
         logger.error(f"Authentication failed: {e}")
         return AgentResponse(success=False, error=f"Authentication failed: {str(e)}")
+
+
+@retry_on_failure(max_retries=3)
+async def _arequest_token(username: str, password: str) -> AgentResponse:
+    """Async variant of ``_request_token`` using the async LMS client."""
+
+    payload = {
+        "national_code": username,
+        "password": password,
+    }
+
+    try:
+        response = await async_lms_client.post("token/", json=payload, idempotent=True)
+        response.raise_for_status()
+        data = response.json()
+        token = data.get("access")
+
+        if not token:
+            return AgentResponse(
+                success=False, error="Authentication succeeded but token missing"
+            )
+
+        logger.info("Authentication succeeded")
+
+        return AgentResponse(
+            success=True,
+            data={"access": token, "expires_in": _token_lifetime(data, token)},
+            metadata={"timestamp": time.time(), "cached": False},
+        )
+
+    except httpx.HTTPError as e:
+        logger.error(f"Authentication failed: {e}")
+        return AgentResponse(success=False, error=f"Authentication failed: {str(e)}")
+
+
+# Shared by every tool so a token is fetched once per credential pair and
+# reused until shortly before it expires.
+token_cache = TokenCache(
+    refresh_margin=settings.TOKEN_REFRESH_MARGIN, backend=cache_backend
+)
+
+
+def _reauthenticate(authorization: str) -> Optional[str]:
+    """Replace a system token the LMS rejected with a 401 (one retry per request)."""
+    logger.warning("LMS rejected the access token; re-authenticating")
+    response = token_cache.replace_rejected(
+        settings.USERNAME, settings.PASSWORD, authorization.removeprefix("Bearer ")
+    )
+    if response is None or not response.success:
+        return None
+    return f"Bearer {response.data['access']}"
+
+
+async def _areauthenticate(authorization: str) -> Optional[str]:
+    """Async variant of ``_reauthenticate``."""
+    logger.warning("LMS rejected the access token; re-authenticating")
+    response = await token_cache.areplace_rejected(
+        settings.USERNAME, settings.PASSWORD, authorization.removeprefix("Bearer ")
+    )
+    if response is None or not response.success:
+        return None
+    return f"Bearer {response.data['access']}"
+
+
+# A revoked token is replaced on its first 401 instead of failing every call
+# until it expires
+lms_client.reauthenticate = _reauthenticate
+async_lms_client.reauthenticate = _areauthenticate
+
+
+def authenticate_user(username: str = None, password: str = None) -> AgentResponse:
+    """
+    Authenticate a user and retrieve an access token.
+
+    If username/password not provided, uses default system credentials.
+    Tokens are served from the shared token cache when still valid.
+    """
+    with timed_span("auth", "token") as span:
+        response = token_cache.get_token(
+            username or settings.USERNAME, password or settings.PASSWORD
+        )
+        span["success"] = response.success
+        span["cached"] = bool((response.metadata or {}).get("cached"))
+    return response
+
+
+async def authenticate_user_async(
+    username: Optional[str] = None, password: Optional[str] = None
+) -> AgentResponse:
+    """
+    Authenticate a user and retrieve an access token.
+
+    If username/password not provided, uses default system credentials.
+    Tokens are served from the shared token cache when still valid.
+    """
+    with timed_span("auth", "token") as span:
+        response = await token_cache.aget_token(
+            username or settings.USERNAME, password or settings.PASSWORD
+        )
+        span["success"] = response.success
+        span["cached"] = bool((response.metadata or {}).get("cached"))
+    return response
+
+
+# Async tool variant registered by the Authentication Agent
+authenticate_user_async_tool = function_tool(
+    authenticate_user_async, name_override="authenticate_user"
+)
@@ -1,23 +1,44 @@
 from agents import function_tool
-import requests
-from src.config.settings import settings
+import httpx
 import time
 import logging
-from src.lms_agents.auth import auth_agent
+from typing import List, Optional
+from src.tools.auth import auth_tools
 from src.lms_agents.base_agent import AgentResponse
 from src.utils.utils import retry_on_failure
+from src.utils.lms_client import async_lms_client
+from src.store.entity_store import entity_store
+from src.utils.projection import project_records, summarize_records
 
 logger = logging.getLogger(__name__)
 
 
-@function_tool
 @retry_on_failure(max_retries=3)
-def get_all_courses() -> AgentResponse:
+async def aget_all_courses(
+    max_items: Optional[int] = None, fields: Optional[List[str]] = None
+) -> AgentResponse:
     """
     Get a list of all available courses with improved error handling.
     Returns standardized response format.
+
+    Args:
+        max_items (int, optional): Maximum number of courses to return. All pages are fetched when omitted.
+        fields (list[str], optional): Fields to return per record, or ["*"] for full records. A compact default set is returned when omitted.
     """
-    token_response = auth_agent.authenticate_user()
+    courses = entity_store.all("courses")
+    if courses is not None:
+        courses = courses[:max_items]
+        return AgentResponse(
+            success=True,
+            data=project_records(courses, "courses", fields),
+            metadata={
+                "total_courses": len(courses),
+                "summary": summarize_records(courses, "courses"),
+                "timestamp": time.time(),
+            },
+        )
+
+    token_response = await auth_tools.authenticate_user_async()
     if not token_response.success:
         return AgentResponse(
             success=False, error="Authentication failed: " + token_response.error
@@ -27,64 +48,98 @@ def get_all_courses() -> AgentResponse:
     headers = {"Authorization": f"Bearer {access_token}"}
 
     try:
-        response = requests.get(
-            f"{settings.API_ENDPOINTS['base_url']}/external-services/api/v1/courses/",
-            timeout=10,
-            headers=headers,
-        )
-        response.raise_for_status()
-
-        data = response.json()
-        courses = data.get("results", [])
+        courses = [
+            course
+            async for course in async_lms_client.iter_results(
+                "courses/", headers=headers, max_items=max_items
+            )
+        ]
+        if max_items is None:
+            entity_store.replace("courses", courses)
+        else:
+            entity_store.upsert("courses", courses)
 
         return AgentResponse(
             success=True,
-            data=courses,
-            metadata={"total_courses": len(courses), "timestamp": time.time()},
+            data=project_records(courses, "courses", fields),
+            metadata={
+                "total_courses": len(courses),
+                "summary": summarize_records(courses, "courses"),
+                "timestamp": time.time(),
+            },
         )
-    except requests.RequestException as e:
+    except httpx.HTTPError as e:
         logger.error(f"Failed to fetch courses: {e}")
         return AgentResponse(success=False, error=f"Failed to fetch courses: {str(e)}")
 
 
-@function_tool
 @retry_on_failure(max_retries=3)
-def get_courses_by_category(category_id: str) -> AgentResponse:
+async def aget_courses_by_category(
+    category_id: str, fields: Optional[List[str]] = None
+) -> AgentResponse:
     """
     Get courses by category with validation and improved error handling.
 
     Args:
         category_id (str): The ID of the category (must be non-empty)
+        fields (list[str], optional): Fields to return per record, or ["*"] for full records. A compact default set is returned when omitted.
     """
     if not category_id or not category_id.strip():
         return AgentResponse(success=False, error="Category ID cannot be empty")
 
-    headers = {"Authorization": f"Bearer {settings.API_ACCESS_KEY}"}
+    courses = entity_store.filter("courses", category=category_id.strip())
+    if courses is not None:
+        return AgentResponse(
+            success=True,
+            data=project_records(courses, "courses", fields),
+            metadata={
+                "category_id": category_id,
+                "course_count": len(courses),
+                "summary": summarize_records(courses, "courses"),
+                "timestamp": time.time(),
+            },
+        )
 
-    try:
-        response = requests.get(
-            f"{settings.API_ENDPOINTS['base_url']}/external-services/api/v1/courses/",
-            params={"category": category_id.strip()},
-            timeout=10,
-            headers=headers,
+    token_response = await auth_tools.authenticate_user_async()
+    if not token_response.success:
+        return AgentResponse(
+            success=False, error="Authentication failed: " + token_response.error
         )
-        response.raise_for_status()
 
-        data = response.json()
-        courses = data.get("results", [])
+    access_token = token_response.data.get("access")
+    headers = {"Authorization": f"Bearer {access_token}"}
+
+    try:
+        courses = [
+            course
+            async for course in async_lms_client.iter_results(
+                "courses/", params={"category": category_id.strip()}, headers=headers
+            )
+        ]
+        entity_store.replace(
+            "courses", courses, scope=("category", category_id.strip())
+        )
 
         return AgentResponse(
             success=True,
-            data=courses,
+            data=project_records(courses, "courses", fields),
             metadata={
                 "category_id": category_id,
                 "course_count": len(courses),
+                "summary": summarize_records(courses, "courses"),
                 "timestamp": time.time(),
             },
         )
-    except requests.RequestException as e:
+    except httpx.HTTPError as e:
         logger.error(f"Failed to fetch courses for category {category_id}: {e}")
         return AgentResponse(
             success=False,
             error=f"Failed to fetch courses for category {category_id}: {str(e)}",
         )
+
+
+# Tools registered by the Course Agent
+get_all_courses_async = function_tool(aget_all_courses, name_override="get_all_courses")
+get_courses_by_category_async = function_tool(
+    aget_courses_by_category, name_override="get_courses_by_category"
+)
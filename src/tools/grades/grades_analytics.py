@@ -0,0 +1,346 @@
+from agents import function_tool
+import httpx
+from src.config.settings import settings
+import logging
+import math
+import statistics
+from typing import Any, Dict, List, Optional, Sequence
+from src.tools.auth import auth_tools
+from src.utils.utils import retry_on_failure
+from src.utils.lms_client import async_lms_client
+from src.store.entity_store import entity_store
+import time
+from src.lms_agents.base_agent import AgentResponse
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is optional
+    np = None
+
+
+logger = logging.getLogger(__name__)
+
+PERCENTILES = (10, 25, 50, 75, 90)
+
+# Record field each rollup groups by
+GROUP_FIELDS = {"student": "user", "lesson": "lesson"}
+
+
+def _number(value: Any) -> Optional[float]:
+    """Parse a score, returning None for missing or non-numeric values."""
+    if value is None or value == "" or isinstance(value, bool):
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if math.isnan(number) else number
+
+
+def _key(value: Any) -> Optional[str]:
+    if isinstance(value, dict):
+        value = value.get("id")
+    return None if value is None else str(value)
+
+
+def _round(value: float) -> float:
+    return round(float(value), 2)
+
+
+def _percentile(ordered: Sequence[float], q: float) -> float:
+    """Linear-interpolated percentile of sorted values (NumPy's default method)."""
+    position = (len(ordered) - 1) * q / 100
+    low = math.floor(position)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+
+def describe(values: Sequence[float], pass_mark: Optional[float] = None) -> Dict:
+    """Count, mean, median, spread, percentiles and pass rate of a set of scores."""
+    if not values:
+        return {"count": 0}
+
+    if np is not None:
+        array = np.asarray(values, dtype=float)
+        stats = {
+            "count": int(array.size),
+            "mean": array.mean(),
+            "median": np.median(array),
+            "std": array.std(),
+            "min": array.min(),
+            "max": array.max(),
+        }
+        percentiles = np.percentile(array, PERCENTILES)
+        passed = int((array >= pass_mark).sum()) if pass_mark is not None else None
+    else:
+        ordered = sorted(values)
+        stats = {
+            "count": len(ordered),
+            "mean": statistics.fmean(ordered),
+            "median": statistics.median(ordered),
+            "std": statistics.pstdev(ordered),
+            "min": ordered[0],
+            "max": ordered[-1],
+        }
+        percentiles = [_percentile(ordered, q) for q in PERCENTILES]
+        passed = (
+            sum(1 for v in ordered if v >= pass_mark) if pass_mark is not None else None
+        )
+
+    result = {k: v if k == "count" else _round(v) for k, v in stats.items()}
+    result["percentiles"] = {
+        f"p{q}": _round(p) for q, p in zip(PERCENTILES, percentiles)
+    }
+    if passed is not None:
+        result["pass_rate"] = _round(passed / stats["count"])
+        result["failed"] = stats["count"] - passed
+    return result
+
+
+def rollup(
+    records: List[dict],
+    group_field: str,
+    score_field: str,
+    pass_mark: Optional[float] = None,
+) -> List[Dict]:
+    """Per-group count, mean, min, max and pass rate of ``score_field``."""
+    keys, scores = [], []
+    for record in records:
+        key = _key(record.get(group_field))
+        score = _number(record.get(score_field))
+        if key is not None and score is not None:
+            keys.append(key)
+            scores.append(score)
+    if not keys:
+        return []
+
+    if np is not None:
+        groups, inverse = np.unique(np.asarray(keys), return_inverse=True)
+        values = np.asarray(scores, dtype=float)
+        counts = np.bincount(inverse)
+        means = np.bincount(inverse, weights=values) / counts
+        mins = np.full(groups.size, np.inf)
+        maxs = np.full(groups.size, -np.inf)
+        np.minimum.at(mins, inverse, values)
+        np.maximum.at(maxs, inverse, values)
+        passed = (
+            np.bincount(inverse, weights=values >= pass_mark)
+            if pass_mark is not None
+            else None
+        )
+        rows = [
+            {
+                "id": str(groups[i]),
+                "count": int(counts[i]),
+                "mean": _round(means[i]),
+                "min": _round(mins[i]),
+                "max": _round(maxs[i]),
+                **(
+                    {"pass_rate": _round(passed[i] / counts[i])}
+                    if passed is not None
+                    else {}
+                ),
+            }
+            for i in range(groups.size)
+        ]
+    else:
+        by_group: Dict[str, List[float]] = {}
+        for key, score in zip(keys, scores):
+            by_group.setdefault(key, []).append(score)
+        rows = []
+        for key, group_scores in by_group.items():
+            row = {
+                "id": key,
+                "count": len(group_scores),
+                "mean": _round(statistics.fmean(group_scores)),
+                "min": _round(min(group_scores)),
+                "max": _round(max(group_scores)),
+            }
+            if pass_mark is not None:
+                passed = sum(1 for v in group_scores if v >= pass_mark)
+                row["pass_rate"] = _round(passed / len(group_scores))
+            rows.append(row)
+
+    rows.sort(key=lambda row: (row["mean"], row["id"]))
+    return rows
+
+
+def grade_statistics(records: List[dict], pass_mark: float) -> Dict[str, Any]:
+    """Distribution of the score, raw score and attendance (nomrehozoor) fields."""
+    fields = {
+        "total_score": settings.GRADE_SCORE_FIELD,
+        "score": "score",
+        "attendance": settings.GRADE_ATTENDANCE_FIELD,
+    }
+    if settings.GRADE_SCORE_FIELD == "score":
+        del fields["score"]
+
+    result: Dict[str, Any] = {"grades": len(records)}
+    for name, field in fields.items():
+        values = [_number(r.get(field)) for r in records]
+        values = [v for v in values if v is not None]
+        if values:
+            mark = pass_mark if name == "total_score" else None
+            result[name] = describe(values, mark)
+    return result
+
+
+def grade_rollup(
+    records: List[dict],
+    group_by: str,
+    pass_mark: float,
+    failing_only: bool = False,
+    limit: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Per-student or per-lesson rollup, weakest groups first."""
+    rows = rollup(
+        records, GROUP_FIELDS[group_by], settings.GRADE_SCORE_FIELD, pass_mark
+    )
+    if failing_only:
+        rows = [row for row in rows if row["mean"] < pass_mark]
+    limit = settings.RESULT_MAX_ROWS if limit is None else limit
+    return {
+        "group_by": group_by,
+        "groups": len(rows),
+        "pass_mark": pass_mark,
+        "rows": rows[:limit] if limit > 0 else rows,
+    }
+
+
+def _grade_params(
+    lesson_id: Optional[str], student_id: Optional[str]
+) -> Dict[str, str]:
+    params = {}
+    if lesson_id:
+        params["lesson"] = lesson_id
+    if student_id:
+        params["user"] = student_id
+    return params
+
+
+def _stored_grades(params: Dict[str, str]) -> Optional[List[dict]]:
+    if not params:
+        return entity_store.all("grades")
+    return entity_store.filter("grades", **params)
+
+
+def _store_grades(params: Dict[str, str], grades: List[dict]) -> None:
+    if not params:
+        entity_store.replace("grades", grades)
+    elif len(params) == 1:
+        ((field, value),) = params.items()
+        entity_store.replace("grades", grades, scope=(field, value))
+    else:
+        entity_store.upsert("grades", grades)
+
+
+async def _aload_grades(
+    lesson_id: Optional[str], student_id: Optional[str]
+) -> List[dict]:
+    """Return the full grade records in scope from the mirror or the API."""
+    params = _grade_params(lesson_id, student_id)
+    grades = _stored_grades(params)
+    if grades is not None:
+        return grades
+
+    token_response = await auth_tools.authenticate_user_async()
+    if not token_response.success:
+        raise PermissionError("Authentication failed: " + token_response.error)
+
+    headers = {"Authorization": f"Bearer {token_response.data.get('access')}"}
+    grades = [
+        grade
+        async for grade in async_lms_client.iter_results(
+            "grades/", params=params, headers=headers
+        )
+    ]
+    _store_grades(params, grades)
+    return grades
+
+
+@retry_on_failure(max_retries=3)
+async def aget_grade_statistics(
+    lesson_id: Optional[str] = None,
+    student_id: Optional[str] = None,
+    pass_mark: Optional[float] = None,
+) -> AgentResponse:
+    """Get summary statistics of grades: count, mean, median, standard deviation, min, max, percentiles and pass rate of the total score, plus the same figures for the raw score and the nomrehozoor (attendance) grade. Computed over all grades, or only those of one lesson and/or one student. Use this instead of fetching grade lists when the user asks for averages, distributions or pass rates. Returns standardized response format.
+
+    Args:
+        lesson_id (str, optional): Only include grades of this lesson.
+        student_id (str, optional): Only include grades of this student.
+        pass_mark (float, optional): Minimum passing total score. Defaults to the configured pass mark.
+    """
+    pass_mark = settings.GRADE_PASS_MARK if pass_mark is None else pass_mark
+    try:
+        grades = await _aload_grades(lesson_id, student_id)
+    except PermissionError as e:
+        return AgentResponse(success=False, error=str(e))
+    except httpx.HTTPError as e:
+        logger.error(f"Failed to fetch grades: {e}")
+        return AgentResponse(success=False, error=f"Failed to fetch grades: {str(e)}")
+
+    return AgentResponse(
+        success=True,
+        data=grade_statistics(grades, pass_mark),
+        metadata={
+            "lesson_id": lesson_id,
+            "student_id": student_id,
+            "pass_mark": pass_mark,
+            "timestamp": time.time(),
+        },
+    )
+
+
+@retry_on_failure(max_retries=3)
+async def aget_grade_rollup(
+    group_by: str,
+    lesson_id: Optional[str] = None,
+    student_id: Optional[str] = None,
+    pass_mark: Optional[float] = None,
+    failing_only: Optional[bool] = None,
+    limit: Optional[int] = None,
+) -> AgentResponse:
+    """Get per-student or per-lesson grade rollups: number of grades, mean, min, max and pass rate of the total score for each student or lesson, weakest first. Use this for questions like "average score per lesson" or "which students are failing" (group_by="student", failing_only=true). Returns standardized response format.
+
+    Args:
+        group_by (str): Either "student" or "lesson".
+        lesson_id (str, optional): Only include grades of this lesson.
+        student_id (str, optional): Only include grades of this student.
+        pass_mark (float, optional): Minimum passing total score. Defaults to the configured pass mark.
+        failing_only (bool, optional): Only return groups whose mean is below the pass mark.
+        limit (int, optional): Maximum number of groups to return.
+    """
+    if group_by not in GROUP_FIELDS:
+        return AgentResponse(
+            success=False, error='group_by must be either "student" or "lesson"'
+        )
+
+    pass_mark = settings.GRADE_PASS_MARK if pass_mark is None else pass_mark
+    try:
+        grades = await _aload_grades(lesson_id, student_id)
+    except PermissionError as e:
+        return AgentResponse(success=False, error=str(e))
+    except httpx.HTTPError as e:
+        logger.error(f"Failed to fetch grades: {e}")
+        return AgentResponse(success=False, error=f"Failed to fetch grades: {str(e)}")
+
+    return AgentResponse(
+        success=True,
+        data=grade_rollup(grades, group_by, pass_mark, bool(failing_only), limit),
+        metadata={
+            "total_grades": len(grades),
+            "lesson_id": lesson_id,
+            "student_id": student_id,
+            "timestamp": time.time(),
+        },
+    )
+
+
+# Tools registered by the Grades Agent
+get_grade_statistics_async = function_tool(
+    aget_grade_statistics, name_override="get_grade_statistics"
+)
+get_grade_rollup_async = function_tool(
+    aget_grade_rollup, name_override="get_grade_rollup"
+)
@@ -1,9 +1,19 @@
 from agents import function_tool
-import requests
-from src.config.settings import settings
+import httpx
 import logging
-from src.lms_agents.auth import auth_agent
+from typing import Dict, List, Optional
+from src.tools.auth import auth_tools
 from src.utils.utils import retry_on_failure
+from src.utils.lms_client import async_lms_client
+from src.utils.batch import (
+    afetch_many,
+    batch_response,
+    check_ids,
+    split_hits,
+    unique_ids,
+)
+from src.store.entity_store import entity_store
+from src.utils.projection import project_records, summarize_records
 import time
 from src.lms_agents.base_agent import AgentResponse
 
@@ -11,10 +21,32 @@ from src.lms_agents.base_agent import AgentResponse
 logger = logging.getLogger(__name__)
 
 
-@function_tool
 @retry_on_failure(max_retries=3)
-def get_all_grades() -> AgentResponse:
-    token_response = auth_agent.authenticate_user()
+async def aget_all_grades(
+    max_items: Optional[int] = None, fields: Optional[List[str]] = None
+) -> AgentResponse:
+    """
+    Get a list of all available grades with improved error handling. Using this tool all grade details like id, user, lesson, total_score, score, nomrehozoor (which is the grade for being absent/present), etc is available.
+    Returns standardized response format.
+
+    Args:
+        max_items (int, optional): Maximum number of grades to return. All pages are fetched when omitted.
+        fields (list[str], optional): Fields to return per record, or ["*"] for full records. A compact default set is returned when omitted.
+    """
+    grades = entity_store.all("grades")
+    if grades is not None:
+        grades = grades[:max_items]
+        return AgentResponse(
+            success=True,
+            data=project_records(grades, "grades", fields),
+            metadata={
+                "total_grades": len(grades),
+                "summary": summarize_records(grades, "grades"),
+                "timestamp": time.time(),
+            },
+        )
+
+    token_response = await auth_tools.authenticate_user_async()
     if not token_response.success:
         return AgentResponse(
             success=False, error="Authentication failed: " + token_response.error
@@ -22,42 +54,57 @@ def get_all_grades() -> AgentResponse:
 
     access_token = token_response.data.get("access")
     headers = {"Authorization": f"Bearer {access_token}"}
-    """
-    Get a list of all available grades with improved error handling. Using this tool all grade details like id, user, lesson, total_score, score, nomrehozoor (which is the grade for being absent/present), etc is available.
-    Returns standardized response format.
-    """
 
     try:
-        response = requests.get(
-            f"{settings.API_ENDPOINTS['base_url']}/external-services/api/v1/grades/",
-            timeout=10,
-            headers=headers,
-        )
-        response.raise_for_status()
-
-        data = response.json()
-        grades = data.get("results", [])
+        grades = [
+            grade
+            async for grade in async_lms_client.iter_results(
+                "grades/", headers=headers, max_items=max_items
+            )
+        ]
+        if max_items is None:
+            entity_store.replace("grades", grades)
+        else:
+            entity_store.upsert("grades", grades)
 
         return AgentResponse(
             success=True,
-            data=grades,
-            metadata={"total_grades": len(grades), "timestamp": time.time()},
+            data=project_records(grades, "grades", fields),
+            metadata={
+                "total_grades": len(grades),
+                "summary": summarize_records(grades, "grades"),
+                "timestamp": time.time(),
+            },
         )
-    except requests.RequestException as e:
+    except httpx.HTTPError as e:
         logger.error(f"Failed to fetch grades: {e}")
         return AgentResponse(success=False, error=f"Failed to fetch grades: {str(e)}")
 
 
-@function_tool
 @retry_on_failure(max_retries=3)
-def get_lesson_grades(lesson_id: str) -> AgentResponse:
+async def aget_lesson_grades(
+    lesson_id: str, fields: Optional[List[str]] = None
+) -> AgentResponse:
     """Get a list of all grades for a specific lesson. The lesson id as a query parameter in the request is required. This tool could be used in case the user asks for grades in a specific lesson. In case the user add lesson name to the question, use the lessons tool to get the lesson id and pass it to this tool. In case you could not find the lesson id, respond back to the user that the lesson is not found. Returns standardized response format.
 
     Args:
         lesson_id (str): The id of the lesson.
+        fields (list[str], optional): Fields to return per record, or ["*"] for full records. A compact default set is returned when omitted.
     """
 
-    token_response = auth_agent.authenticate_user()
+    lesson_grades = entity_store.filter("grades", lesson=lesson_id)
+    if lesson_grades is not None:
+        return AgentResponse(
+            success=True,
+            data=project_records(lesson_grades, "grades", fields),
+            metadata={
+                "lesson_grades_length": len(lesson_grades),
+                "summary": summarize_records(lesson_grades, "grades"),
+                "timestamp": time.time(),
+            },
+        )
+
+    token_response = await auth_tools.authenticate_user_async()
     if not token_response.success:
         return AgentResponse(
             success=False, error="Authentication failed: " + token_response.error
@@ -67,42 +114,54 @@ def get_lesson_grades(lesson_id: str) -> AgentResponse:
     headers = {"Authorization": f"Bearer {access_token}"}
 
     try:
-        response = requests.get(
-            f"{settings.API_ENDPOINTS['base_url']}/external-services/api/v1/grades/",
-            timeout=10,
-            params={"lesson": lesson_id},
-            headers=headers,
-        )
-        response.raise_for_status()
-
-        data = response.json()
-        lesson_grades = data.get("results", [])
+        lesson_grades = [
+            grade
+            async for grade in async_lms_client.iter_results(
+                "grades/", params={"lesson": lesson_id}, headers=headers
+            )
+        ]
+        entity_store.replace("grades", lesson_grades, scope=("lesson", lesson_id))
 
         return AgentResponse(
             success=True,
-            data=lesson_grades,
+            data=project_records(lesson_grades, "grades", fields),
             metadata={
                 "lesson_grades_length": len(lesson_grades),
+                "summary": summarize_records(lesson_grades, "grades"),
                 "timestamp": time.time(),
             },
         )
-    except requests.RequestException as e:
+    except httpx.HTTPError as e:
         logger.error(f"Failed to fetch lesson grades: {e}")
         return AgentResponse(
             success=False, error=f"Failed to fetch lesson grades: {str(e)}"
         )
 
 
-@function_tool
 @retry_on_failure(max_retries=3)
-def get_student_grades(student_id: str) -> AgentResponse:
-    """Get a list of all grades for a specific student. Tthe student id as a query parameter in the request is required. This tool could be used in case the user asks for him/her or another student grades. In case you the user add student name in the question, use the Students Agent to find the student id and pass it to this tool. In case you could not find the student id, respond back to the user that the user is not found or that the user does not exist. Returns standardized response format
+async def aget_student_grades(
+    student_id: str, fields: Optional[List[str]] = None
+) -> AgentResponse:
+    """Get a list of all grades for a specific student. The student id as a query parameter in the request is required. This tool could be used in case the user asks for him/her or another student grades. In case you the user add student name in the question, use the Students Agent to find the student id and pass it to this tool. In case you could not find the student id, respond back to the user that the user is not found or that the user does not exist. Returns standardized response format
 
     Args:
         student_id (str): The id of the student.
+        fields (list[str], optional): Fields to return per record, or ["*"] for full records. A compact default set is returned when omitted.
     """
 
-    token_response = auth_agent.authenticate_user()
+    user_grades = entity_store.filter("grades", user=student_id)
+    if user_grades is not None:
+        return AgentResponse(
+            success=True,
+            data=project_records(user_grades, "grades", fields),
+            metadata={
+                "student_grades_length": len(user_grades),
+                "summary": summarize_records(user_grades, "grades"),
+                "timestamp": time.time(),
+            },
+        )
+
+    token_response = await auth_tools.authenticate_user_async()
     if not token_response.success:
         return AgentResponse(
             success=False, error="Authentication failed: " + token_response.error
@@ -111,27 +170,89 @@ def get_student_grades(student_id: str) -> AgentResponse:
     access_token = token_response.data.get("access")
     headers = {"Authorization": f"Bearer {access_token}"}
     try:
-        response = requests.get(
-            f"{settings.API_ENDPOINTS['base_url']}/external-services/api/v1/grades/",
-            timeout=10,
-            params={"user": student_id},
-            headers=headers,
-        )
-        response.raise_for_status()
-
-        data = response.json()
-        user_grades = data.get("results", [])
+        user_grades = [
+            grade
+            async for grade in async_lms_client.iter_results(
+                "grades/", params={"user": student_id}, headers=headers
+            )
+        ]
+        entity_store.replace("grades", user_grades, scope=("user", student_id))
 
         return AgentResponse(
             success=True,
-            data=user_grades,
+            data=project_records(user_grades, "grades", fields),
             metadata={
                 "student_grades_length": len(user_grades),
+                "summary": summarize_records(user_grades, "grades"),
                 "timestamp": time.time(),
             },
         )
-    except requests.RequestException as e:
-        logger.error(f"Failed to fetch lesson grades: {e}")
+    except httpx.HTTPError as e:
+        logger.error(f"Failed to fetch student grades: {e}")
         return AgentResponse(
-            success=False, error=f"Failed to fetch lesson grades: {str(e)}"
+            success=False, error=f"Failed to fetch student grades: {str(e)}"
+        )
+
+
+async def _afetch_student_grades(
+    student_id: str, headers: Dict[str, str]
+) -> List[dict]:
+    records = [
+        record
+        async for record in async_lms_client.iter_results(
+            "grades/", params={"user": student_id}, headers=headers
         )
+    ]
+    entity_store.replace("grades", records, scope=("user", student_id))
+    return records
+
+
+@retry_on_failure(max_retries=3)
+async def aget_grades_for_students(
+    student_ids: List[str], fields: Optional[List[str]] = None
+) -> AgentResponse:
+    """Get the grades of several students in one call. Use this instead of calling the student grades tool once per student, e.g. when comparing students or a whole class. Duplicate ids are ignored. Returns standardized response format with the grades keyed by student id.
+
+
+    Args:
+        student_ids (list[str]): The ids of the students (at least one).
+        fields (list[str], optional): Fields to return per record, or ["*"] for full records. A compact default set is returned when omitted.
+    """
+
+    ids = unique_ids(student_ids)
+    invalid = check_ids(ids, "student")
+    if invalid:
+        return invalid
+
+    records, missing = split_hits(
+        ids, lambda student_id: entity_store.filter("grades", user=student_id)
+    )
+    errors = {}
+    if missing:
+        token_response = await auth_tools.authenticate_user_async()
+        if not token_response.success:
+            return AgentResponse(
+                success=False, error="Authentication failed: " + token_response.error
+            )
+
+        access_token = token_response.data.get("access")
+        headers = {"Authorization": f"Bearer {access_token}"}
+        fetched, errors = await afetch_many(
+            missing, lambda student_id: _afetch_student_grades(student_id, headers)
+        )
+        records.update(fetched)
+
+    return batch_response(ids, records, errors, "grades", fields)
+
+
+# Tools registered by the Grades Agent
+get_all_grades_async = function_tool(aget_all_grades, name_override="get_all_grades")
+get_lesson_grades_async = function_tool(
+    aget_lesson_grades, name_override="get_lesson_grades"
+)
+get_student_grades_async = function_tool(
+    aget_student_grades, name_override="get_student_grades"
+)
+get_grades_for_students_async = function_tool(
+    aget_grades_for_students, name_override="get_grades_for_students"
+)
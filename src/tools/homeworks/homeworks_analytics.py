@@ -0,0 +1,398 @@
+from agents import function_tool
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+import asyncio
+import httpx
+from src.config.settings import settings
+from typing import Any, Dict, List, Optional, Set, Tuple
+import logging
+from src.tools.auth import auth_tools
+from src.utils.utils import retry_on_failure
+from src.utils.batch import afetch_many, split_hits, unique_ids
+from src.utils.lms_client import async_lms_client
+from src.store.entity_store import entity_store
+import time
+from src.lms_agents.base_agent import AgentResponse
+
+logger = logging.getLogger(__name__)
+
+# Candidate field names, first present wins
+DEADLINE_FIELDS = ("deadline", "due_date", "end_date", "end_time")
+SUBMITTED_FIELDS = ("submitted_at", "created", "created_at")
+NAME_FIELDS = ("full_name", "first_name", "last_name", "name", "title", "username")
+
+# Per-lesson totals in the completion rollup
+COUNTS = ("homeworks", "expected", "missing", "submitted", "late")
+
+ON_TIME = "on_time"
+LATE = "late"
+
+
+def _key(value: Any) -> Optional[str]:
+    if isinstance(value, dict):
+        value = value.get("id")
+    return None if value is None else str(value)
+
+
+def _first(record: dict, fields: Tuple[str, ...]) -> Any:
+    for f in fields:
+        if record.get(f) not in (None, ""):
+            return record[f]
+    return None
+
+
+def _timestamp(value: Any) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def _label(record: Optional[dict]) -> Optional[str]:
+    if not record:
+        return None
+    if record.get("first_name") or record.get("last_name"):
+        return " ".join(
+            str(record[f]) for f in ("first_name", "last_name") if record.get(f)
+        )
+    value = _first(record, NAME_FIELDS)
+    return None if value is None else str(value)
+
+
+@dataclass
+class SubmissionMatrix:
+    """
+    Student × homework submission matrix of one or more lessons.
+
+    ``cells`` maps homework -> student -> ON_TIME or LATE; an expected
+    pair (the student is on the roster of the homework's lesson) without a
+    cell is a missing submission.
+    """
+
+    homeworks: Dict[str, dict]
+    # Lesson of each homework and the students expected to submit it
+    homework_lessons: Dict[str, Optional[str]]
+    rosters: Dict[Optional[str], Set[str]]
+    cells: Dict[str, Dict[str, str]] = field(default_factory=dict)
+
+    @classmethod
+    def build(
+        cls,
+        homeworks: List[dict],
+        responses: List[dict],
+        rosters: Dict[Optional[str], Set[str]],
+    ) -> "SubmissionMatrix":
+        by_id = {_key(h.get("id")): h for h in homeworks if h.get("id") is not None}
+        matrix = cls(
+            homeworks=by_id,
+            homework_lessons={i: _key(h.get("lesson")) for i, h in by_id.items()},
+            rosters=rosters,
+        )
+        deadlines = {
+            i: _timestamp(_first(h, DEADLINE_FIELDS)) for i, h in by_id.items()
+        }
+        for response in responses:
+            student = _key(response.get("user"))
+            homework = _key(response.get("homework"))
+            if student is None or homework not in by_id:
+                continue
+            deadline = deadlines[homework]
+            submitted = _timestamp(_first(response, SUBMITTED_FIELDS))
+            late = bool(deadline and submitted and submitted > deadline)
+            row = matrix.cells.setdefault(homework, {})
+            # A student with both a late and an on-time response counts as on time
+            if row.get(student) != ON_TIME:
+                row[student] = LATE if late else ON_TIME
+        return matrix
+
+    def expected(self, homework: str) -> Set[str]:
+        return self.rosters.get(self.homework_lessons[homework], set())
+
+    def submitted(self, homework: str) -> Dict[str, str]:
+        return self.cells.get(homework, {})
+
+    def missing(self) -> Dict[str, List[str]]:
+        """Homeworks each student has not submitted, by student."""
+        missing: Dict[str, List[str]] = {}
+        for homework in self.homeworks:
+            for student in sorted(self.expected(homework)):
+                if student not in self.submitted(homework):
+                    missing.setdefault(student, []).append(homework)
+        return missing
+
+    def homework_completion(self) -> List[Dict[str, Any]]:
+        rows = []
+        for homework, record in self.homeworks.items():
+            expected = self.expected(homework)
+            submitted = self.submitted(homework)
+            on_roster = [s for s in submitted if s in expected] if expected else []
+            late = sum(1 for state in submitted.values() if state == LATE)
+            rows.append(
+                {
+                    "id": homework,
+                    "title": _label(record),
+                    "lesson": self.homework_lessons[homework],
+                    "expected": len(expected),
+                    "submitted": len(submitted),
+                    "missing": len(expected) - len(on_roster),
+                    "late": late,
+                    "completion_rate": (
+                        round(len(on_roster) / len(expected), 2) if expected else None
+                    ),
+                    "late_rate": round(late / len(submitted), 2) if submitted else None,
+                }
+            )
+        rows.sort(key=lambda row: (row["completion_rate"] or 0, row["id"]))
+        return rows
+
+    def lesson_completion(self) -> List[Dict[str, Any]]:
+        totals: Dict[Optional[str], Dict[str, int]] = {}
+        for row in self.homework_completion():
+            lesson = totals.setdefault(row["lesson"], dict.fromkeys(COUNTS, 0))
+            lesson["homeworks"] += 1
+            for k in COUNTS[1:]:
+                lesson[k] += row[k]
+        rows = []
+        for lesson, counts in totals.items():
+            expected, missing = counts["expected"], counts["missing"]
+            rows.append(
+                {
+                    "lesson": lesson,
+                    **counts,
+                    "completion_rate": (
+                        round((expected - missing) / expected, 2) if expected else None
+                    ),
+                    "late_rate": (
+                        round(counts["late"] / counts["submitted"], 2)
+                        if counts["submitted"]
+                        else None
+                    ),
+                }
+            )
+        rows.sort(key=lambda row: (row["completion_rate"] or 0, str(row["lesson"])))
+        return rows
+
+
+def _missing(
+    all_missing: Dict[str, List[str]], student_id: Optional[str]
+) -> List[Tuple[str, List[str]]]:
+    """Missing homeworks per student, most missing first."""
+    missing = all_missing
+    if student_id is not None:
+        missing = {s: h for s, h in all_missing.items() if s == str(student_id)}
+    return sorted(missing.items(), key=lambda item: -len(item[1]))
+
+
+def missing_students(
+    matrix: SubmissionMatrix, student_id: Optional[str], limit: Optional[int]
+) -> List[str]:
+    """Ids of the students ``homework_report`` lists as missing submissions."""
+    limit = settings.RESULT_MAX_ROWS if limit is None else limit
+    missing = [s for s, _ in _missing(matrix.missing(), student_id)]
+    return missing[:limit] if limit > 0 else missing
+
+
+def homework_report(
+    matrix: SubmissionMatrix,
+    students: Dict[str, dict],
+    student_id: Optional[str] = None,
+    limit: Optional[int] = None,
+    unknown_rosters: Optional[List[Optional[str]]] = None,
+) -> Dict[str, Any]:
+    """Aggregate a submission matrix into what goes back to the model."""
+    limit = settings.RESULT_MAX_ROWS if limit is None else limit
+    all_missing = matrix.missing()
+
+    states = [state for row in matrix.cells.values() for state in row.values()]
+    submitted = len(states)
+    late = states.count(LATE)
+    expected = sum(len(matrix.expected(h)) for h in matrix.homeworks)
+    missing_count = sum(len(h) for h in all_missing.values())
+    missing_rows = [
+        {"student": s, "name": _label(students.get(s)), "homeworks": h}
+        for s, h in _missing(all_missing, student_id)
+    ]
+    report = {
+        "homeworks": len(matrix.homeworks),
+        "students": len(set().union(*matrix.rosters.values())),
+        "expected_submissions": expected,
+        "submitted": submitted,
+        "missing_submissions": missing_count,
+        "completion_rate": (
+            round((expected - missing_count) / expected, 2) if expected else None
+        ),
+        "late": late,
+        "late_rate": round(late / submitted, 2) if submitted else None,
+        "by_lesson": matrix.lesson_completion()[:limit] if limit > 0 else None,
+        "by_homework": matrix.homework_completion()[:limit] if limit > 0 else None,
+        "students_missing": len(missing_rows),
+        "missing": missing_rows[:limit] if limit > 0 else missing_rows,
+    }
+    if unknown_rosters:
+        report["lessons_without_roster"] = unknown_rosters
+        report["note"] = (
+            "No grades are recorded for the lessons in lessons_without_roster, "
+            "so their enrolled students are unknown: only students who "
+            "submitted at least one of their homeworks are counted, and "
+            "students who submitted none are not reported missing."
+        )
+    return report
+
+
+def _rosters(
+    grades: List[dict], homeworks: List[dict], responses: List[dict]
+) -> Tuple[Dict[Optional[str], Set[str]], List[Optional[str]]]:
+    """
+    Students expected to submit each lesson's homeworks.
+
+    The API exposes no enrollment list, so a lesson's roster is the set of
+    students holding a grade in it. Lessons without grades have no known
+    roster; only the students who submitted one of their homeworks are
+    counted there. Returns the rosters and the lessons whose roster is
+    unknown.
+    """
+    lessons = {_key(h.get("id")): _key(h.get("lesson")) for h in homeworks}
+    rosters: Dict[Optional[str], Set[str]] = {
+        lesson: set() for lesson in lessons.values()
+    }
+    for grade in grades:
+        lesson, student = _key(grade.get("lesson")), _key(grade.get("user"))
+        if lesson in rosters and student is not None:
+            rosters[lesson].add(student)
+
+    unknown = {lesson for lesson, roster in rosters.items() if not roster}
+    for response in responses:
+        lesson = lessons.get(_key(response.get("homework")))
+        student = _key(response.get("user"))
+        if lesson in unknown and student is not None:
+            rosters[lesson].add(student)
+    return rosters, sorted(unknown, key=str)
+
+
+def _stored(resource: str, params: Dict[str, str]) -> Optional[List[dict]]:
+    if not params:
+        return entity_store.all(resource)
+    return entity_store.filter(resource, **params)
+
+
+def _store(resource: str, params: Dict[str, str], records: List[dict]) -> None:
+    if not params:
+        entity_store.replace(resource, records)
+    else:
+        ((fk, value),) = params.items()
+        entity_store.replace(resource, records, scope=(fk, value))
+
+
+async def _aload(
+    resource: str, params: Dict[str, str], headers: Dict[str, str]
+) -> List[dict]:
+    records = _stored(resource, params)
+    if records is None:
+        records = [
+            record
+            async for record in async_lms_client.iter_results(
+                f"{resource}/", params=params, headers=headers
+            )
+        ]
+        _store(resource, params, records)
+    return records
+
+
+async def _astudents(ids: List[str], headers: Dict[str, str]) -> Dict[str, dict]:
+    """Student records of ``ids`` from the mirror, fetching the rest by id."""
+    students, missing = split_hits(ids, lambda i: entity_store.get("students", i))
+
+    async def fetch(student_id: str) -> dict:
+        data = await async_lms_client.get_json(
+            f"students/{student_id}", headers=headers
+        )
+        student = data.get("results", data)
+        if isinstance(student, dict):
+            entity_store.upsert("students", [student])
+        return student
+
+    if missing:
+        # Names are a nicety: students that fail to load are listed by id
+        fetched, _ = await afetch_many(missing, fetch)
+        students.update(fetched)
+    return students
+
+
+@retry_on_failure(max_retries=3)
+async def aget_homework_completion(
+    lesson_id: Optional[str] = None,
+    student_id: Optional[str] = None,
+    limit: Optional[int] = None,
+) -> AgentResponse:
+    """Get homework submission analytics in a single call: for every homework of a lesson (or of all lessons when lesson_id is omitted) which students have not submitted, how many submissions were late, and completion and late rates per homework and per lesson. A lesson's expected students are those holding a grade in it; for lessons without any grades the roster is unknown, so only students who submitted at least one of their homeworks are counted and the lesson is listed under lessons_without_roster. Use this for questions like "who hasn't submitted homework for lesson X" instead of chaining the homework, homework-response and student tools. Returns standardized response format.
+
+    Args:
+        lesson_id (str, optional): Only analyse the homeworks of this lesson.
+        student_id (str, optional): Only list missing submissions of this student.
+        limit (int, optional): Maximum number of rows per list in the result.
+    """
+    token_response = await auth_tools.authenticate_user_async()
+    if not token_response.success:
+        return AgentResponse(
+            success=False, error="Authentication failed: " + token_response.error
+        )
+
+    access_token = token_response.data.get("access")
+    headers = {"Authorization": f"Bearer {access_token}"}
+    scope = {"lesson": lesson_id} if lesson_id else {}
+
+    async def load_responses() -> Tuple[List[dict], List[dict]]:
+        if not lesson_id:
+            return await asyncio.gather(
+                _aload("homeworks", {}, headers),
+                _aload("homework-responses", {}, headers),
+            )
+        homeworks = await _aload("homeworks", scope, headers)
+        ids = unique_ids(h.get("id") for h in homeworks if h.get("id") is not None)
+        pages, errors = await afetch_many(
+            ids,
+            lambda homework_id: _aload(
+                "homework-responses", {"homework": homework_id}, headers
+            ),
+        )
+        if errors:
+            # A missing homework would be reported as nobody submitting it
+            raise next(iter(errors.values()))
+        return homeworks, [r for page in pages.values() for r in page]
+
+    try:
+        # Every student is only loaded for school-wide questions; for one
+        # lesson just the students listed as missing are looked up
+        loads = [load_responses(), _aload("grades", scope, headers)]
+        if not lesson_id:
+            loads.append(_aload("students", {}, headers))
+        (homeworks, responses), grades, *students = await asyncio.gather(*loads)
+
+        rosters, unknown = _rosters(grades, homeworks, responses)
+        matrix = SubmissionMatrix.build(homeworks, responses, rosters)
+        if students:
+            by_id = {_key(s.get("id")): s for s in students[0]}
+        else:
+            by_id = await _astudents(
+                missing_students(matrix, student_id, limit), headers
+            )
+        report = homework_report(matrix, by_id, student_id, limit, unknown)
+        return AgentResponse(
+            success=True,
+            data=report,
+            metadata={"lesson_id": lesson_id, "timestamp": time.time()},
+        )
+    except httpx.HTTPError as e:
+        logger.error(f"Failed to build homework completion: {e}")
+        return AgentResponse(
+            success=False, error=f"Failed to build homework completion: {str(e)}"
+        )
+
+
+# Tool registered by the Homeworks Agent
+get_homework_completion_async = function_tool(
+    aget_homework_completion, name_override="get_homework_completion"
+)
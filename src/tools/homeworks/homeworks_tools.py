@@ -1,10 +1,19 @@
 from agents import function_tool
-import requests
-from src.config.settings import settings
-from typing import List
+import httpx
+from typing import Dict, List, Optional
 import logging
-from src.lms_agents.auth import auth_agent
+from src.tools.auth import auth_tools
 from src.utils.utils import retry_on_failure
+from src.utils.lms_client import async_lms_client
+from src.utils.batch import (
+    afetch_many,
+    batch_response,
+    check_ids,
+    split_hits,
+    unique_ids,
+)
+from src.store.entity_store import entity_store
+from src.utils.projection import project_records, summarize_records
 import time
 from src.lms_agents.base_agent import AgentResponse
 
@@ -12,11 +21,32 @@ from src.lms_agents.base_agent import AgentResponse
 logger = logging.getLogger(__name__)
 
 
-@function_tool
 @retry_on_failure(max_retries=3)
-def get_all_homeworks() -> AgentResponse:
+async def aget_all_homeworks(
+    max_items: Optional[int] = None, fields: Optional[List[str]] = None
+) -> AgentResponse:
+    """
+    Get a list of all available homeworks with improved error handling. Using this tool all homework details like name, ..., etc is available.
+    Returns standardized response format.
+
+    Args:
+        max_items (int, optional): Maximum number of homeworks to return. All pages are fetched when omitted.
+        fields (list[str], optional): Fields to return per record, or ["*"] for full records. A compact default set is returned when omitted.
+    """
+    homeworks = entity_store.all("homeworks")
+    if homeworks is not None:
+        homeworks = homeworks[:max_items]
+        return AgentResponse(
+            success=True,
+            data=project_records(homeworks, "homeworks", fields),
+            metadata={
+                "total_homeworks": len(homeworks),
+                "summary": summarize_records(homeworks, "homeworks"),
+                "timestamp": time.time(),
+            },
+        )
 
-    token_response = auth_agent.authenticate_user()
+    token_response = await auth_tools.authenticate_user_async()
     if not token_response.success:
         return AgentResponse(
             success=False, error="Authentication failed: " + token_response.error
@@ -25,39 +55,60 @@ def get_all_homeworks() -> AgentResponse:
     access_token = token_response.data.get("access")
     headers = {"Authorization": f"Bearer {access_token}"}
 
-    """
-    Get a list of all available homeworks with improved error handling. Using this tool all homework details like name, ..., etc is available. 
-    Returns standardized response format.
-    """
-
     try:
-        response = requests.get(
-            f"{settings.API_ENDPOINTS['base_url']}/external-services/api/v1/homeworks/",
-            timeout=10,
-            headers=headers,
-        )
-        response.raise_for_status()
-
-        data = response.json()
-        homeworks = data.get("results", [])
+        homeworks = [
+            homework
+            async for homework in async_lms_client.iter_results(
+                "homeworks/", headers=headers, max_items=max_items
+            )
+        ]
+        if max_items is None:
+            entity_store.replace("homeworks", homeworks)
+        else:
+            entity_store.upsert("homeworks", homeworks)
 
         return AgentResponse(
             success=True,
-            data=homeworks,
-            metadata={"total_homeworks": len(homeworks), "timestamp": time.time()},
+            data=project_records(homeworks, "homeworks", fields),
+            metadata={
+                "total_homeworks": len(homeworks),
+                "summary": summarize_records(homeworks, "homeworks"),
+                "timestamp": time.time(),
+            },
         )
-    except requests.RequestException as e:
+    except httpx.HTTPError as e:
         logger.error(f"Failed to fetch homeworks: {e}")
         return AgentResponse(
             success=False, error=f"Failed to fetch homeworks: {str(e)}"
         )
 
 
-@function_tool
 @retry_on_failure(max_retries=3)
-def get_all_homework_responses() -> AgentResponse:
+async def aget_all_homework_responses(
+    max_items: Optional[int] = None, fields: Optional[List[str]] = None
+) -> AgentResponse:
+    """
+    Get a list of all available homework responses with improved error handling. Using this tool all homework details like name, homework, ..., etc is available.
+    Returns standardized response format.
+
+    Args:
+        max_items (int, optional): Maximum number of homework responses to return. All pages are fetched when omitted.
+        fields (list[str], optional): Fields to return per record, or ["*"] for full records. A compact default set is returned when omitted.
+    """
+    homework_responses = entity_store.all("homework-responses")
+    if homework_responses is not None:
+        homework_responses = homework_responses[:max_items]
+        return AgentResponse(
+            success=True,
+            data=project_records(homework_responses, "homework-responses", fields),
+            metadata={
+                "total_homeworks_responses": len(homework_responses),
+                "summary": summarize_records(homework_responses, "homework-responses"),
+                "timestamp": time.time(),
+            },
+        )
 
-    token_response = auth_agent.authenticate_user()
+    token_response = await auth_tools.authenticate_user_async()
     if not token_response.success:
         return AgentResponse(
             success=False, error="Authentication failed: " + token_response.error
@@ -66,48 +117,65 @@ def get_all_homework_responses() -> AgentResponse:
     access_token = token_response.data.get("access")
     headers = {"Authorization": f"Bearer {access_token}"}
 
-    """
-    Get a list of all available homework responses with improved error handling. Using this tool all homework details like name, homework, ..., etc is available. 
-    Returns standardized response format.
-    """
-
     try:
-        response = requests.get(
-            f"{settings.API_ENDPOINTS['base_url']}/external-services/api/v1/homework-responses/",
-            timeout=10,
-            headers=headers,
-        )
-        response.raise_for_status()
-
-        data = response.json()
-        homework_responses = data.get("results", [])
+        homework_responses = [
+            response
+            async for response in async_lms_client.iter_results(
+                "homework-responses/", headers=headers, max_items=max_items
+            )
+        ]
+        if max_items is None:
+            entity_store.replace("homework-responses", homework_responses)
+        else:
+            entity_store.upsert("homework-responses", homework_responses)
 
         return AgentResponse(
             success=True,
-            data=homework_responses,
+            data=project_records(homework_responses, "homework-responses", fields),
             metadata={
                 "total_homeworks_responses": len(homework_responses),
+                "summary": summarize_records(homework_responses, "homework-responses"),
                 "timestamp": time.time(),
             },
         )
-    except requests.RequestException as e:
+    except httpx.HTTPError as e:
         logger.error(f"Failed to fetch homework responses: {e}")
         return AgentResponse(
             success=False, error=f"Failed to fetch homework responses: {str(e)}"
         )
 
 
-@function_tool
 @retry_on_failure(max_retries=3)
-def get_all_homework_responses_by_homework(homework_id: str) -> AgentResponse:
+async def aget_all_homework_responses_by_homework(
+    homework_id: str, fields: Optional[List[str]] = None
+) -> AgentResponse:
     """Get a list of all homeworks responses for a specific homework. The homework id as a query parameter in the request is required. Use this tool in case you need to find all homeworks responses for a specific homework.  In case you could not find a homework with that homework id, respond back to the user that the homework is not found. Returns standardized response format.
 
 
     Args:
         homework_id (str): The id of the homework (must be non-empty).
+        fields (list[str], optional): Fields to return per record, or ["*"] for full records. A compact default set is returned when omitted.
     """
 
-    token_response = auth_agent.authenticate_user()
+    homework_responses_by_homework = entity_store.filter(
+        "homework-responses", homework=homework_id
+    )
+    if homework_responses_by_homework is not None:
+        return AgentResponse(
+            success=True,
+            data=project_records(
+                homework_responses_by_homework, "homework-responses", fields
+            ),
+            metadata={
+                "total_homework_responses": len(homework_responses_by_homework),
+                "summary": summarize_records(
+                    homework_responses_by_homework, "homework-responses"
+                ),
+                "timestamp": time.time(),
+            },
+        )
+
+    token_response = await auth_tools.authenticate_user_async()
     if not token_response.success:
         return AgentResponse(
             success=False, error="Authentication failed: " + token_response.error
@@ -117,26 +185,32 @@ def get_all_homework_responses_by_homework(homework_id: str) -> AgentResponse:
     headers = {"Authorization": f"Bearer {access_token}"}
 
     try:
-        response = requests.get(
-            f"{settings.API_ENDPOINTS['base_url']}/external-services/api/v1/homework-responses/",
-            timeout=10,
-            params={"homework": homework_id},
-            headers=headers,
+        homework_responses_by_homework = [
+            record
+            async for record in async_lms_client.iter_results(
+                "homework-responses/", params={"homework": homework_id}, headers=headers
+            )
+        ]
+        entity_store.replace(
+            "homework-responses",
+            homework_responses_by_homework,
+            scope=("homework", homework_id),
         )
-        response.raise_for_status()
-
-        data = response.json()
-        homework_responses_by_homework = data.get("results", [])
 
         return AgentResponse(
             success=True,
-            data=homework_responses_by_homework,
+            data=project_records(
+                homework_responses_by_homework, "homework-responses", fields
+            ),
             metadata={
                 "total_homework_responses": len(homework_responses_by_homework),
+                "summary": summarize_records(
+                    homework_responses_by_homework, "homework-responses"
+                ),
                 "timestamp": time.time(),
             },
         )
-    except requests.RequestException as e:
+    except httpx.HTTPError as e:
         logger.error(f"Failed to fetch homework responses by homework: {e}")
         return AgentResponse(
             success=False,
@@ -144,17 +218,31 @@ def get_all_homework_responses_by_homework(homework_id: str) -> AgentResponse:
         )
 
 
-@function_tool
 @retry_on_failure(max_retries=3)
-def get_homeworks_by_lesson(lesson_id: str) -> AgentResponse:
+async def aget_homeworks_by_lesson(
+    lesson_id: str, fields: Optional[List[str]] = None
+) -> AgentResponse:
     """Get a list of all homeworks for a specific lesson. The lesson id as a query parameter in the request is required. Use this tool in case you need to find all homeworks  for a specific lesson.  In case you could not find a lesson with that lesson id, respond back to the user that the lesson is not found. Returns standardized response format.
 
 
     Args:
         lesson_id (str): The id of the lesson (must be non-empty).
+        fields (list[str], optional): Fields to return per record, or ["*"] for full records. A compact default set is returned when omitted.
     """
 
-    token_response = auth_agent.authenticate_user()
+    homeworks_by_lesson = entity_store.filter("homeworks", lesson=lesson_id)
+    if homeworks_by_lesson is not None:
+        return AgentResponse(
+            success=True,
+            data=project_records(homeworks_by_lesson, "homeworks", fields),
+            metadata={
+                "total_homeworks": len(homeworks_by_lesson),
+                "summary": summarize_records(homeworks_by_lesson, "homeworks"),
+                "timestamp": time.time(),
+            },
+        )
+
+    token_response = await auth_tools.authenticate_user_async()
     if not token_response.success:
         return AgentResponse(
             success=False, error="Authentication failed: " + token_response.error
@@ -164,26 +252,26 @@ def get_homeworks_by_lesson(lesson_id: str) -> AgentResponse:
     headers = {"Authorization": f"Bearer {access_token}"}
 
     try:
-        response = requests.get(
-            f"{settings.API_ENDPOINTS['base_url']}/external-services/api/v1/homeworks/",
-            timeout=10,
-            params={"lesson": lesson_id},
-            headers=headers,
+        homeworks_by_lesson = [
+            record
+            async for record in async_lms_client.iter_results(
+                "homeworks/", params={"lesson": lesson_id}, headers=headers
+            )
+        ]
+        entity_store.replace(
+            "homeworks", homeworks_by_lesson, scope=("lesson", lesson_id)
         )
-        response.raise_for_status()
-
-        data = response.json()
-        homeworks_by_lesson = data.get("results", [])
 
         return AgentResponse(
             success=True,
-            data=homeworks_by_lesson,
+            data=project_records(homeworks_by_lesson, "homeworks", fields),
             metadata={
                 "total_homeworks": len(homeworks_by_lesson),
+                "summary": summarize_records(homeworks_by_lesson, "homeworks"),
                 "timestamp": time.time(),
             },
         )
-    except requests.RequestException as e:
+    except httpx.HTTPError as e:
         logger.error(f"Failed to fetch homeworks by lesson: {e}")
         return AgentResponse(
             success=False,
@@ -191,17 +279,39 @@ def get_homeworks_by_lesson(lesson_id: str) -> AgentResponse:
         )
 
 
-@function_tool
 @retry_on_failure(max_retries=3)
-def get_homeworks_responses_by_user(student_id: str) -> AgentResponse:
+async def aget_homeworks_responses_by_user(
+    student_id: str, fields: Optional[List[str]] = None
+) -> AgentResponse:
     """Get a list of all homeworks responses for a specific student. The student id as a query parameter in the request is required. Use this tool in case you need to find all homeworks responses for a specific student.  In case you could not find a student with that student id, respond back to the user that the student is not found. Returns standardized response format.
 
 
     Args:
         student_id (str): The id of the student (must be non-empty).
+        fields (list[str], optional): Fields to return per record, or ["*"] for full records. A compact default set is returned when omitted.
     """
 
-    token_response = auth_agent.authenticate_user()
+    homework_responses_by_student = entity_store.filter(
+        "homework-responses", user=student_id
+    )
+    if homework_responses_by_student is not None:
+        return AgentResponse(
+            success=True,
+            data=project_records(
+                homework_responses_by_student, "homework-responses", fields
+            ),
+            metadata={
+                "total_homework_responses_by_student": len(
+                    homework_responses_by_student
+                ),
+                "summary": summarize_records(
+                    homework_responses_by_student, "homework-responses"
+                ),
+                "timestamp": time.time(),
+            },
+        )
+
+    token_response = await auth_tools.authenticate_user_async()
     if not token_response.success:
         return AgentResponse(
             success=False, error="Authentication failed: " + token_response.error
@@ -211,30 +321,110 @@ def get_homeworks_responses_by_user(student_id: str) -> AgentResponse:
     headers = {"Authorization": f"Bearer {access_token}"}
 
     try:
-        response = requests.get(
-            f"{settings.API_ENDPOINTS['base_url']}/external-services/api/v1/homework-responses/",
-            timeout=10,
-            params={"user": student_id},
-            headers=headers,
+        homework_responses_by_student = [
+            record
+            async for record in async_lms_client.iter_results(
+                "homework-responses/", params={"user": student_id}, headers=headers
+            )
+        ]
+        entity_store.replace(
+            "homework-responses",
+            homework_responses_by_student,
+            scope=("user", student_id),
         )
-        response.raise_for_status()
-
-        data = response.json()
-        homework_responses_by_student = data.get("results", [])
 
         return AgentResponse(
             success=True,
-            data=homework_responses_by_student,
+            data=project_records(
+                homework_responses_by_student, "homework-responses", fields
+            ),
             metadata={
                 "total_homework_responses_by_student": len(
                     homework_responses_by_student
                 ),
+                "summary": summarize_records(
+                    homework_responses_by_student, "homework-responses"
+                ),
                 "timestamp": time.time(),
             },
         )
-    except requests.RequestException as e:
+    except httpx.HTTPError as e:
         logger.error(f"Failed to fetch homework responses by student: {e}")
         return AgentResponse(
             success=False,
             error=f"Failed to fetch homework responses by student: {str(e)}",
         )
+
+
+async def _afetch_user_responses(
+    student_id: str, headers: Dict[str, str]
+) -> List[dict]:
+    records = [
+        record
+        async for record in async_lms_client.iter_results(
+            "homework-responses/", params={"user": student_id}, headers=headers
+        )
+    ]
+    entity_store.replace("homework-responses", records, scope=("user", student_id))
+    return records
+
+
+@retry_on_failure(max_retries=3)
+async def aget_homeworks_responses_by_users(
+    student_ids: List[str], fields: Optional[List[str]] = None
+) -> AgentResponse:
+    """Get the homework responses of several students in one call. Use this instead of calling the homework responses by user tool once per student, e.g. when comparing students or a whole class. Duplicate ids are ignored. Returns standardized response format with the homework responses keyed by student id.
+
+
+    Args:
+        student_ids (list[str]): The ids of the students (at least one).
+        fields (list[str], optional): Fields to return per record, or ["*"] for full records. A compact default set is returned when omitted.
+    """
+
+    ids = unique_ids(student_ids)
+    invalid = check_ids(ids, "student")
+    if invalid:
+        return invalid
+
+    records, missing = split_hits(
+        ids,
+        lambda student_id: entity_store.filter("homework-responses", user=student_id),
+    )
+    errors = {}
+    if missing:
+        token_response = await auth_tools.authenticate_user_async()
+        if not token_response.success:
+            return AgentResponse(
+                success=False, error="Authentication failed: " + token_response.error
+            )
+
+        access_token = token_response.data.get("access")
+        headers = {"Authorization": f"Bearer {access_token}"}
+        fetched, errors = await afetch_many(
+            missing, lambda student_id: _afetch_user_responses(student_id, headers)
+        )
+        records.update(fetched)
+
+    return batch_response(ids, records, errors, "homework-responses", fields)
+
+
+# Tools registered by the Homeworks Agent
+get_all_homeworks_async = function_tool(
+    aget_all_homeworks, name_override="get_all_homeworks"
+)
+get_all_homework_responses_async = function_tool(
+    aget_all_homework_responses, name_override="get_all_homework_responses"
+)
+get_all_homework_responses_by_homework_async = function_tool(
+    aget_all_homework_responses_by_homework,
+    name_override="get_all_homework_responses_by_homework",
+)
+get_homeworks_by_lesson_async = function_tool(
+    aget_homeworks_by_lesson, name_override="get_homeworks_by_lesson"
+)
+get_homeworks_responses_by_user_async = function_tool(
+    aget_homeworks_responses_by_user, name_override="get_homeworks_responses_by_user"
+)
+get_homeworks_responses_by_users_async = function_tool(
+    aget_homeworks_responses_by_users, name_override="get_homeworks_responses_by_users"
+)
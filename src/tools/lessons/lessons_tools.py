@@ -1,9 +1,12 @@
 from agents import function_tool
-import requests
-from src.config.settings import settings
+import httpx
 import logging
-from src.lms_agents.auth import auth_agent
+from typing import List, Optional
+from src.tools.auth import auth_tools
 from src.utils.utils import retry_on_failure
+from src.utils.lms_client import async_lms_client
+from src.store.entity_store import entity_store
+from src.utils.projection import project_records, summarize_records
 import time
 from src.lms_agents.base_agent import AgentResponse
 
@@ -11,11 +14,32 @@ from src.lms_agents.base_agent import AgentResponse
 logger = logging.getLogger(__name__)
 
 
-@function_tool
 @retry_on_failure(max_retries=3)
-def get_all_lessons() -> AgentResponse:
+async def aget_all_lessons(
+    max_items: Optional[int] = None, fields: Optional[List[str]] = None
+) -> AgentResponse:
+    """
+    Get a list of all available lessons with improved error handling. Using this tool all lessons details like name, description, course, teacher, etc is available.
+    Returns standardized response format.
+
+    Args:
+        max_items (int, optional): Maximum number of lessons to return. All pages are fetched when omitted.
+        fields (list[str], optional): Fields to return per record, or ["*"] for full records. A compact default set is returned when omitted.
+    """
+    lessons = entity_store.all("lessons")
+    if lessons is not None:
+        lessons = lessons[:max_items]
+        return AgentResponse(
+            success=True,
+            data=project_records(lessons, "lessons", fields),
+            metadata={
+                "total_lessons": len(lessons),
+                "summary": summarize_records(lessons, "lessons"),
+                "timestamp": time.time(),
+            },
+        )
 
-    token_response = auth_agent.authenticate_user()
+    token_response = await auth_tools.authenticate_user_async()
     if not token_response.success:
         return AgentResponse(
             success=False, error="Authentication failed: " + token_response.error
@@ -24,43 +48,57 @@ def get_all_lessons() -> AgentResponse:
     access_token = token_response.data.get("access")
     headers = {"Authorization": f"Bearer {access_token}"}
 
-    """
-    Get a list of all available lessons with improved error handling. Using this tool all lessons details like name, description, course, teacher, etc is available. 
-    Returns standardized response format.
-    """
-
     try:
-        response = requests.get(
-            f"{settings.API_ENDPOINTS['base_url']}/external-services/api/v1/lessons/",
-            timeout=10,
-            headers=headers,
-        )
-        response.raise_for_status()
-
-        data = response.json()
-        lessons = data.get("results", [])
+        lessons = [
+            lesson
+            async for lesson in async_lms_client.iter_results(
+                "lessons/", headers=headers, max_items=max_items
+            )
+        ]
+        if max_items is None:
+            entity_store.replace("lessons", lessons)
+        else:
+            entity_store.upsert("lessons", lessons)
 
         return AgentResponse(
             success=True,
-            data=lessons,
-            metadata={"total_lessons": len(lessons), "timestamp": time.time()},
+            data=project_records(lessons, "lessons", fields),
+            metadata={
+                "total_lessons": len(lessons),
+                "summary": summarize_records(lessons, "lessons"),
+                "timestamp": time.time(),
+            },
         )
-    except requests.RequestException as e:
+    except httpx.HTTPError as e:
         logger.error(f"Failed to fetch lessons: {e}")
         return AgentResponse(success=False, error=f"Failed to fetch lessons: {str(e)}")
 
 
-@function_tool
 @retry_on_failure(max_retries=3)
-def get_lessons_by_course(course_id: str) -> AgentResponse:
+async def aget_lessons_by_course(
+    course_id: str, fields: Optional[List[str]] = None
+) -> AgentResponse:
     """Get lessons of a course by course id. The course id as a query parameter in the request is required. Use this tool in case you need to find a specific course lessons. In case the user adds course name in the question, use the all courses tool to get the course id and pass it to this tool. In case you could not find the course id, respond back to the user that the course is not found. Returns standardized response format.
 
 
     Args:
         course_id (str): The id of the course (must be non-empty).
+        fields (list[str], optional): Fields to return per record, or ["*"] for full records. A compact default set is returned when omitted.
     """
 
-    token_response = auth_agent.authenticate_user()
+    course_lessons = entity_store.filter("lessons", course=course_id)
+    if course_lessons is not None:
+        return AgentResponse(
+            success=True,
+            data=project_records(course_lessons, "lessons", fields),
+            metadata={
+                "course_lessons_length": len(course_lessons),
+                "summary": summarize_records(course_lessons, "lessons"),
+                "timestamp": time.time(),
+            },
+        )
+
+    token_response = await auth_tools.authenticate_user_async()
     if not token_response.success:
         return AgentResponse(
             success=False, error="Authentication failed: " + token_response.error
@@ -70,27 +108,32 @@ def get_lessons_by_course(course_id: str) -> AgentResponse:
     headers = {"Authorization": f"Bearer {access_token}"}
 
     try:
-        response = requests.get(
-            f"{settings.API_ENDPOINTS['base_url']}/external-services/api/v1/lessons/",
-            timeout=10,
-            params={"course": course_id},
-            headers=headers,
-        )
-        response.raise_for_status()
-
-        data = response.json()
-        course_lessons = data.get("results", [])
+        course_lessons = [
+            lesson
+            async for lesson in async_lms_client.iter_results(
+                "lessons/", params={"course": course_id}, headers=headers
+            )
+        ]
+        entity_store.replace("lessons", course_lessons, scope=("course", course_id))
 
         return AgentResponse(
             success=True,
-            data=course_lessons,
+            data=project_records(course_lessons, "lessons", fields),
             metadata={
                 "course_lessons_length": len(course_lessons),
+                "summary": summarize_records(course_lessons, "lessons"),
                 "timestamp": time.time(),
             },
         )
-    except requests.RequestException as e:
+    except httpx.HTTPError as e:
         logger.error(f"Failed to fetch course lessons: {e}")
         return AgentResponse(
             success=False, error=f"Failed to fetch course lessons: {str(e)}"
         )
+
+
+# Tools registered by the Lessons Agent
+get_all_lessons_async = function_tool(aget_all_lessons, name_override="get_all_lessons")
+get_lessons_by_course_async = function_tool(
+    aget_lessons_by_course, name_override="get_lessons_by_course"
+)
@@ -1,9 +1,19 @@
 from agents import function_tool
-import requests
-from src.config.settings import settings
+import httpx
 import logging
-from src.lms_agents.auth import auth_agent
+from typing import Any, Dict, List, Optional
+from src.tools.auth import auth_tools
 from src.utils.utils import retry_on_failure
+from src.utils.lms_client import async_lms_client
+from src.utils.batch import (
+    afetch_many,
+    batch_response,
+    check_ids,
+    split_hits,
+    unique_ids,
+)
+from src.store.entity_store import entity_store
+from src.utils.projection import project_record, project_records, summarize_records
 import time
 from src.lms_agents.base_agent import AgentResponse
 
@@ -11,10 +21,32 @@ from src.lms_agents.base_agent import AgentResponse
 logger = logging.getLogger(__name__)
 
 
-@function_tool
 @retry_on_failure(max_retries=3)
-def get_all_students() -> AgentResponse:
-    token_response = auth_agent.authenticate_user()
+async def aget_all_students(
+    max_items: Optional[int] = None, fields: Optional[List[str]] = None
+) -> AgentResponse:
+    """
+    Get a list of all available students with improved error handling. Using this tool all students details like name, phone number, contact details (email, address), job information, etc is available.
+    Returns standardized response format.
+
+    Args:
+        max_items (int, optional): Maximum number of students to return. All pages are fetched when omitted.
+        fields (list[str], optional): Fields to return per record, or ["*"] for full records. A compact default set is returned when omitted.
+    """
+    students = entity_store.all("students")
+    if students is not None:
+        students = students[:max_items]
+        return AgentResponse(
+            success=True,
+            data=project_records(students, "students", fields),
+            metadata={
+                "total_students": len(students),
+                "summary": summarize_records(students, "students"),
+                "timestamp": time.time(),
+            },
+        )
+
+    token_response = await auth_tools.authenticate_user_async()
     if not token_response.success:
         return AgentResponse(
             success=False, error="Authentication failed: " + token_response.error
@@ -22,43 +54,54 @@ def get_all_students() -> AgentResponse:
 
     access_token = token_response.data.get("access")
     headers = {"Authorization": f"Bearer {access_token}"}
-    """
-    Get a list of all available students with improved error handling. Using this tool all students details like name, phone number, contact details (email, address), job information, etc is available. 
-    Returns standardized response format.
-    """
 
     try:
-        response = requests.get(
-            f"{settings.API_ENDPOINTS['base_url']}/external-services/api/v1/students/",
-            timeout=10,
-            headers=headers,
-        )
-        response.raise_for_status()
-
-        data = response.json()
-        students = data.get("results", [])
+        students = [
+            student
+            async for student in async_lms_client.iter_results(
+                "students/", headers=headers, max_items=max_items
+            )
+        ]
+        if max_items is None:
+            entity_store.replace("students", students)
+        else:
+            entity_store.upsert("students", students)
 
         return AgentResponse(
             success=True,
-            data=students,
-            metadata={"total_students": len(students), "timestamp": time.time()},
+            data=project_records(students, "students", fields),
+            metadata={
+                "total_students": len(students),
+                "summary": summarize_records(students, "students"),
+                "timestamp": time.time(),
+            },
         )
-    except requests.RequestException as e:
+    except httpx.HTTPError as e:
         logger.error(f"Failed to fetch students: {e}")
         return AgentResponse(success=False, error=f"Failed to fetch students: {str(e)}")
 
 
-@function_tool
 @retry_on_failure(max_retries=3)
-def get_student_by_id(student_id: str) -> AgentResponse:
+async def aget_student_by_id(
+    student_id: str, fields: Optional[List[str]] = None
+) -> AgentResponse:
     """Get a student by id. The student id as a query parameter in the request is required. Use this tool in case you need to find a specific student. In case the user ask for the user name to the question, use the all students tool to get the student id and pass it to this tool. In case you could not find the student id, respond back to the user that the student is not found. Returns standardized response format.
 
 
     Args:
         student_id (str): The id of the student (must be non-empty).
+        fields (list[str], optional): Fields to return per record, or ["*"] for full records. A compact default set is returned when omitted.
     """
 
-    token_response = auth_agent.authenticate_user()
+    student = entity_store.get("students", student_id)
+    if student is not None:
+        return AgentResponse(
+            success=True,
+            data=project_record(student, "students", fields),
+            metadata={"timestamp": time.time()},
+        )
+
+    token_response = await auth_tools.authenticate_user_async()
     if not token_response.success:
         return AgentResponse(
             success=False, error="Authentication failed: " + token_response.error
@@ -67,37 +110,48 @@ def get_student_by_id(student_id: str) -> AgentResponse:
     access_token = token_response.data.get("access")
     headers = {"Authorization": f"Bearer {access_token}"}
     try:
-        response = requests.get(
-            f"{settings.API_ENDPOINTS['base_url']}/external-services/api/v1/students/{student_id}",
-            timeout=10,
-            headers=headers,
+        data = await async_lms_client.get_json(
+            f"students/{student_id}", headers=headers
         )
-        response.raise_for_status()
-
-        data = response.json()
-        student = data.get("results", [])
+        student = data.get("results", data)
+        if isinstance(student, dict):
+            entity_store.upsert("students", [student])
 
         return AgentResponse(
             success=True,
-            data=student,
-            metadata={"student": student, "timestamp": time.time()},
+            data=project_record(student, "students", fields),
+            metadata={"timestamp": time.time()},
         )
-    except requests.RequestException as e:
+    except httpx.HTTPError as e:
         logger.error(f"Failed to fetch student: {e}")
         return AgentResponse(success=False, error=f"Failed to fetch student: {str(e)}")
 
 
-@function_tool
 @retry_on_failure(max_retries=3)
-def get_student_by_name(student_name: str) -> AgentResponse:
+async def aget_student_by_name(
+    student_name: str, fields: Optional[List[str]] = None
+) -> AgentResponse:
     """Get a student by name. The student name as a query parameter in the request is required. Use this tool in case you need to find a specific student by name.  In case you could not find a student with that student name, respond back to the user that the student is not found. Returns standardized response format.
 
 
     Args:
         student_name (str): The name of the student (must be non-empty).
+        fields (list[str], optional): Fields to return per record, or ["*"] for full records. A compact default set is returned when omitted.
     """
 
-    token_response = auth_agent.authenticate_user()
+    student = entity_store.search("students", student_name)
+    if student is not None:
+        return AgentResponse(
+            success=True,
+            data=project_records(student, "students", fields),
+            metadata={
+                "total_students": len(student),
+                "summary": summarize_records(student, "students"),
+                "timestamp": time.time(),
+            },
+        )
+
+    token_response = await auth_tools.authenticate_user_async()
     if not token_response.success:
         return AgentResponse(
             success=False, error="Authentication failed: " + token_response.error
@@ -106,22 +160,84 @@ def get_student_by_name(student_name: str) -> AgentResponse:
     access_token = token_response.data.get("access")
     headers = {"Authorization": f"Bearer {access_token}"}
     try:
-        response = requests.get(
-            f"{settings.API_ENDPOINTS['base_url']}/external-services/api/v1/students/",
-            timeout=10,
-            params={"search": student_name},
-            headers=headers,
-        )
-        response.raise_for_status()
-
-        data = response.json()
-        student = data.get("results", [])
+        student = [
+            record
+            async for record in async_lms_client.iter_results(
+                "students/", params={"search": student_name}, headers=headers
+            )
+        ]
+        entity_store.upsert("students", student)
 
         return AgentResponse(
             success=True,
-            data=student,
-            metadata={"student": student, "timestamp": time.time()},
+            data=project_records(student, "students", fields),
+            metadata={
+                "total_students": len(student),
+                "summary": summarize_records(student, "students"),
+                "timestamp": time.time(),
+            },
         )
-    except requests.RequestException as e:
+    except httpx.HTTPError as e:
         logger.error(f"Failed to fetch student: {e}")
         return AgentResponse(success=False, error=f"Failed to fetch student: {str(e)}")
+
+
+async def _afetch_student(student_id: str, headers: Dict[str, str]) -> Any:
+    data = await async_lms_client.get_json(f"students/{student_id}", headers=headers)
+    student = data.get("results", data)
+    if isinstance(student, dict):
+        entity_store.upsert("students", [student])
+    return student
+
+
+@retry_on_failure(max_retries=3)
+async def aget_students_by_ids(
+    student_ids: List[str], fields: Optional[List[str]] = None
+) -> AgentResponse:
+    """Get several students by id in one call. Use this instead of calling the student by id tool once per student, e.g. when the user asks about a group of students. Duplicate ids are ignored. Returns standardized response format with the students keyed by id; ids that do not exist are listed under metadata.not_found.
+
+
+    Args:
+        student_ids (list[str]): The ids of the students (at least one).
+        fields (list[str], optional): Fields to return per record, or ["*"] for full records. A compact default set is returned when omitted.
+    """
+
+    ids = unique_ids(student_ids)
+    invalid = check_ids(ids, "student")
+    if invalid:
+        return invalid
+
+    students, missing = split_hits(
+        ids, lambda student_id: entity_store.get("students", student_id)
+    )
+    errors = {}
+    if missing:
+        token_response = await auth_tools.authenticate_user_async()
+        if not token_response.success:
+            return AgentResponse(
+                success=False, error="Authentication failed: " + token_response.error
+            )
+
+        access_token = token_response.data.get("access")
+        headers = {"Authorization": f"Bearer {access_token}"}
+        fetched, errors = await afetch_many(
+            missing, lambda student_id: _afetch_student(student_id, headers)
+        )
+        students.update(fetched)
+
+    return batch_response(ids, students, errors, "students", fields)
+
+
+# Tools registered by the Students Agent
+get_all_students_async = function_tool(
+    aget_all_students, name_override="get_all_students"
+)
+get_student_by_id_async = function_tool(
+    aget_student_by_id, name_override="get_student_by_id"
+)
+get_student_by_name_async = function_tool(
+    aget_student_by_name, name_override="get_student_by_name"
+)
+get_students_by_ids_async = function_tool(
+    aget_students_by_ids, name_override="get_students_by_ids"
+)
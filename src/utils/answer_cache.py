@@ -0,0 +1,329 @@
+"""Semantic cache of final answers, matched by near-duplicate questions."""
+
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
+import logging
+import math
+import random
+import re
+import threading
+import time
+import zlib
+
+from src.config.settings import settings
+from src.utils.text import normalize_text
+
+logger = logging.getLogger(__name__)
+
+SparseVector = Dict[int, float]
+
+# Question words and politeness that do not change what is asked; dropped
+# before embedding so "نمرات من چیه" and "نمرات من چیست" embed alike
+FILLER_WORDS = frozenset(
+    (
+        "a an the is are was were what s of please show tell give list me us can "
+        "could you i see there "
+        "چیه چیست چی چه است هست هستن هستند میباشد را رو لطفا بگو بگید بده بدید "
+        "نشون نشان لیست"
+    ).split()
+)
+
+# Words that negate a question
+NEGATION_WORDS = frozenset(
+    (
+        "not no never none nobody nothing neither nor without cannot dont doesnt "
+        "didnt isnt arent wasnt werent havent hasnt hadnt wont cant couldnt "
+        "shouldnt wouldnt "
+        "نه هیچ بدون نمی"
+    ).split()
+)
+
+# Persian verb stems; ن- in front of one negates the verb ("نکرده", "نداده")
+NEGATED_STEMS = tuple(
+    (
+        "کرد کن داد ده دار داشت فرست شد شو گرفت گیر بود خواند خوان خوند خون خواه "
+        "خواست دید بین رفت رو نوشت نویس گذر گذاشت یامد یومد یاد یست می باید تونس "
+        "توان"
+    ).split()
+)
+
+# Words that start like a negated verb but are not one
+NOT_NEGATED = frozenset({"نشون", "نشان", "نشانی"})
+
+# Spelled out before normalizing so "hasn't" negates like "has not"
+CONTRACTIONS = (
+    (re.compile(r"\bcan['’]t\b", re.IGNORECASE), "can not"),
+    (re.compile(r"\bwon['’]t\b", re.IGNORECASE), "will not"),
+    (re.compile(r"n['’]t\b", re.IGNORECASE), " not"),
+)
+
+
+class HashingVectorizer:
+    """
+    Embed text as a sparse, L2-normalized vector of hashed features.
+
+    Features are the normalized words, word bigrams and character trigrams
+    of each word; the trigrams let inflected Persian forms ("نمرات",
+    "نمره") and typos land close to each other. Hashing needs no
+    vocabulary, so every worker process embeds the same text identically.
+    """
+
+    def __init__(self, dim: int = 4096, char_weight: float = 0.5):
+        self.dim = dim
+        self.char_weight = char_weight
+
+    def _add(self, vector: SparseVector, feature: str, weight: float) -> None:
+        h = zlib.crc32(feature.encode("utf-8"))
+        index = h % self.dim
+        vector[index] = vector.get(index, 0.0) + (weight if h >> 31 else -weight)
+
+    def embed(self, words: List[str]) -> SparseVector:
+        vector: SparseVector = {}
+        for word in words:
+            self._add(vector, f"w:{word}", 1.0)
+            padded = f"<{word}>"
+            for i in range(len(padded) - 2):
+                self._add(vector, f"c:{padded[i:i + 3]}", self.char_weight)
+        for first, second in zip(words, words[1:]):
+            self._add(vector, f"b:{first} {second}", 1.0)
+
+        norm = math.sqrt(sum(v * v for v in vector.values()))
+        return {i: v / norm for i, v in vector.items() if v} if norm else {}
+
+
+def is_negation(word: str) -> bool:
+    """Whether a normalized word negates, e.g. "not", "never", "نکرده"."""
+    if word in NEGATION_WORDS:
+        return True
+    return (
+        word.startswith("ن")
+        and word not in NOT_NEGATED
+        and word[1:].startswith(NEGATED_STEMS)
+    )
+
+
+def cosine(a: SparseVector, b: SparseVector) -> float:
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(v * b.get(i, 0.0) for i, v in a.items())
+
+
+class LSHIndex:
+    """
+    Approximate nearest-neighbour index using random-hyperplane LSH.
+
+    Each of ``tables`` hash tables buckets a vector by the signs of its
+    projections on ``bits`` random hyperplanes; vectors with a high cosine
+    similarity share a bucket in at least one table with high probability.
+    """
+
+    def __init__(self, tables: int = 8, bits: int = 12, seed: int = 7):
+        self.tables = tables
+        self.bits = bits
+        self.seed = seed
+        # Hyperplane signs per feature index, one bit per plane, made on demand
+        self._signs: Dict[int, int] = {}
+        self._buckets: List[Dict[int, Set[str]]] = [
+            defaultdict(set) for _ in range(tables)
+        ]
+
+    def _plane_signs(self, index: int) -> int:
+        signs = self._signs.get(index)
+        if signs is None:
+            rng = random.Random(self.seed * 1_000_003 + index)
+            signs = self._signs[index] = rng.getrandbits(self.tables * self.bits)
+        return signs
+
+    def _signatures(self, vector: SparseVector) -> List[int]:
+        projections = [0.0] * (self.tables * self.bits)
+        for index, value in vector.items():
+            signs = self._plane_signs(index)
+            for plane in range(len(projections)):
+                projections[plane] += value if signs >> plane & 1 else -value
+
+        signatures = []
+        for table in range(self.tables):
+            signature = 0
+            for bit in range(self.bits):
+                if projections[table * self.bits + bit] >= 0:
+                    signature |= 1 << bit
+            signatures.append(signature)
+        return signatures
+
+    def add(self, key: str, vector: SparseVector) -> List[int]:
+        signatures = self._signatures(vector)
+        for buckets, signature in zip(self._buckets, signatures):
+            buckets[signature].add(key)
+        return signatures
+
+    def remove(self, key: str, signatures: List[int]) -> None:
+        for buckets, signature in zip(self._buckets, signatures):
+            bucket = buckets.get(signature)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del buckets[signature]
+
+    def candidates(self, vector: SparseVector) -> Set[str]:
+        found: Set[str] = set()
+        for buckets, signature in zip(self._buckets, self._signatures(vector)):
+            found |= buckets.get(signature, set())
+        return found
+
+    def clear(self) -> None:
+        for buckets in self._buckets:
+            buckets.clear()
+
+
+@dataclass
+class CachedAnswer:
+    scope: str
+    text: str
+    vector: SparseVector
+    numbers: FrozenSet[str]
+    negations: int
+    answer: str
+    created_at: float = field(default_factory=time.time)
+    signatures: List[int] = field(default_factory=list)
+
+
+class AnswerCache:
+    """
+    Final answers keyed by user scope and question, matched semantically.
+
+    A question hits when an earlier one from the same scope is at least
+    ``threshold`` cosine-similar, mentions exactly the same numbers (ids
+    and years change the answer even when the wording does not) and has as
+    many negations ("who has not submitted" is a different question). Any
+    change to the LMS data bumps ``version`` and empties the cache, and
+    answers produced against an older version are not stored.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.9,
+        ttl: float = 300,
+        max_entries: int = 2000,
+        enabled: bool = True,
+        dim: int = 4096,
+    ):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self.version = 0
+        self.vectorizer = HashingVectorizer(dim)
+        self.index = LSHIndex()
+        self._entries: "OrderedDict[str, CachedAnswer]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls) -> "AnswerCache":
+        enabled = settings.ANSWER_CACHE_ENABLED
+        if enabled and not settings.SYNC_ENABLED:
+            # Only the sync notices LMS changes and drops the stale answers
+            logger.info("Answer cache disabled: it needs SYNC_ENABLED")
+            enabled = False
+        return cls(
+            threshold=settings.ANSWER_CACHE_THRESHOLD,
+            ttl=settings.ANSWER_CACHE_TTL,
+            max_entries=settings.ANSWER_CACHE_MAX_ENTRIES,
+            enabled=enabled,
+        )
+
+    def _prepare(self, question: str) -> Tuple[str, SparseVector, FrozenSet[str], int]:
+        for pattern, replacement in CONTRACTIONS:
+            question = pattern.sub(replacement, question)
+        text = normalize_text(question)
+        words = text.split()
+        numbers = frozenset(w for w in words if w.isdigit())
+        negations = sum(is_negation(w) for w in words)
+        # "no", "never" and "cannot" embed like "not"
+        content = [
+            "not" if w in NEGATION_WORDS else w for w in words if w not in FILLER_WORDS
+        ]
+        return text, self.vectorizer.embed(content or words), numbers, negations
+
+    @staticmethod
+    def _key(scope: str, text: str) -> str:
+        return f"{scope}\0{text}"
+
+    def _drop(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.index.remove(key, entry.signatures)
+
+    def get(self, question: str, scope: str = "") -> Optional[str]:
+        """Return the answer to a near-identical earlier question, or None."""
+        if not self.enabled:
+            return None
+        text, vector, numbers, negations = self._prepare(question)
+        if not vector:
+            return None
+
+        now = time.time()
+        with self._lock:
+            key = self._key(scope, text)
+            candidates = (
+                {key} if key in self._entries else self.index.candidates(vector)
+            )
+            best, best_score = None, self.threshold
+            for candidate in candidates:
+                entry = self._entries.get(candidate)
+                if (
+                    entry is None
+                    or entry.scope != scope
+                    or entry.numbers != numbers
+                    or entry.negations != negations
+                ):
+                    continue
+                if now - entry.created_at > self.ttl:
+                    self._drop(candidate)
+                    continue
+                score = 1.0 if candidate == key else cosine(vector, entry.vector)
+                if score >= best_score:
+                    best, best_score = entry, score
+            if best is None:
+                return None
+            self._entries.move_to_end(self._key(scope, best.text))
+
+        logger.info(f"Answer cache hit ({best_score:.2f}) for {text!r}")
+        return best.answer
+
+    def put(
+        self, question: str, answer: str, scope: str = "", version: Optional[int] = None
+    ) -> None:
+        """
+        Store an answer; ``version`` is ``self.version`` read before answering.
+
+        Answers computed while the data changed underneath are dropped.
+        """
+        if not self.enabled or not answer:
+            return
+        text, vector, numbers, negations = self._prepare(question)
+        if not vector:
+            return
+
+        with self._lock:
+            if version is not None and version != self.version:
+                return
+            key = self._key(scope, text)
+            self._drop(key)
+            entry = CachedAnswer(scope, text, vector, numbers, negations, answer)
+            entry.signatures = self.index.add(key, vector)
+            self._entries[key] = entry
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+
+    def invalidate(self) -> None:
+        """Forget every answer after LMS data changed."""
+        with self._lock:
+            self.version += 1
+            self._entries.clear()
+            self.index.clear()
+        logger.info("Answer cache invalidated")
+
+
+# Process-wide answer cache used by the chat service
+answer_cache = AnswerCache.from_settings()
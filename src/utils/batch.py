@@ -0,0 +1,129 @@
+"""Helpers for tools that look up several ids in one call."""
+
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+import asyncio
+import time
+
+from src.config.settings import settings
+from src.lms_agents.base_agent import AgentResponse
+from src.utils.projection import project_record, project_records, summarize_records
+
+
+def unique_ids(ids: Iterable[Any]) -> List[str]:
+    """Return the ids as strings, without blanks and duplicates, in input order."""
+    seen = {}
+    for value in ids or ():
+        value = str(value).strip()
+        if value:
+            seen.setdefault(value, None)
+    return list(seen)
+
+
+def split_hits(
+    ids: List[str], lookup: Callable[[str], Any]
+) -> Tuple[Dict[str, Any], List[str]]:
+    """Split ``ids`` into those ``lookup`` answers and those it returns None for."""
+    hits, misses = {}, []
+    for id_ in ids:
+        value = lookup(id_)
+        if value is None:
+            misses.append(id_)
+        else:
+            hits[id_] = value
+    return hits, misses
+
+
+async def afetch_many(
+    ids: List[str],
+    fetch: Callable[[str], Awaitable[Any]],
+    limit: Optional[int] = None,
+) -> Tuple[Dict[str, Any], Dict[str, Exception]]:
+    """
+    Await ``fetch`` for every id, running at most ``limit`` fetches at once.
+
+    Returns the results and the errors, both keyed by id; one failing id
+    does not fail the others.
+    """
+    slots = asyncio.Semaphore(max(1, limit or settings.LMS_BATCH_CONCURRENCY))
+
+    async def run(id_: str) -> Any:
+        async with slots:
+            return await fetch(id_)
+
+    outcomes = await asyncio.gather(*(run(id_) for id_ in ids), return_exceptions=True)
+    results, errors = {}, {}
+    for id_, outcome in zip(ids, outcomes):
+        if isinstance(outcome, asyncio.CancelledError):
+            raise outcome
+        if isinstance(outcome, Exception):
+            errors[id_] = outcome
+        else:
+            results[id_] = outcome
+    return results, errors
+
+
+def check_ids(ids: List[str], label: str) -> Optional[AgentResponse]:
+    """Return an error response when a batch is empty or too large."""
+    if not ids:
+        return AgentResponse(success=False, error=f"No {label} ids given")
+    if len(ids) > settings.LMS_BATCH_MAX_IDS:
+        return AgentResponse(
+            success=False,
+            error=(
+                f"Too many {label} ids ({len(ids)}); "
+                f"ask for at most {settings.LMS_BATCH_MAX_IDS} at a time"
+            ),
+        )
+    return None
+
+
+def _status(error: Exception) -> Optional[int]:
+    return getattr(getattr(error, "response", None), "status_code", None)
+
+
+def batch_response(
+    ids: List[str],
+    found: Dict[str, Any],
+    errors: Dict[str, Exception],
+    resource: str,
+    fields: Optional[List[str]] = None,
+) -> AgentResponse:
+    """
+    Build one compact response for a batch, keyed by id in request order.
+
+    Values are a record, or a list of records projected and capped like the
+    single-id tools. Ids the API answered 404 for are listed as not found,
+    other failures with their error; the call only fails if every id did.
+    """
+    data, summary = {}, {}
+    for id_ in ids:
+        if id_ not in found:
+            continue
+        value = found[id_]
+        if isinstance(value, list):
+            data[id_] = project_records(value, resource, fields)
+            summary[id_] = summarize_records(value, resource)
+        else:
+            data[id_] = project_record(value, resource, fields)
+
+    not_found = [id_ for id_, e in errors.items() if _status(e) == 404]
+    failed = {id_: str(e) for id_, e in errors.items() if id_ not in not_found}
+    if failed and not data:
+        return AgentResponse(
+            success=False,
+            error=f"Failed to fetch {resource}: {next(iter(failed.values()))}",
+            metadata={"failed": failed, "not_found": not_found or None},
+        )
+
+    return AgentResponse(
+        success=True,
+        data=data,
+        metadata={
+            "requested": len(ids),
+            "found": len(data),
+            "not_found": not_found or None,
+            "failed": failed or None,
+            "summary": {k: v for k, v in summary.items() if v} or None,
+            "timestamp": time.time(),
+        },
+    )
@@ -0,0 +1,126 @@
+"""TTL response cache for LMS API responses on a pluggable backend."""
+
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+from urllib.parse import urlencode
+import logging
+import threading
+
+from src.config.settings import settings
+from src.utils.cache_backends import MISS, CacheBackend, create_backend
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CacheStats:
+    """Hit/miss counters, overall and per resource."""
+
+    hits: int = 0
+    misses: int = 0
+    by_resource: Dict[str, Dict[str, int]] = field(default_factory=dict)
+
+    def record(self, resource: str, outcome: str) -> None:
+        counters = self.by_resource.setdefault(resource, {"hits": 0, "misses": 0})
+        counters[outcome] += 1
+
+
+class ResponseCache:
+    """
+    Response cache with per-resource TTLs on top of a ``CacheBackend``.
+
+    Storage, expiry and LRU eviction are delegated to the backend, which may
+    be private to the process or shared between workers. Hit/miss counters
+    are kept per process. Cached values must be treated as read-only.
+    """
+
+    def __init__(
+        self,
+        backend: CacheBackend,
+        default_ttl: float,
+        ttls: Optional[Dict[str, float]] = None,
+    ):
+        self.backend = backend
+        self.default_ttl = default_ttl
+        self.ttls = dict(ttls or {})
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+        # Switched per tool invocation by BaseAgent according to its
+        # ``cache_enabled`` flag.
+        self.enabled: ContextVar[bool] = ContextVar(
+            "response_cache_enabled", default=settings.CACHE_ENABLED
+        )
+
+    @staticmethod
+    def make_key(url: str, params: Optional[Dict[str, Any]] = None) -> str:
+        """Build a cache key from an endpoint URL and its query parameters."""
+        if not params:
+            return url
+        query = urlencode(sorted((str(k), str(v)) for k, v in params.items()))
+        return f"{url}?{query}"
+
+    def ttl_for(self, resource: str) -> float:
+        return self.ttls.get(resource, self.default_ttl)
+
+    def get(self, key: str, resource: str = "") -> Any:
+        """Return the cached value for ``key`` or ``MISS``."""
+        if not self.enabled.get():
+            return MISS
+
+        try:
+            value = self.backend.get(key, resource)
+        except Exception as e:
+            # A broken shared backend must not take the tools down with it.
+            logger.warning(f"Cache backend read failed: {e}")
+            value = MISS
+
+        outcome = "misses" if value is MISS else "hits"
+        with self._lock:
+            if value is MISS:
+                self.stats.misses += 1
+            else:
+                self.stats.hits += 1
+            self.stats.record(resource, outcome)
+        return value
+
+    def set(self, key: str, value: Any, resource: str = "") -> None:
+        """Cache ``value`` under ``key`` for the resource's TTL."""
+        if not self.enabled.get():
+            return
+
+        ttl = self.ttl_for(resource)
+        if ttl <= 0:
+            return
+
+        try:
+            self.backend.set(key, value, ttl, resource)
+        except Exception as e:
+            logger.warning(f"Cache backend write failed: {e}")
+
+    def invalidate(self, resource: Optional[str] = None) -> None:
+        """Drop all entries, or only those of one resource."""
+        self.backend.clear(resource)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return counters and backend occupancy for logging or metrics."""
+        with self._lock:
+            lookups = self.stats.hits + self.stats.misses
+            counters = {
+                "hits": self.stats.hits,
+                "misses": self.stats.misses,
+                "hit_rate": self.stats.hits / lookups if lookups else 0.0,
+                "by_resource": {k: dict(v) for k, v in self.stats.by_resource.items()},
+            }
+        return {**counters, **self.backend.info()}
+
+
+# Backend shared by the response cache and the token store
+cache_backend = create_backend()
+
+# Process-wide cache shared by the LMS clients
+response_cache = ResponseCache(
+    backend=cache_backend,
+    default_ttl=settings.CACHE_DEFAULT_TTL,
+    ttls=settings.CACHE_TTLS,
+)
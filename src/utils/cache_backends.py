@@ -0,0 +1,365 @@
+"""Storage backends for the response cache and the token store."""
+
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from src.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Sentinel returned by ``CacheBackend.get`` when nothing usable is stored
+MISS = object()
+
+
+class CacheBackend(ABC):
+    """
+    Key/value store with per-entry TTLs.
+
+    Every entry belongs to a resource (``grades``, ``tokens``...) so that
+    a whole resource can be dropped at once. Values must be JSON
+    serializable; shared backends store them encoded.
+    """
+
+    @abstractmethod
+    def get(self, key: str, resource: str = "") -> Any:
+        """Return the stored value or ``MISS`` if absent or expired."""
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl: float, resource: str = "") -> None:
+        """Store a value for ``ttl`` seconds."""
+
+    @abstractmethod
+    def add(self, key: str, value: Any, ttl: float, resource: str = "") -> bool:
+        """Store a value only if the key is absent; return whether it was stored."""
+
+    @abstractmethod
+    def delete(self, key: str, resource: str = "") -> None:
+        """Remove a key if present."""
+
+    @abstractmethod
+    def clear(self, resource: Optional[str] = None) -> None:
+        """Remove every entry, or only those of one resource."""
+
+    def info(self) -> Dict[str, Any]:
+        """Return occupancy figures for logging or metrics."""
+        return {"backend": type(self).__name__}
+
+
+def _encoded_size(value: Any) -> int:
+    """Approximate the memory held by a JSON value by its encoded length."""
+    try:
+        return len(json.dumps(value, ensure_ascii=False, default=str))
+    except (TypeError, ValueError):
+        return 0
+
+
+class InProcessBackend(CacheBackend):
+    """
+    Thread-safe in-memory backend with LRU eviction by size.
+
+    Values are stored as-is (not copied), so callers must treat them as
+    read-only.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.evictions = 0
+        # (resource, key) -> (value, expires_at, size), oldest access first
+        self._entries: OrderedDict = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str, resource: str = "") -> Any:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get((resource, key))
+            if entry is None:
+                return MISS
+            if entry[1] <= now:
+                self._remove((resource, key))
+                return MISS
+            self._entries.move_to_end((resource, key))
+            return entry[0]
+
+    def set(self, key: str, value: Any, ttl: float, resource: str = "") -> None:
+        size = _encoded_size(value)
+        if size > self.max_bytes:
+            logger.debug(f"Not caching {key}: {size} bytes exceeds the cache budget")
+            return
+
+        with self._lock:
+            self._put((resource, key), value, ttl, size)
+
+    def add(self, key: str, value: Any, ttl: float, resource: str = "") -> bool:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get((resource, key))
+            if entry is not None and entry[1] > now:
+                return False
+            self._put((resource, key), value, ttl, _encoded_size(value))
+            return True
+
+    def delete(self, key: str, resource: str = "") -> None:
+        with self._lock:
+            if (resource, key) in self._entries:
+                self._remove((resource, key))
+
+    def clear(self, resource: Optional[str] = None) -> None:
+        with self._lock:
+            if resource is None:
+                self._entries.clear()
+                self._size = 0
+                return
+            for entry_key in [k for k in self._entries if k[0] == resource]:
+                self._remove(entry_key)
+
+    def info(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "backend": "memory",
+                "entries": len(self._entries),
+                "size_bytes": self._size,
+                "max_bytes": self.max_bytes,
+                "evictions": self.evictions,
+            }
+
+    def _put(self, entry_key: Tuple[str, str], value: Any, ttl: float, size: int):
+        if entry_key in self._entries:
+            self._remove(entry_key)
+        self._entries[entry_key] = (value, time.time() + ttl, size)
+        self._size += size
+        while self._size > self.max_bytes and self._entries:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _remove(self, entry_key: Tuple[str, str]) -> None:
+        _, _, size = self._entries.pop(entry_key)
+        self._size -= size
+
+
+class SQLiteBackend(CacheBackend):
+    """
+    On-disk backend shared by every worker process on a node.
+
+    Uses one connection per thread and WAL journaling so readers do not
+    block the writer. Least recently used rows are evicted once the stored
+    size exceeds ``max_bytes``.
+
+    The database holds access tokens and personal data, so it is only
+    readable by its owner; SQLite gives the WAL and SHM files the same mode.
+    """
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        directory = os.path.dirname(os.path.abspath(path))
+        if not os.path.isdir(directory):
+            os.makedirs(directory, mode=0o700)
+        os.close(os.open(path, os.O_RDWR | os.O_CREAT, 0o600))
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.chmod(path + suffix, 0o600)
+        with self._connection() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS cache (
+                    resource TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    expires_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL,
+                    size INTEGER NOT NULL,
+                    PRIMARY KEY (resource, key)
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed_at)"
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key: str, resource: str = "") -> Any:
+        now = time.time()
+        conn = self._connection()
+        row = conn.execute(
+            "SELECT value, expires_at FROM cache WHERE resource = ? AND key = ?",
+            (resource, key),
+        ).fetchone()
+        if row is None:
+            return MISS
+        if row[1] <= now:
+            self.delete(key, resource)
+            return MISS
+        conn.execute(
+            "UPDATE cache SET accessed_at = ? WHERE resource = ? AND key = ?",
+            (now, resource, key),
+        )
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any, ttl: float, resource: str = "") -> None:
+        encoded = json.dumps(value, ensure_ascii=False, default=str)
+        if len(encoded) > self.max_bytes:
+            return
+        now = time.time()
+        conn = self._connection()
+        conn.execute(
+            "INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?, ?, ?)",
+            (resource, key, encoded, now + ttl, now, len(encoded)),
+        )
+        self._evict(conn)
+
+    def add(self, key: str, value: Any, ttl: float, resource: str = "") -> bool:
+        encoded = json.dumps(value, ensure_ascii=False, default=str)
+        now = time.time()
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "DELETE FROM cache WHERE resource = ? AND key = ? AND expires_at <= ?",
+                (resource, key, now),
+            )
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO cache VALUES (?, ?, ?, ?, ?, ?)",
+                (resource, key, encoded, now + ttl, now, len(encoded)),
+            )
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            conn.execute("ROLLBACK")
+            raise
+        return cursor.rowcount == 1
+
+    def delete(self, key: str, resource: str = "") -> None:
+        self._connection().execute(
+            "DELETE FROM cache WHERE resource = ? AND key = ?", (resource, key)
+        )
+
+    def clear(self, resource: Optional[str] = None) -> None:
+        conn = self._connection()
+        if resource is None:
+            conn.execute("DELETE FROM cache")
+        else:
+            conn.execute("DELETE FROM cache WHERE resource = ?", (resource,))
+
+    def info(self) -> Dict[str, Any]:
+        entries, size = (
+            self._connection()
+            .execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache")
+            .fetchone()
+        )
+        return {
+            "backend": "sqlite",
+            "path": self.path,
+            "entries": entries,
+            "size_bytes": size,
+            "max_bytes": self.max_bytes,
+        }
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        """Drop expired rows, then least recently used rows over the budget."""
+        conn.execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),))
+        (size,) = conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()
+        if size <= self.max_bytes:
+            return
+        excess = size - self.max_bytes
+        rows = conn.execute(
+            "SELECT resource, key, size FROM cache ORDER BY accessed_at"
+        )
+        victims = []
+        for resource, key, row_size in rows:
+            victims.append((resource, key))
+            excess -= row_size
+            if excess <= 0:
+                break
+        conn.executemany("DELETE FROM cache WHERE resource = ? AND key = ?", victims)
+
+
+class RedisBackend(CacheBackend):
+    """
+    Backend for any server speaking the Redis protocol.
+
+    Expiry and eviction are left to the server (configure ``maxmemory`` with
+    an ``allkeys-lru`` policy). ``client`` may be any object implementing the
+    redis-py ``get``/``set``/``delete``/``scan_iter`` methods, which lets an
+    in-process stand-in replace a real server in tests.
+    """
+
+    def __init__(self, url: str = None, client: Any = None, prefix: str = "mahan-lms"):
+        if client is None:
+            try:
+                import redis
+            except ImportError as e:
+                raise ImportError(
+                    "The redis cache backend requires the 'redis' package"
+                ) from e
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self.prefix = prefix
+
+    def _key(self, key: str, resource: str) -> str:
+        return f"{self.prefix}:{resource}:{key}"
+
+    def get(self, key: str, resource: str = "") -> Any:
+        raw = self.client.get(self._key(key, resource))
+        if raw is None:
+            return MISS
+        return json.loads(raw)
+
+    def set(self, key: str, value: Any, ttl: float, resource: str = "") -> None:
+        self.client.set(
+            self._key(key, resource),
+            json.dumps(value, ensure_ascii=False, default=str),
+            px=max(1, int(ttl * 1000)),
+        )
+
+    def add(self, key: str, value: Any, ttl: float, resource: str = "") -> bool:
+        return bool(
+            self.client.set(
+                self._key(key, resource),
+                json.dumps(value, ensure_ascii=False, default=str),
+                px=max(1, int(ttl * 1000)),
+                nx=True,
+            )
+        )
+
+    def delete(self, key: str, resource: str = "") -> None:
+        self.client.delete(self._key(key, resource))
+
+    def clear(self, resource: Optional[str] = None) -> None:
+        pattern = f"{self.prefix}:{resource}:*" if resource else f"{self.prefix}:*"
+        keys = list(self.client.scan_iter(match=pattern))
+        if keys:
+            self.client.delete(*keys)
+
+    def info(self) -> Dict[str, Any]:
+        return {"backend": "redis", "prefix": self.prefix}
+
+
+def create_backend(name: str = None) -> CacheBackend:
+    """Build the cache backend selected in the settings."""
+    name = (name or settings.CACHE_BACKEND).lower()
+    if name == "memory":
+        return InProcessBackend(max_bytes=settings.CACHE_MAX_BYTES)
+    if name == "sqlite":
+        return SQLiteBackend(
+            path=settings.CACHE_SQLITE_PATH, max_bytes=settings.CACHE_MAX_BYTES
+        )
+    if name == "redis":
+        return RedisBackend(url=settings.CACHE_REDIS_URL)
+    raise ValueError(f"Unknown cache backend: {name}")
@@ -0,0 +1,356 @@
+"""
+Timing spans for LMS calls, exported as Prometheus metrics and OpenTelemetry.
+
+Model calls, agent runs and tool executions are traced by the Agents SDK;
+``timed_span`` adds auth calls, LMS requests and cache hits to the same
+trace ("User Assistant Session"). Two trace processors export them:
+
+- ``MetricsProcessor`` feeds Prometheus (``prometheus_client``): latency
+  histograms per span kind, LLM tokens in/out, LMS payload bytes, cache
+  outcomes, retries and rate-limiter queue waits.
+- ``OTelExporter`` re-emits every trace and span as OpenTelemetry spans
+  (``opentelemetry-api``), using whatever tracer provider the deployment
+  configured.
+
+Both packages are optional; without them the matching export is skipped.
+"""
+
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Optional
+import logging
+import threading
+import time
+
+from agents import add_trace_processor
+from agents.tracing import SpanError, TracingProcessor, custom_span
+
+from src.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Seconds; request latencies range from cache-speed LMS calls to long LLM runs
+LATENCY_BUCKETS = (0.005, 0.025, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+class Metrics:
+    """
+    Prometheus metrics, created on first use.
+
+    Every method is a no-op when metrics are disabled or ``prometheus_client``
+    is not installed.
+    """
+
+    def __init__(self, enabled: bool = True, prefix: str = "mahan"):
+        self.enabled = enabled
+        self.prefix = prefix
+        self._metrics: Optional[Dict[str, Any]] = None
+        self._lock = threading.Lock()
+
+    def _get(self) -> Optional[Dict[str, Any]]:
+        if self._metrics is not None or not self.enabled:
+            return self._metrics
+        with self._lock:
+            if self._metrics is None and self.enabled:
+                try:
+                    import prometheus_client as prom
+                except ImportError:
+                    logger.warning(
+                        "prometheus_client is not installed; metrics are disabled"
+                    )
+                    self.enabled = False
+                    return None
+                p = self.prefix
+                self._metrics = {
+                    "span": prom.Histogram(
+                        f"{p}_span_seconds",
+                        "Duration of model calls, agents, tools, auth and LMS requests",
+                        ["kind", "name"],
+                        buckets=LATENCY_BUCKETS,
+                    ),
+                    "tokens": prom.Counter(
+                        f"{p}_llm_tokens",
+                        "LLM tokens used",
+                        ["model", "direction"],
+                    ),
+                    "bytes": prom.Counter(
+                        f"{p}_lms_response_bytes",
+                        "LMS response payload bytes",
+                        ["endpoint"],
+                    ),
+                    "requests": prom.Counter(
+                        f"{p}_lms_requests",
+                        "LMS requests sent",
+                        ["endpoint", "method", "status"],
+                    ),
+                    "cache": prom.Counter(
+                        f"{p}_lms_cache_hits",
+                        "LMS reads served from the response cache",
+                        ["endpoint"],
+                    ),
+                    "retries": prom.Counter(
+                        f"{p}_lms_retries",
+                        "LMS requests retried after a failed attempt",
+                        ["endpoint"],
+                    ),
+                    "queue_wait": prom.Histogram(
+                        f"{p}_lms_queue_wait_seconds",
+                        "Time LMS requests waited for the rate limiter",
+                        ["endpoint"],
+                        buckets=LATENCY_BUCKETS,
+                    ),
+                }
+        return self._metrics
+
+    def observe(self, kind: str, name: str, seconds: float) -> None:
+        metrics = self._get()
+        if metrics:
+            metrics["span"].labels(kind, name).observe(seconds)
+
+    def count_tokens(self, model: str, input_tokens: int, output_tokens: int) -> None:
+        metrics = self._get()
+        if metrics:
+            metrics["tokens"].labels(model, "input").inc(input_tokens)
+            metrics["tokens"].labels(model, "output").inc(output_tokens)
+
+    def count_request(
+        self, endpoint: str, method: str, status: Any, nbytes: int = 0
+    ) -> None:
+        metrics = self._get()
+        if metrics:
+            metrics["requests"].labels(endpoint, method, str(status)).inc()
+            if nbytes:
+                metrics["bytes"].labels(endpoint).inc(nbytes)
+
+    def count_cache_hit(self, endpoint: str) -> None:
+        metrics = self._get()
+        if metrics:
+            metrics["cache"].labels(endpoint).inc()
+
+    def count_retry(self, endpoint: str) -> None:
+        metrics = self._get()
+        if metrics:
+            metrics["retries"].labels(endpoint).inc()
+
+    def observe_queue_wait(self, endpoint: str, seconds: float) -> None:
+        metrics = self._get()
+        if metrics:
+            metrics["queue_wait"].labels(endpoint).observe(seconds)
+
+    def render(self) -> Optional[tuple]:
+        """Return the ``(body, content type)`` of a scrape, or None if disabled."""
+        if not self._get():
+            return None
+        import prometheus_client as prom
+
+        return prom.generate_latest(), prom.CONTENT_TYPE_LATEST
+
+    def serve(self, port: int) -> None:
+        """Serve the metrics over HTTP on ``port`` from a background thread."""
+        if self._get():
+            import prometheus_client as prom
+
+            prom.start_http_server(port)
+            logger.info(f"Serving Prometheus metrics on port {port}")
+
+
+@contextmanager
+def timed_span(kind: str, name: str, **data):
+    """
+    Trace a block as a custom span of the current trace and time it.
+
+    Yields the span's data dict so the block can add results (status,
+    bytes, ...). The duration is recorded in the metrics even when no trace
+    is active.
+    """
+    span = custom_span(f"{kind}:{name}", data={"kind": kind, "name": name, **data})
+    started = time.perf_counter()
+    span.start(mark_as_current=True)
+    try:
+        yield span.span_data.data
+    except BaseException as e:
+        span.span_data.data["error"] = type(e).__name__
+        span.set_error(SpanError(message=str(e), data=None))
+        raise
+    finally:
+        span.finish(reset_current=True)
+        metrics.observe(kind, name, time.perf_counter() - started)
+
+
+def _seconds(span) -> Optional[float]:
+    if not span.started_at or not span.ended_at:
+        return None
+    started = datetime.fromisoformat(span.started_at)
+    return (datetime.fromisoformat(span.ended_at) - started).total_seconds()
+
+
+def _usage(data) -> tuple:
+    """Return (model, input tokens, output tokens) of a model-call span."""
+    if data.type == "response":
+        response = data.response
+        usage = getattr(response, "usage", None)
+        return (
+            getattr(response, "model", None) or "unknown",
+            getattr(usage, "input_tokens", 0) or 0,
+            getattr(usage, "output_tokens", 0) or 0,
+        )
+    usage = data.usage or {}
+    return (
+        data.model or "unknown",
+        usage.get("input_tokens", 0) or 0,
+        usage.get("output_tokens", 0) or 0,
+    )
+
+
+class MetricsProcessor(TracingProcessor):
+    """Record the SDK's model, agent and tool spans as Prometheus metrics."""
+
+    def on_span_end(self, span) -> None:
+        data = span.span_data
+        seconds = _seconds(span)
+        if data.type in ("response", "generation"):
+            model, input_tokens, output_tokens = _usage(data)
+            metrics.count_tokens(model, input_tokens, output_tokens)
+            kind, name = "model", model
+        elif data.type == "agent":
+            kind, name = "agent", data.name
+        elif data.type == "function":
+            kind, name = "tool", data.name
+        else:
+            # Custom spans time themselves in timed_span
+            return
+        if seconds is not None:
+            metrics.observe(kind, name, seconds)
+
+    def on_trace_start(self, trace) -> None:
+        pass
+
+    def on_trace_end(self, trace) -> None:
+        pass
+
+    def on_span_start(self, span) -> None:
+        pass
+
+    def shutdown(self) -> None:
+        pass
+
+    def force_flush(self) -> None:
+        pass
+
+
+def _attributes(values: Dict[str, Any], prefix: str) -> Dict[str, Any]:
+    """Flatten span data into OpenTelemetry attributes (scalars only)."""
+    attributes = {}
+    for key, value in (values or {}).items():
+        if isinstance(value, (str, bool, int, float)):
+            attributes[f"{prefix}{key}"] = value
+    return attributes
+
+
+def _span_name(data) -> str:
+    if data.type == "custom":
+        return data.name
+    name = getattr(data, "name", None)
+    return f"{data.type} {name}" if name else data.type
+
+
+class OTelExporter(TracingProcessor):
+    """
+    Mirror SDK traces as OpenTelemetry spans.
+
+    The SDK trace becomes the root span, so model calls, agents, tools, auth
+    and LMS requests of one chat message share an OpenTelemetry trace.
+    """
+
+    def __init__(self, tracer):
+        self.tracer = tracer
+        self._spans: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def _start(self, key: str, name: str, parent_key: Optional[str], attributes):
+        from opentelemetry import trace as otel_trace
+
+        with self._lock:
+            parent = self._spans.get(parent_key) if parent_key else None
+        context = otel_trace.set_span_in_context(parent) if parent else None
+        span = self.tracer.start_span(name, context=context, attributes=attributes)
+        with self._lock:
+            self._spans[key] = span
+
+    def on_trace_start(self, trace) -> None:
+        attributes = {"agents.trace_id": trace.trace_id}
+        attributes.update(_attributes(getattr(trace, "metadata", None), "agents."))
+        self._start(trace.trace_id, trace.name, None, attributes)
+
+    def on_trace_end(self, trace) -> None:
+        with self._lock:
+            span = self._spans.pop(trace.trace_id, None)
+        if span is not None:
+            span.end()
+
+    def on_span_start(self, span) -> None:
+        self._start(
+            span.span_id,
+            _span_name(span.span_data),
+            span.parent_id or span.trace_id,
+            {"agents.span_type": span.span_data.type},
+        )
+
+    def on_span_end(self, span) -> None:
+        from opentelemetry.trace import Status, StatusCode
+
+        with self._lock:
+            otel_span = self._spans.pop(span.span_id, None)
+        if otel_span is None:
+            return
+        data = span.span_data
+        if data.type == "custom":
+            otel_span.set_attributes(_attributes(data.data, "lms."))
+        elif data.type in ("response", "generation"):
+            model, input_tokens, output_tokens = _usage(data)
+            otel_span.set_attributes(
+                {
+                    "gen_ai.request.model": model,
+                    "gen_ai.usage.input_tokens": input_tokens,
+                    "gen_ai.usage.output_tokens": output_tokens,
+                }
+            )
+        if span.error:
+            otel_span.set_status(Status(StatusCode.ERROR, span.error["message"]))
+        otel_span.end()
+
+    def shutdown(self) -> None:
+        pass
+
+    def force_flush(self) -> None:
+        pass
+
+
+_setup_lock = threading.Lock()
+_setup_done = False
+
+
+def setup_instrumentation() -> None:
+    """Register the trace processors enabled in the settings (once per process)."""
+    global _setup_done
+    with _setup_lock:
+        if _setup_done:
+            return
+        _setup_done = True
+
+        if settings.METRICS_ENABLED:
+            add_trace_processor(MetricsProcessor())
+        if settings.OTEL_ENABLED:
+            try:
+                from opentelemetry import trace as otel_trace
+            except ImportError:
+                logger.warning(
+                    "opentelemetry-api is not installed; OpenTelemetry export "
+                    "is disabled"
+                )
+            else:
+                add_trace_processor(OTelExporter(otel_trace.get_tracer("mahan-lms")))
+
+
+# Process-wide metrics shared by the LMS clients, tools and trace processors
+metrics = Metrics(enabled=settings.METRICS_ENABLED)
@@ -0,0 +1,675 @@
+"""Pooled HTTP client for the Mahan LMS external-services API."""
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import replace
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterator, Optional
+from urllib.parse import urlparse
+import asyncio
+import contextvars
+import hashlib
+import importlib.util
+import logging
+import os
+import threading
+import time
+import weakref
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.config.settings import settings
+from src.utils.cache import MISS, response_cache
+from src.utils.instrumentation import metrics, timed_span
+from src.utils.rate_limit import rate_governor
+from src.utils.resilience import (
+    IDEMPOTENT_METHODS,
+    AsyncCircuitOpenError,
+    SyncCircuitOpenError,
+    circuit_breakers,
+    retry_budget,
+    retry_delay,
+    retry_policy,
+)
+from src.utils.single_flight import AsyncSingleFlight, SingleFlight
+
+logger = logging.getLogger(__name__)
+
+API_PATH = "/external-services/api/v1/"
+
+
+def resource_name(url: str) -> str:
+    """Return the API resource (e.g. ``grades``) an endpoint URL belongs to."""
+    path = urlparse(url).path
+    return path.split(API_PATH, 1)[-1].strip("/").split("/")[0]
+
+
+def flight_key(key: str, headers: Optional[Dict[str, str]]) -> str:
+    """Scope a cache key by the caller's credentials for request coalescing."""
+    auth = (headers or {}).get("Authorization", "")
+    scope = hashlib.sha256(auth.encode("utf-8")).hexdigest()[:16] if auth else ""
+    return f"{scope}:{key}"
+
+
+def _page_params(
+    params: Optional[Dict[str, Any]], page_size: Optional[int]
+) -> Dict[str, Any]:
+    """Merge the page size into the query parameters of a first-page request."""
+    params = dict(params or {})
+    page_size = page_size or settings.LMS_PAGE_SIZE
+    if page_size:
+        params.setdefault(settings.LMS_PAGE_SIZE_PARAM, page_size)
+    return params
+
+
+def _page_results(page: Any) -> list:
+    """Return the records of a page, accepting both paginated and bare lists."""
+    if isinstance(page, dict):
+        return page.get("results", [])
+    return page or []
+
+
+# Background workers used to prefetch the next page of list endpoints
+_prefetch_executor = ThreadPoolExecutor(thread_name_prefix="lms-prefetch")
+
+
+class LMSClient:
+    """
+    Thin wrapper around a pooled ``requests.Session`` for the LMS API.
+
+    One session (and therefore one connection pool) is kept per process so
+    that tool calls reuse open keep-alive connections instead of paying a
+    TCP+TLS handshake on every request. With ``pool_block`` enabled the pool
+    also caps the number of sockets held towards the LMS, and
+    ``max_concurrency`` caps the requests in flight across all threads.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        pool_connections: int = 10,
+        pool_maxsize: int = 20,
+        pool_block: bool = True,
+        keep_alive: bool = True,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 10.0,
+        max_concurrency: int = 0,
+        single_flight: bool = True,
+    ):
+        self.base_url = base_url.rstrip("/") + API_PATH
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        self.keep_alive = keep_alive
+        self.timeout = (connect_timeout, read_timeout)
+        self._session: Optional[requests.Session] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+        self._slots = (
+            threading.BoundedSemaphore(max_concurrency) if max_concurrency > 0 else None
+        )
+        self._in_flight = SingleFlight(enabled=single_flight)
+        # Called with the Authorization header of a request rejected with a
+        # 401; returns the header to retry with (set by the auth tools)
+        self.reauthenticate: Optional[Callable[[str], Optional[str]]] = None
+
+    @classmethod
+    def from_settings(cls) -> "LMSClient":
+        """Build a client configured from the global settings."""
+        return cls(
+            base_url=settings.API_ENDPOINTS["base_url"],
+            pool_connections=settings.LMS_POOL_CONNECTIONS,
+            pool_maxsize=settings.LMS_POOL_MAXSIZE,
+            pool_block=settings.LMS_POOL_BLOCK,
+            keep_alive=settings.LMS_KEEP_ALIVE,
+            connect_timeout=settings.LMS_CONNECT_TIMEOUT,
+            read_timeout=settings.LMS_READ_TIMEOUT,
+            max_concurrency=settings.LMS_MAX_CONCURRENCY,
+            single_flight=settings.LMS_SINGLE_FLIGHT,
+        )
+
+    @property
+    def session(self) -> requests.Session:
+        """Return the process-wide session, creating it on first use."""
+        # Sessions must not be shared across a fork, so worker processes
+        # each build their own pool.
+        if self._session is None or self._pid != os.getpid():
+            with self._lock:
+                if self._session is None or self._pid != os.getpid():
+                    self._session = self._create_session()
+                    self._pid = os.getpid()
+        return self._session
+
+    def _create_session(self) -> requests.Session:
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            pool_block=self.pool_block,
+            max_retries=0,  # Retries are handled by LMSClient.request
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers["Connection"] = "keep-alive" if self.keep_alive else "close"
+        logger.info(
+            f"Created LMS session (pool_maxsize={self.pool_maxsize}, "
+            f"keep_alive={self.keep_alive})"
+        )
+        return session
+
+    def url(self, path: str) -> str:
+        """Build an absolute API URL from a path relative to the API root."""
+        if path.startswith(("http://", "https://")):
+            return path  # Already absolute, e.g. a pagination ``next`` link
+        return self.base_url + path.lstrip("/")
+
+    def request(
+        self, method: str, path: str, idempotent: Optional[bool] = None, **kwargs
+    ) -> requests.Response:
+        """
+        Send a request through the pooled session, retrying failed attempts.
+
+        Connection errors, timeouts, 429 and 5xx responses are retried with
+        jittered exponential backoff that honors ``Retry-After``, following
+        the current ``retry_policy``; only idempotent methods are retried
+        unless ``idempotent`` says otherwise. The last failed response is
+        returned and the last transport error raised.
+
+        Each attempt waits for the endpoint family's rate and concurrency
+        limits, and raises ``SyncCircuitOpenError`` without sending anything
+        while the endpoint's circuit breaker is open. A request rejected with
+        a 401 is sent once more with the token ``reauthenticate`` returns.
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        response = self._request(method, path, idempotent, **kwargs)
+        headers = kwargs.get("headers") or {}
+        authorization = headers.get("Authorization")
+        if response.status_code != 401 or not authorization or not self.reauthenticate:
+            return response
+        replacement = self.reauthenticate(authorization)
+        if not replacement or replacement == authorization:
+            return response
+        response.close()
+        kwargs["headers"] = {**headers, "Authorization": replacement}
+        return self._request(method, path, idempotent, **kwargs)
+
+    def _request(
+        self, method: str, path: str, idempotent: Optional[bool], **kwargs
+    ) -> requests.Response:
+        """Send a request, retrying failed attempts."""
+        url = self.url(path)
+        endpoint = resource_name(url)
+        policy = retry_policy.get()
+        if idempotent is None:
+            idempotent = method.upper() in IDEMPOTENT_METHODS
+        if not idempotent:
+            policy = replace(policy, idempotent=False)
+
+        attempt = 0
+        while True:
+            try:
+                response = self._send(method, url, endpoint, attempt, **kwargs)
+            except requests.RequestException as e:
+                wait = retry_delay(policy, attempt, error=e)
+                if wait is None:
+                    raise
+                logger.warning(f"{method} {endpoint} attempt {attempt + 1} failed: {e}")
+            else:
+                wait = retry_delay(policy, attempt, response=response)
+                if wait is None:
+                    return response
+                logger.warning(
+                    f"{method} {endpoint} attempt {attempt + 1} failed: "
+                    f"HTTP {response.status_code}"
+                )
+                response.close()
+            metrics.count_retry(endpoint)
+            time.sleep(wait)
+            attempt += 1
+
+    def _send(
+        self, method: str, url: str, endpoint: str, attempt: int, **kwargs
+    ) -> requests.Response:
+        """Send a single attempt of a request."""
+        retry_in = circuit_breakers.before_call(endpoint)
+        if retry_in is not None:
+            metrics.count_request(endpoint, method, "circuit_open")
+            raise SyncCircuitOpenError(endpoint, retry_in)
+
+        retry_budget.record_request()
+        try:
+            with timed_span("http", endpoint, method=method, attempt=attempt) as span:
+                with rate_governor.limit(endpoint):
+                    if self._slots is None:
+                        response = self.session.request(method, url, **kwargs)
+                    else:
+                        with self._slots:
+                            response = self.session.request(method, url, **kwargs)
+                span["status"] = response.status_code
+                span["bytes"] = len(response.content)
+        except requests.RequestException:
+            circuit_breakers.record_failure(endpoint)
+            metrics.count_request(endpoint, method, "error")
+            raise
+        circuit_breakers.record(endpoint, response.status_code)
+        metrics.count_request(endpoint, method, response.status_code, span["bytes"])
+        return response
+
+    def get(
+        self,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> requests.Response:
+        return self.request("GET", path, params=params, headers=headers)
+
+    def post(
+        self,
+        path: str,
+        json: Any = None,
+        headers: Optional[Dict[str, str]] = None,
+        idempotent: bool = False,
+    ) -> requests.Response:
+        return self.request(
+            "POST", path, idempotent=idempotent, json=json, headers=headers
+        )
+
+    def get_json(
+        self,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> Any:
+        """
+        GET a path and return the decoded JSON body, raising on HTTP errors.
+
+        Responses are served from, and stored in, the shared response cache.
+        Identical requests (same URL, parameters and credentials) already in
+        flight are joined instead of being sent again.
+        """
+        url = self.url(path)
+        key, resource = response_cache.make_key(url, params), resource_name(url)
+        with timed_span("read", resource, cache="miss") as span:
+            data = response_cache.get(key, resource)
+            if data is not MISS:
+                span["cache"] = "hit"
+                metrics.count_cache_hit(resource)
+                return data
+
+            return self._in_flight.do(
+                flight_key(key, headers),
+                self._fetch_json,
+                url,
+                params,
+                headers,
+                key,
+                resource,
+            )
+
+    def _fetch_json(self, url, params, headers, key, resource) -> Any:
+        response = self.get(url, params=params, headers=headers)
+        response.raise_for_status()
+        data = response.json()
+        response_cache.set(key, data, resource)
+        return data
+
+    def iter_pages(
+        self,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        page_size: Optional[int] = None,
+    ) -> Iterator[Any]:
+        """
+        Yield every page of a list endpoint by following its ``next`` links.
+
+        The next page is requested in the background while the caller
+        processes the current one.
+        """
+        # Prefetch threads run in a copy of the caller's context so per-agent
+        # cache settings carry over.
+        pending: Optional[Future] = _prefetch_executor.submit(
+            contextvars.copy_context().run,
+            self.get_json,
+            path,
+            _page_params(params, page_size),
+            headers,
+        )
+        try:
+            while pending is not None:
+                page = pending.result()
+                next_url = page.get("next") if isinstance(page, dict) else None
+                pending = (
+                    _prefetch_executor.submit(
+                        contextvars.copy_context().run,
+                        self.get_json,
+                        next_url,
+                        None,
+                        headers,
+                    )
+                    if next_url
+                    else None
+                )
+                yield page
+        finally:
+            if pending is not None:
+                pending.cancel()
+
+    def iter_results(
+        self,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        page_size: Optional[int] = None,
+        max_items: Optional[int] = None,
+    ) -> Iterator[Any]:
+        """Yield the records of a list endpoint across all of its pages."""
+        yielded = 0
+        for page in self.iter_pages(path, params, headers, page_size):
+            for item in _page_results(page):
+                if max_items is not None and yielded >= max_items:
+                    return
+                yield item
+                yielded += 1
+
+    def close(self) -> None:
+        """Close pooled connections."""
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+
+class AsyncLMSClient:
+    """
+    Asyncio counterpart of ``LMSClient`` built on ``httpx.AsyncClient``.
+
+    httpx connection pools are bound to the event loop that created them, so
+    one pooled client is kept per running loop. HTTP/2 is negotiated when it
+    is enabled in the settings and the optional ``h2`` package is installed.
+    ``max_concurrency`` caps the requests in flight per loop, so tool calls
+    the model issues in parallel cannot flood the LMS.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        keepalive_expiry: float = 30.0,
+        http2: bool = False,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 10.0,
+        max_concurrency: int = 0,
+        single_flight: bool = True,
+    ):
+        self.base_url = base_url.rstrip("/") + API_PATH
+        self.max_concurrency = max_concurrency
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.http2 = http2 and importlib.util.find_spec("h2") is not None
+        if http2 and not self.http2:
+            logger.warning("HTTP/2 requested but h2 is not installed; using HTTP/1.1")
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self._clients: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        self._slots: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        self._in_flight = AsyncSingleFlight(enabled=single_flight)
+        # Coroutine counterpart of ``LMSClient.reauthenticate``
+        self.reauthenticate: Optional[Callable[[str], Awaitable[Optional[str]]]] = None
+
+    @classmethod
+    def from_settings(cls) -> "AsyncLMSClient":
+        """Build a client configured from the global settings."""
+        return cls(
+            base_url=settings.API_ENDPOINTS["base_url"],
+            max_connections=settings.LMS_POOL_MAXSIZE,
+            max_keepalive_connections=(
+                settings.LMS_POOL_MAXSIZE if settings.LMS_KEEP_ALIVE else 0
+            ),
+            keepalive_expiry=settings.LMS_KEEPALIVE_EXPIRY,
+            http2=settings.LMS_HTTP2,
+            connect_timeout=settings.LMS_CONNECT_TIMEOUT,
+            read_timeout=settings.LMS_READ_TIMEOUT,
+            max_concurrency=settings.LMS_MAX_CONCURRENCY,
+            single_flight=settings.LMS_SINGLE_FLIGHT,
+        )
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Return the pooled client for the running event loop."""
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                limits=self.limits,
+                timeout=self.timeout,
+                http2=self.http2,
+            )
+            self._clients[loop] = client
+        return client
+
+    @property
+    def slots(self) -> Optional[asyncio.Semaphore]:
+        """Return the request limiter of the running loop, if one is configured."""
+        if self.max_concurrency <= 0:
+            return None
+        loop = asyncio.get_running_loop()
+        slots = self._slots.get(loop)
+        if slots is None:
+            slots = self._slots[loop] = asyncio.Semaphore(self.max_concurrency)
+        return slots
+
+    def url(self, path: str) -> str:
+        """Build an absolute API URL from a path relative to the API root."""
+        if path.startswith(("http://", "https://")):
+            return path
+        return self.base_url + path.lstrip("/")
+
+    async def request(
+        self, method: str, path: str, idempotent: Optional[bool] = None, **kwargs
+    ) -> httpx.Response:
+        """
+        Send a request through the pooled client of the running loop.
+
+        Failed attempts are retried like in ``LMSClient.request``, backing
+        off with ``asyncio.sleep`` so the event loop is never blocked. Each
+        attempt waits for the endpoint family's rate and concurrency limits,
+        and raises ``AsyncCircuitOpenError`` without sending anything while
+        the endpoint's circuit breaker is open. A request rejected with a 401
+        is sent once more with the token ``reauthenticate`` returns.
+        """
+        response = await self._request(method, path, idempotent, **kwargs)
+        headers = kwargs.get("headers") or {}
+        authorization = headers.get("Authorization")
+        if response.status_code != 401 or not authorization or not self.reauthenticate:
+            return response
+        replacement = await self.reauthenticate(authorization)
+        if not replacement or replacement == authorization:
+            return response
+        kwargs["headers"] = {**headers, "Authorization": replacement}
+        return await self._request(method, path, idempotent, **kwargs)
+
+    async def _request(
+        self, method: str, path: str, idempotent: Optional[bool], **kwargs
+    ) -> httpx.Response:
+        """Send a request, retrying failed attempts."""
+        url = self.url(path)
+        endpoint = resource_name(url)
+        policy = retry_policy.get()
+        if idempotent is None:
+            idempotent = method.upper() in IDEMPOTENT_METHODS
+        if not idempotent:
+            policy = replace(policy, idempotent=False)
+
+        attempt = 0
+        while True:
+            try:
+                response = await self._send(method, url, endpoint, attempt, **kwargs)
+            except httpx.TransportError as e:
+                wait = retry_delay(policy, attempt, error=e)
+                if wait is None:
+                    raise
+                logger.warning(f"{method} {endpoint} attempt {attempt + 1} failed: {e}")
+            else:
+                wait = retry_delay(policy, attempt, response=response)
+                if wait is None:
+                    return response
+                logger.warning(
+                    f"{method} {endpoint} attempt {attempt + 1} failed: "
+                    f"HTTP {response.status_code}"
+                )
+            metrics.count_retry(endpoint)
+            await asyncio.sleep(wait)
+            attempt += 1
+
+    async def _send(
+        self, method: str, url: str, endpoint: str, attempt: int, **kwargs
+    ) -> httpx.Response:
+        """Send a single attempt of a request."""
+        retry_in = circuit_breakers.before_call(endpoint)
+        if retry_in is not None:
+            metrics.count_request(endpoint, method, "circuit_open")
+            raise AsyncCircuitOpenError(endpoint, retry_in)
+
+        retry_budget.record_request()
+        slots = self.slots
+        try:
+            with timed_span("http", endpoint, method=method, attempt=attempt) as span:
+                async with rate_governor.alimit(endpoint):
+                    if slots is None:
+                        response = await self.client.request(method, url, **kwargs)
+                    else:
+                        async with slots:
+                            response = await self.client.request(method, url, **kwargs)
+                span["status"] = response.status_code
+                span["bytes"] = len(response.content)
+        except httpx.TransportError:
+            circuit_breakers.record_failure(endpoint)
+            metrics.count_request(endpoint, method, "error")
+            raise
+        circuit_breakers.record(endpoint, response.status_code)
+        metrics.count_request(endpoint, method, response.status_code, span["bytes"])
+        return response
+
+    async def get(
+        self,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> httpx.Response:
+        return await self.request("GET", path, params=params, headers=headers)
+
+    async def post(
+        self,
+        path: str,
+        json: Any = None,
+        headers: Optional[Dict[str, str]] = None,
+        idempotent: bool = False,
+    ) -> httpx.Response:
+        return await self.request(
+            "POST", path, idempotent=idempotent, json=json, headers=headers
+        )
+
+    async def get_json(
+        self,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> Any:
+        """
+        GET a path and return the decoded JSON body, raising on HTTP errors.
+
+        Responses are served from, and stored in, the shared response cache.
+        Identical requests (same URL, parameters and credentials) already in
+        flight are joined instead of being sent again.
+        """
+        url = self.url(path)
+        key, resource = response_cache.make_key(url, params), resource_name(url)
+        with timed_span("read", resource, cache="miss") as span:
+            data = response_cache.get(key, resource)
+            if data is not MISS:
+                span["cache"] = "hit"
+                metrics.count_cache_hit(resource)
+                return data
+
+            return await self._in_flight.do(
+                flight_key(key, headers),
+                self._fetch_json,
+                url,
+                params,
+                headers,
+                key,
+                resource,
+            )
+
+    async def _fetch_json(self, url, params, headers, key, resource) -> Any:
+        response = await self.get(url, params=params, headers=headers)
+        response.raise_for_status()
+        data = response.json()
+        response_cache.set(key, data, resource)
+        return data
+
+    async def iter_pages(
+        self,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        page_size: Optional[int] = None,
+    ) -> AsyncIterator[Any]:
+        """
+        Yield every page of a list endpoint by following its ``next`` links.
+
+        The next page is requested concurrently while the caller processes
+        the current one.
+        """
+        pending: Optional[asyncio.Task] = asyncio.ensure_future(
+            self.get_json(path, _page_params(params, page_size), headers)
+        )
+        try:
+            while pending is not None:
+                page = await pending
+                next_url = page.get("next") if isinstance(page, dict) else None
+                pending = (
+                    asyncio.ensure_future(self.get_json(next_url, None, headers))
+                    if next_url
+                    else None
+                )
+                yield page
+        finally:
+            if pending is not None:
+                pending.cancel()
+
+    async def iter_results(
+        self,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        page_size: Optional[int] = None,
+        max_items: Optional[int] = None,
+    ) -> AsyncIterator[Any]:
+        """Yield the records of a list endpoint across all of its pages."""
+        yielded = 0
+        pages = self.iter_pages(path, params, headers, page_size)
+        try:
+            async for page in pages:
+                for item in _page_results(page):
+                    if max_items is not None and yielded >= max_items:
+                        return
+                    yield item
+                    yielded += 1
+        finally:
+            await pages.aclose()
+
+    async def aclose(self) -> None:
+        """Close the pooled client of the running loop."""
+        client = self._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+
+# Process-wide clients shared by all LMS tools
+lms_client = LMSClient.from_settings()
+async_lms_client = AsyncLMSClient.from_settings()
@@ -0,0 +1,115 @@
+"""Projection and compaction of LMS records before they reach the model."""
+
+from collections import Counter
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from src.config.settings import settings
+
+# Passing this as the only field returns full records
+ALL_FIELDS = "*"
+
+# Fields kept per resource when a tool is called without ``fields``
+COMPACT_FIELDS: Dict[str, Tuple[str, ...]] = {
+    "students": ("id", "first_name", "last_name", "full_name", "name", "username"),
+    "courses": ("id", "name", "title", "category"),
+    "lessons": ("id", "name", "title", "course", "teacher"),
+    "homeworks": ("id", "name", "title", "lesson", "deadline", "due_date"),
+    "grades": ("id", "user", "lesson", "total_score", "score", "nomrehozoor"),
+    "homework-responses": (
+        "id",
+        "user",
+        "homework",
+        "grade",
+        "score",
+        "status",
+        "created",
+        "submitted_at",
+    ),
+}
+
+# Foreign keys whose most frequent values are listed in summaries
+SUMMARY_FIELDS: Dict[str, Tuple[str, ...]] = {
+    "courses": ("category",),
+    "lessons": ("course", "teacher"),
+    "homeworks": ("lesson",),
+    "grades": ("lesson", "user"),
+    "homework-responses": ("homework", "user"),
+}
+
+# Keys kept when a nested object (e.g. an expanded foreign key) is compacted
+_NESTED_FIELDS = ("id", "name", "title", "first_name", "last_name")
+
+
+def _compact_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {k: value[k] for k in _NESTED_FIELDS if value.get(k) is not None}
+    return value
+
+
+def _ref(value: Any) -> Any:
+    return value.get("id") if isinstance(value, dict) else value
+
+
+def project_record(
+    record: Any, resource: str, fields: Optional[Sequence[str]] = None
+) -> Any:
+    """
+    Keep only ``fields`` of a record, or the resource's compact fields.
+
+    Empty values are dropped and nested objects are cut down to their id
+    and name. ``fields=["*"]`` returns the record unchanged.
+    """
+    if not isinstance(record, dict):
+        return record
+    if fields and ALL_FIELDS in fields:
+        return record
+
+    keep = fields or COMPACT_FIELDS.get(resource)
+    if not keep:
+        return record
+    projected = {
+        f: _compact_value(record[f]) for f in keep if record.get(f) not in (None, "")
+    }
+    # Unknown field names should not silently empty the result
+    return projected or record
+
+
+def project_records(
+    records: List[Any],
+    resource: str,
+    fields: Optional[Sequence[str]] = None,
+    max_rows: Optional[int] = None,
+) -> List[Any]:
+    """Project records and cap them at ``max_rows`` (``RESULT_MAX_ROWS``)."""
+    max_rows = settings.RESULT_MAX_ROWS if max_rows is None else max_rows
+    if max_rows > 0:
+        records = records[:max_rows]
+    return [project_record(record, resource, fields) for record in records]
+
+
+def summarize_records(
+    records: List[Any], resource: str, max_rows: Optional[int] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Describe a list that was cut to ``max_rows``; None when nothing was cut.
+
+    The summary gives the total count and, per foreign key, the number of
+    distinct values and the ``RESULT_TOP_N`` most frequent ones.
+    """
+    max_rows = settings.RESULT_MAX_ROWS if max_rows is None else max_rows
+    if max_rows <= 0 or len(records) <= max_rows:
+        return None
+
+    summary: Dict[str, Any] = {"total": len(records), "returned": max_rows}
+    for fk in SUMMARY_FIELDS.get(resource, ()):
+        counts = Counter(
+            str(_ref(r.get(fk)))
+            for r in records
+            if isinstance(r, dict) and r.get(fk) is not None
+        )
+        if counts:
+            summary[fk] = {
+                "distinct": len(counts),
+                "top": dict(counts.most_common(settings.RESULT_TOP_N)),
+            }
+    return summary
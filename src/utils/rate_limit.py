@@ -0,0 +1,272 @@
+"""Client-side rate limiting and concurrency caps per LMS endpoint family."""
+
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+import asyncio
+import logging
+import threading
+import time
+
+from src.config.settings import settings
+from src.utils.instrumentation import metrics
+
+logger = logging.getLogger(__name__)
+
+# Who a request is made for (a chat session, user or request id); waiting
+# requests are served round-robin across owners
+request_owner: ContextVar[str] = ContextVar("request_owner", default="")
+
+
+@dataclass
+class WaitStats:
+    """Queue wait counters of one endpoint family."""
+
+    requests: int = 0
+    queued: int = 0
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+
+    def record(self, wait: float) -> None:
+        self.requests += 1
+        if wait > 0.001:
+            self.queued += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+
+
+class _Waiter:
+    """A request waiting for its turn, woken from any thread."""
+
+    def __init__(self, owner: str, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.owner = owner
+        self.granted = False
+        self.loop = loop
+        self.event = threading.Event() if loop is None else None
+        self.future = loop.create_future() if loop is not None else None
+
+    def _set(self) -> None:
+        if not self.future.done():
+            self.future.set_result(None)
+
+    def wake(self) -> bool:
+        """Signal the waiter; False if it can no longer be reached."""
+        if self.event is not None:
+            self.event.set()
+            return True
+        try:
+            self.loop.call_soon_threadsafe(self._set)
+        except RuntimeError:  # The waiter's loop is closed
+            return False
+        return True
+
+
+class EndpointLimiter:
+    """
+    Token bucket plus an in-flight cap for one endpoint family.
+
+    A request proceeds once a token is available (``rate`` per second, up
+    to ``burst`` saved up) and fewer than ``max_in_flight`` requests of the
+    family are running; 0 disables either limit. Waiting requests are
+    queued per owner and served round-robin, so one busy conversation
+    cannot starve the others. Works for threads and event loops alike.
+    """
+
+    def __init__(
+        self, name: str, rate: float = 0, burst: int = 1, max_in_flight: int = 0
+    ):
+        self.name = name
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.max_in_flight = max_in_flight
+        self.stats = WaitStats()
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._in_flight = 0
+        self._queues: "OrderedDict[str, deque[_Waiter]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _dispatch(self) -> Optional[float]:
+        """
+        Grant waiting requests while the limits allow (called with the lock).
+
+        Returns the seconds until the next token when requests are left
+        waiting for one, so a waiter can wake up and dispatch again.
+        """
+        now = time.monotonic()
+        if self.rate > 0:
+            self._tokens = min(
+                self.burst, self._tokens + (now - self._updated) * self.rate
+            )
+        self._updated = now
+
+        while self._queues:
+            if 0 < self.max_in_flight <= self._in_flight:
+                return None
+            if self.rate > 0 and self._tokens < 1:
+                return (1 - self._tokens) / self.rate
+            owner, queue = next(iter(self._queues.items()))
+            waiter = queue.popleft()
+            if queue:
+                self._queues.move_to_end(owner)
+            else:
+                del self._queues[owner]
+            if self.rate > 0:
+                self._tokens -= 1
+            if waiter.wake():
+                waiter.granted = True
+                self._in_flight += 1
+        return None
+
+    def _enqueue(self, waiter: _Waiter) -> Optional[float]:
+        with self._lock:
+            self._queues.setdefault(waiter.owner, deque()).append(waiter)
+            return self._dispatch()
+
+    def _poll(self, waiter: _Waiter) -> Optional[float]:
+        with self._lock:
+            return None if waiter.granted else self._dispatch()
+
+    def _abandon(self, waiter: _Waiter) -> None:
+        """Give up a wait that was interrupted, releasing a slot already granted."""
+        with self._lock:
+            if waiter.granted:
+                self._in_flight -= 1
+            else:
+                queue = self._queues.get(waiter.owner)
+                if queue is not None and waiter in queue:
+                    queue.remove(waiter)
+                    if not queue:
+                        del self._queues[waiter.owner]
+            self._dispatch()
+
+    def release(self) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            self._dispatch()
+
+    def _record(self, started: float) -> None:
+        wait = time.monotonic() - started
+        with self._lock:
+            self.stats.record(wait)
+        metrics.observe_queue_wait(self.name, wait)
+        if wait > 1:
+            logger.info(f"Waited {wait:.2f}s for a '{self.name}' request slot")
+
+    @contextmanager
+    def limit(self, owner: str = ""):
+        """Hold a request slot of this family for the block."""
+        started = time.monotonic()
+        waiter = _Waiter(owner)
+        delay = self._enqueue(waiter)
+        try:
+            while not waiter.event.wait(delay):
+                delay = self._poll(waiter)
+        except BaseException:
+            self._abandon(waiter)
+            raise
+        self._record(started)
+        try:
+            yield
+        finally:
+            self.release()
+
+    @asynccontextmanager
+    async def alimit(self, owner: str = ""):
+        """Asyncio counterpart of ``limit``."""
+        started = time.monotonic()
+        waiter = _Waiter(owner, asyncio.get_running_loop())
+        delay = self._enqueue(waiter)
+        try:
+            while not waiter.future.done():
+                await asyncio.wait({waiter.future}, timeout=delay)
+                delay = self._poll(waiter)
+        except BaseException:
+            self._abandon(waiter)
+            raise
+        self._record(started)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = self.stats
+            return {
+                "requests": stats.requests,
+                "queued": stats.queued,
+                "avg_wait": (
+                    stats.total_wait / stats.requests if stats.requests else 0.0
+                ),
+                "max_wait": stats.max_wait,
+                "in_flight": self._in_flight,
+                "waiting": sum(len(q) for q in self._queues.values()),
+            }
+
+
+class RateGovernor:
+    """
+    One ``EndpointLimiter`` per endpoint family (API resource), made on demand.
+
+    ``rates`` and ``concurrency`` override the defaults for single families.
+    """
+
+    def __init__(
+        self,
+        rate: float = 0,
+        burst: int = 1,
+        max_in_flight: int = 0,
+        rates: Optional[Dict[str, float]] = None,
+        concurrency: Optional[Dict[str, int]] = None,
+    ):
+        self.rate = rate
+        self.burst = burst
+        self.max_in_flight = max_in_flight
+        self.rates = dict(rates or {})
+        self.concurrency = dict(concurrency or {})
+        self._limiters: Dict[str, EndpointLimiter] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls) -> "RateGovernor":
+        return cls(
+            rate=settings.LMS_RATE_LIMIT,
+            burst=settings.LMS_RATE_BURST,
+            max_in_flight=settings.LMS_FAMILY_CONCURRENCY,
+            rates=settings.LMS_RATE_LIMITS,
+            concurrency=settings.LMS_FAMILY_CONCURRENCY_LIMITS,
+        )
+
+    def limiter(self, family: str) -> EndpointLimiter:
+        limiter = self._limiters.get(family)
+        if limiter is None:
+            with self._lock:
+                limiter = self._limiters.get(family)
+                if limiter is None:
+                    limiter = self._limiters[family] = EndpointLimiter(
+                        family,
+                        rate=self.rates.get(family, self.rate),
+                        burst=self.burst,
+                        max_in_flight=self.concurrency.get(family, self.max_in_flight),
+                    )
+        return limiter
+
+    def limit(self, family: str):
+        """Hold a request slot of ``family`` for the current owner."""
+        return self.limiter(family).limit(request_owner.get())
+
+    def alimit(self, family: str):
+        return self.limiter(family).alimit(request_owner.get())
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Return queue wait and occupancy per family for logging or metrics."""
+        with self._lock:
+            limiters = list(self._limiters.values())
+        return {limiter.name: limiter.snapshot() for limiter in limiters}
+
+
+# Process-wide governor shared by the sync and async LMS clients
+rate_governor = RateGovernor.from_settings()
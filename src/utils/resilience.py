@@ -0,0 +1,271 @@
+"""Circuit breakers, retry budget and retry policy for LMS calls."""
+
+from contextvars import ContextVar
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+import logging
+import random
+import threading
+import time
+
+import httpx
+import requests
+
+from src.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Statuses worth retrying: rate limiting and server-side failures
+RETRYABLE_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+# Methods that can be repeated without side effects
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an endpoint whose circuit is open."""
+
+    def __init__(self, endpoint: str, retry_in: float):
+        super().__init__(
+            f"LMS endpoint '{endpoint}' is unavailable after repeated failures; "
+            f"retry in {retry_in:.0f}s"
+        )
+        self.endpoint = endpoint
+        self.retry_in = retry_in
+
+
+# Raised by the sync and async clients respectively, so tools that already
+# handle transport errors of their client report open circuits the same way
+class SyncCircuitOpenError(CircuitOpenError, requests.ConnectionError):
+    pass
+
+
+class AsyncCircuitOpenError(CircuitOpenError, httpx.TransportError):
+    pass
+
+
+@dataclass
+class _Circuit:
+    failures: int = 0
+    opened_at: Optional[float] = None
+    probing: bool = False
+
+
+class CircuitBreakers:
+    """
+    One circuit breaker per endpoint, shared by every thread and event loop.
+
+    After ``failure_threshold`` consecutive failures an endpoint's circuit
+    opens and calls fail immediately. Once ``reset_timeout`` seconds have
+    passed a single probe call is let through (half-open): its success
+    closes the circuit, its failure opens it again.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._circuits: Dict[str, _Circuit] = {}
+        self._lock = threading.Lock()
+
+    def before_call(self, endpoint: str) -> Optional[float]:
+        """Return None if the call may proceed, else the seconds until a probe."""
+        if self.failure_threshold <= 0:
+            return None
+        with self._lock:
+            circuit = self._circuits.get(endpoint)
+            if circuit is None or circuit.opened_at is None:
+                return None
+            now = time.monotonic()
+            remaining = circuit.opened_at + self.reset_timeout - now
+            if remaining > 0:
+                return remaining
+            # Restarting the clock holds other calls back while the probe is
+            # in flight, and lets a new probe through if it never reports back
+            circuit.opened_at = now
+            circuit.probing = True
+            logger.info(f"Circuit for '{endpoint}' half-open; probing")
+            return None
+
+    def record_success(self, endpoint: str) -> None:
+        with self._lock:
+            circuit = self._circuits.pop(endpoint, None)
+        if circuit is not None and circuit.opened_at is not None:
+            logger.info(f"Circuit for '{endpoint}' closed")
+
+    def record_failure(self, endpoint: str) -> None:
+        if self.failure_threshold <= 0:
+            return
+        with self._lock:
+            circuit = self._circuits.setdefault(endpoint, _Circuit())
+            circuit.failures += 1
+            reopen = circuit.probing
+            if reopen or circuit.failures >= self.failure_threshold:
+                if circuit.opened_at is None or reopen:
+                    logger.warning(
+                        f"Circuit for '{endpoint}' opened after "
+                        f"{circuit.failures} consecutive failures"
+                    )
+                circuit.opened_at = time.monotonic()
+                circuit.probing = False
+
+    def record(self, endpoint: str, status: int) -> None:
+        """Record a response: 429 and 5xx count as failures."""
+        if status in RETRYABLE_STATUSES:
+            self.record_failure(endpoint)
+        else:
+            self.record_success(endpoint)
+
+    def state(self, endpoint: str) -> str:
+        """Return "closed", "open" or "half-open"."""
+        with self._lock:
+            circuit = self._circuits.get(endpoint)
+            if circuit is None or circuit.opened_at is None:
+                return "closed"
+            return "half-open" if circuit.probing else "open"
+
+
+class RetryBudget:
+    """
+    Process-wide token bucket that caps retries relative to traffic.
+
+    Every request deposits ``ratio`` tokens and ``min_per_second`` tokens
+    trickle in over time; a retry spends one. When the upstream degrades,
+    retries stop at roughly ``ratio`` of the request rate instead of
+    multiplying it.
+    """
+
+    def __init__(
+        self, ratio: float = 0.2, min_per_second: float = 1.0, max_tokens: float = 10
+    ):
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.max_tokens = max_tokens
+        self._tokens = max_tokens
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        elapsed, self._updated = now - self._updated, now
+        self._tokens = min(
+            self.max_tokens, self._tokens + elapsed * self.min_per_second
+        )
+
+    def record_request(self) -> None:
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        """Take one retry token; False when the budget is exhausted."""
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """
+    How the LMS clients retry a failed request.
+
+    ``max_retries`` counts attempts in total; ``delay`` is the base of the
+    exponential backoff. With ``idempotent`` False nothing is retried.
+    """
+
+    max_retries: int = 3
+    delay: float = 1.0
+    idempotent: bool = True
+
+
+# Policy of the LMS requests made in the current context, set per tool by
+# retry_on_failure
+retry_policy: ContextVar[RetryPolicy] = ContextVar(
+    "retry_policy", default=RetryPolicy()
+)
+
+
+def _status(error: Exception) -> Optional[int]:
+    return getattr(getattr(error, "response", None), "status_code", None)
+
+
+def is_retryable(error: Exception) -> bool:
+    """Transport failures and 429/5xx responses are retryable; nothing else is."""
+    if isinstance(error, CircuitOpenError):
+        return False
+    status = _status(error)
+    if status is not None:
+        return status in RETRYABLE_STATUSES
+    return isinstance(error, (requests.RequestException, httpx.TransportError))
+
+
+def retry_after(response) -> Optional[float]:
+    """Seconds the server asked us to wait, from a ``Retry-After`` header."""
+    value = response.headers.get("Retry-After") if response is not None else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(
+    attempt: int, base: float, max_delay: float, response=None
+) -> Optional[float]:
+    """
+    Seconds to wait before retry ``attempt`` (0-based), or None to give up.
+
+    Uses full-jitter exponential backoff, but never less than the server's
+    ``Retry-After``; a ``Retry-After`` beyond ``max_delay`` means giving up.
+    """
+    delay = random.uniform(0, min(max_delay, base * (2**attempt)))
+    requested = retry_after(response)
+    if requested is not None:
+        if requested > max_delay:
+            return None
+        delay = max(delay, requested)
+    return delay
+
+
+def retry_delay(
+    policy: RetryPolicy, attempt: int, error: Optional[Exception] = None, response=None
+) -> Optional[float]:
+    """
+    Seconds to wait before retrying a failed attempt, or None to give up.
+
+    A failure is either a transport ``error`` or a ``response`` with a
+    retryable status. Each retry spends from the process-wide retry budget.
+    """
+    if attempt >= policy.max_retries - 1 or not policy.idempotent:
+        return None
+    if error is not None:
+        if not is_retryable(error):
+            return None
+        response = getattr(error, "response", None)
+    elif response is None or response.status_code not in RETRYABLE_STATUSES:
+        return None
+    wait = backoff_delay(attempt, policy.delay, settings.RETRY_MAX_DELAY, response)
+    if wait is None:
+        return None
+    if not retry_budget.try_spend():
+        logger.warning("Retry budget exhausted; not retrying")
+        return None
+    return wait
+
+
+# Shared by the sync and async LMS clients
+circuit_breakers = CircuitBreakers(
+    failure_threshold=settings.CIRCUIT_FAILURE_THRESHOLD,
+    reset_timeout=settings.CIRCUIT_RESET_TIMEOUT,
+)
+retry_budget = RetryBudget(
+    ratio=settings.RETRY_BUDGET_RATIO,
+    min_per_second=settings.RETRY_BUDGET_MIN_PER_SECOND,
+)
@@ -0,0 +1,89 @@
+"""Single-flight coalescing of identical concurrent calls."""
+
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict
+import asyncio
+import logging
+import threading
+import weakref
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """
+    Let one thread run a call per key while identical callers wait for it.
+
+    Callers that arrive while a call for the same key is in flight receive
+    its result (or exception) instead of starting their own.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.shared = 0
+        self._calls: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, fn: Callable[..., Any], *args) -> Any:
+        if not self.enabled:
+            return fn(*args)
+
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+            else:
+                self.shared += 1
+        if not leader:
+            logger.debug(f"Joined in-flight call for {key}")
+            return future.result()
+
+        try:
+            result = fn(*args)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+
+class AsyncSingleFlight:
+    """
+    Asyncio counterpart of ``SingleFlight``; calls are shared per event loop.
+
+    The shared call runs as its own task, so a cancelled caller does not
+    cancel it for the others.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.shared = 0
+        self._calls: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+    @staticmethod
+    def _finished(calls: Dict[str, asyncio.Task], key: str, task: asyncio.Task):
+        if calls.get(key) is task:
+            del calls[key]
+        # Mark the exception as retrieved even when every caller went away
+        if not task.cancelled():
+            task.exception()
+
+    async def do(self, key: str, fn: Callable[..., Awaitable[Any]], *args) -> Any:
+        if not self.enabled:
+            return await fn(*args)
+
+        loop = asyncio.get_running_loop()
+        calls = self._calls.setdefault(loop, {})
+        task = calls.get(key)
+        if task is None:
+            task = calls[key] = asyncio.ensure_future(fn(*args))
+            task.add_done_callback(lambda t: self._finished(calls, key, t))
+        else:
+            self.shared += 1
+            logger.debug(f"Joined in-flight call for {key}")
+        return await asyncio.shield(task)
@@ -0,0 +1,53 @@
+"""Text normalization shared by name lookups (English and Persian)."""
+
+import re
+import unicodedata
+from typing import List
+
+# Arabic code points commonly typed in place of their Persian equivalents
+_CHARACTER_MAP = str.maketrans(
+    {
+        "ي": "ی",
+        "ى": "ی",
+        "ئ": "ی",
+        "ك": "ک",
+        "ة": "ه",
+        "ۀ": "ه",
+        "أ": "ا",
+        "إ": "ا",
+        "آ": "ا",
+        "ٱ": "ا",
+        "ؤ": "و",
+        "‌": " ",  # zero-width non-joiner
+        "‏": "",  # right-to-left mark
+        "‎": "",  # left-to-right mark
+        "ـ": "",  # tatweel
+        **{chr(0x06F0 + i): str(i) for i in range(10)},  # Persian digits
+        **{chr(0x0660 + i): str(i) for i in range(10)},  # Arabic-Indic digits
+    }
+)
+
+_NON_WORD = re.compile(r"[^\w]+", re.UNICODE)
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalize text for matching.
+
+    Unifies Arabic/Persian letter variants and digits, strips diacritics
+    and tatweel, turns ZWNJ into a space, case-folds Latin text and
+    collapses punctuation and whitespace.
+    """
+    if not text:
+        return ""
+    text = unicodedata.normalize("NFKC", str(text)).translate(_CHARACTER_MAP)
+    # Drop combining marks (Arabic harakat, Latin accents)
+    text = "".join(
+        c for c in unicodedata.normalize("NFD", text) if not unicodedata.combining(c)
+    )
+    return " ".join(_NON_WORD.sub(" ", text.casefold()).split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Split normalized text into word tokens."""
+    return normalize_text(text).split()
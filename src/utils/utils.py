@@ -1,36 +1,61 @@
 from functools import wraps
+import httpx
+import inspect
 import requests
 import logging
 from src.lms_agents.base_agent import AgentResponse
-import time
+from src.utils.resilience import RetryPolicy, retry_policy
 
 
 logger = logging.getLogger(__name__)
 
+# Errors raised by the sync (requests) and async (httpx) clients
+RETRYABLE_EXCEPTIONS = (requests.RequestException, httpx.HTTPError)
 
-def retry_on_failure(max_retries: int = 3, delay: float = 1.0):
-    """Decorator for retrying failed API calls."""
+
+def retry_on_failure(max_retries: int = 3, delay: float = 1.0, idempotent: bool = True):
+    """
+    Decorator setting the retry policy of the LMS calls a function makes.
+
+    The LMS clients retry each failed request themselves (connection errors,
+    timeouts, 429 and 5xx responses, idempotent calls only), so a tool that
+    turns errors into a failed ``AgentResponse`` still gets its requests
+    retried. ``max_retries`` counts attempts per request and ``delay`` is
+    the backoff base; ``idempotent=False`` disables retries. An LMS error
+    that escapes the function is returned as a failed ``AgentResponse``.
+
+    Works on both regular functions and coroutine functions.
+    """
+    policy = RetryPolicy(max_retries=max_retries, delay=delay, idempotent=idempotent)
+
+    def failure_response(e):
+        logger.error(f"API call failed: {e}")
+        return AgentResponse(success=False, error=f"API call failed: {str(e)}")
 
     def decorator(func):
+        if inspect.iscoroutinefunction(func):
+
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                token = retry_policy.set(policy)
+                try:
+                    return await func(*args, **kwargs)
+                except RETRYABLE_EXCEPTIONS as e:
+                    return failure_response(e)
+                finally:
+                    retry_policy.reset(token)
+
+            return async_wrapper
+
         @wraps(func)
         def wrapper(*args, **kwargs):
-            last_exception = None
-            for attempt in range(max_retries):
-                try:
-                    return func(*args, **kwargs)
-                except requests.RequestException as e:
-                    last_exception = e
-                    if attempt < max_retries - 1:
-                        time.sleep(delay * (2**attempt))  # Exponential backoff
-                    logger.warning(f"Attempt {attempt + 1} failed: {e}")
-
-            logger.error(
-                f"All {max_retries} attempts failed. Last error: {last_exception}"
-            )
-            return AgentResponse(
-                success=False,
-                error=f"API call failed after {max_retries} attempts: {str(last_exception)}",
-            )
+            token = retry_policy.set(policy)
+            try:
+                return func(*args, **kwargs)
+            except RETRYABLE_EXCEPTIONS as e:
+                return failure_response(e)
+            finally:
+                retry_policy.reset(token)
 
         return wrapper
 
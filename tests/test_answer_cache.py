@@ -0,0 +1,89 @@
+"""Matching rules of the semantic answer cache."""
+
+import os
+import unittest
+from unittest import mock
+
+os.environ.setdefault("OPENAI_API_KEY", "test")
+
+from src.utils.answer_cache import AnswerCache, settings
+
+
+class NegationTest(unittest.TestCase):
+    PAIRS = [
+        (
+            "who has submitted homework for lesson physics",
+            "who has not submitted homework for lesson physics",
+        ),
+        (
+            "who has submitted homework for lesson physics",
+            "who hasn't submitted homework for lesson physics",
+        ),
+        (
+            "which students have grades in chemistry",
+            "which students have no grades in chemistry",
+        ),
+        (
+            "چه کسی تکلیف ریاضی را تحویل داده",
+            "چه کسی تکلیف ریاضی را تحویل نداده",
+        ),
+        (
+            "کدام دانش آموزان تکلیف فیزیک را ارسال کرده اند",
+            "کدام دانش آموزان تکلیف فیزیک را ارسال نکرده اند",
+        ),
+    ]
+
+    def test_negated_question_misses(self):
+        for question, negated in self.PAIRS:
+            with self.subTest(negated):
+                cache = AnswerCache()
+                cache.put(question, "answer", "user:1")
+                self.assertIsNone(cache.get(negated, "user:1"))
+                self.assertEqual(cache.get(question, "user:1"), "answer")
+
+    def test_equally_negated_questions_match(self):
+        cache = AnswerCache()
+        cache.put("who has not submitted homework for lesson physics", "answer")
+        self.assertEqual(
+            cache.get("who hasn't submitted homework for lesson physics?"), "answer"
+        )
+
+
+class ParaphraseTest(unittest.TestCase):
+    def test_persian_paraphrase_hits(self):
+        cache = AnswerCache()
+        cache.put("نمرات من چیه", "answer", "user:1")
+        self.assertEqual(cache.get("نمرات من چیست", "user:1"), "answer")
+        self.assertIsNone(cache.get("نمرات من چیست", "user:2"))
+
+    def test_other_lesson_misses(self):
+        cache = AnswerCache()
+        cache.put("what is the average grade of lesson physics", "answer")
+        self.assertIsNone(cache.get("what is the average grade of lesson chemistry"))
+
+
+class SettingsTest(unittest.TestCase):
+    def test_disabled_without_sync(self):
+        with (
+            mock.patch.object(settings, "ANSWER_CACHE_ENABLED", True),
+            mock.patch.object(settings, "SYNC_ENABLED", False),
+        ):
+            self.assertFalse(AnswerCache.from_settings().enabled)
+        with (
+            mock.patch.object(settings, "ANSWER_CACHE_ENABLED", True),
+            mock.patch.object(settings, "SYNC_ENABLED", True),
+        ):
+            self.assertTrue(AnswerCache.from_settings().enabled)
+
+    def test_invalidate_drops_answers(self):
+        cache = AnswerCache()
+        version = cache.version
+        cache.put("list all courses", "answer")
+        cache.invalidate()
+        self.assertIsNone(cache.get("list all courses"))
+        cache.put("list all courses", "stale", version=version)
+        self.assertIsNone(cache.get("list all courses"))
+
+
+if __name__ == "__main__":
+    unittest.main()
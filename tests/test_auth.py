@@ -0,0 +1,64 @@
+"""Re-authentication after the LMS rejects a cached access token."""
+
+import os
+import unittest
+from unittest import mock
+
+os.environ.setdefault("OPENAI_API_KEY", "test")
+
+import requests
+
+from src.lms_agents.base_agent import AgentResponse
+from src.tools.auth import auth_tools
+from src.utils.lms_client import lms_client
+
+from tests.test_retry import make_response
+
+
+def token_response(access: str) -> AgentResponse:
+    return AgentResponse(success=True, data={"access": access, "expires_in": 3600})
+
+
+class ReauthenticateTest(unittest.TestCase):
+    def setUp(self):
+        auth_tools.token_cache.clear()
+        self.addCleanup(auth_tools.token_cache.clear)
+
+    def test_401_replaces_the_token_once(self):
+        tokens = iter([token_response("revoked"), token_response("fresh")])
+        sent = []
+
+        def request(session, method, url, headers=None, **kwargs):
+            sent.append(headers["Authorization"])
+            return make_response(
+                401 if headers["Authorization"] == "Bearer revoked" else 200
+            )
+
+        with (
+            mock.patch.object(
+                auth_tools, "_request_token", side_effect=lambda *_: next(tokens)
+            ),
+            mock.patch.object(requests.Session, "request", request),
+        ):
+            token = auth_tools.authenticate_user().data["access"]
+            response = lms_client.get(
+                "reauth-test/", headers={"Authorization": f"Bearer {token}"}
+            )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sent, ["Bearer revoked", "Bearer fresh"])
+        self.assertEqual(auth_tools.authenticate_user().data["access"], "fresh")
+
+    def test_unknown_tokens_are_not_replaced(self):
+        with mock.patch.object(
+            requests.Session, "request", return_value=make_response(401)
+        ) as request:
+            response = lms_client.get(
+                "reauth-test/", headers={"Authorization": "Bearer someone-else"}
+            )
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(request.call_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
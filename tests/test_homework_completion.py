@@ -0,0 +1,73 @@
+"""Loading of the homework completion report."""
+
+import asyncio
+import os
+import unittest
+from unittest import mock
+
+os.environ.setdefault("OPENAI_API_KEY", "test")
+
+import httpx
+
+from src.lms_agents.base_agent import AgentResponse
+from src.tools.homeworks import homeworks_analytics
+from src.utils.batch import settings
+
+HOMEWORKS = [{"id": i, "lesson": 1} for i in range(1, 7)]
+GRADES = [{"lesson": 1, "user": 1}]
+
+
+class LessonResponsesTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        token = AgentResponse(success=True, data={"access": "token"})
+        patches = [
+            mock.patch.object(
+                homeworks_analytics.auth_tools,
+                "authenticate_user_async",
+                mock.AsyncMock(return_value=token),
+            ),
+            mock.patch.object(settings, "LMS_BATCH_CONCURRENCY", 2),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    async def test_homework_fetches_follow_the_batch_limit(self):
+        running, peak = 0, 0
+
+        async def load(resource, params, headers):
+            nonlocal running, peak
+            if resource == "homeworks":
+                return HOMEWORKS
+            if resource == "grades":
+                return GRADES
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return [{"homework": params["homework"], "user": 1}]
+
+        with mock.patch.object(homeworks_analytics, "_aload", load):
+            response = await homeworks_analytics.aget_homework_completion("1")
+
+        self.assertTrue(response.success, response.error)
+        self.assertEqual(peak, 2)
+
+    async def test_failed_homework_fails_the_report(self):
+        async def load(resource, params, headers):
+            if resource == "homeworks":
+                return HOMEWORKS
+            if resource == "grades":
+                return GRADES
+            if params["homework"] == "3":
+                raise httpx.ConnectError("down")
+            return []
+
+        with mock.patch.object(homeworks_analytics, "_aload", load):
+            response = await homeworks_analytics.aget_homework_completion("1")
+
+        self.assertFalse(response.success)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+"""Retries of failed LMS requests made by tools that handle errors themselves."""
+
+import asyncio
+import os
+import unittest
+from unittest import mock
+
+os.environ.setdefault("OPENAI_API_KEY", "test")
+
+import httpx
+import requests
+
+from src.lms_agents.base_agent import AgentResponse
+from src.utils.lms_client import AsyncLMSClient, LMSClient
+from src.utils.utils import retry_on_failure
+
+BASE_URL = "http://lms.test"
+
+
+def make_response(status: int, body: bytes = b"{}", headers=None) -> requests.Response:
+    response = requests.Response()
+    response.status_code = status
+    response._content = body
+    response.headers.update(headers or {})
+    return response
+
+
+class SyncRetryTest(unittest.TestCase):
+    def setUp(self):
+        self.client = LMSClient(BASE_URL, single_flight=False)
+
+    def call(self, responses, method="GET"):
+        """Run a tool that swallows request errors, like the LMS tools do."""
+
+        @retry_on_failure(max_retries=3, delay=0)
+        def tool() -> AgentResponse:
+            try:
+                response = self.client.request(method, "retry-test/")
+                response.raise_for_status()
+                return AgentResponse(success=True, data=response.json())
+            except requests.RequestException as e:
+                return AgentResponse(success=False, error=str(e))
+
+        with mock.patch.object(
+            requests.Session, "request", side_effect=responses
+        ) as request:
+            return tool(), request.call_count
+
+    def test_503_is_retried_then_succeeds(self):
+        result, calls = self.call(
+            [make_response(503, headers={"Retry-After": "0"}), make_response(200)]
+        )
+        self.assertTrue(result.success)
+        self.assertEqual(calls, 2)
+
+    def test_connection_error_is_retried(self):
+        result, calls = self.call(
+            [requests.ConnectionError("reset"), make_response(200)]
+        )
+        self.assertTrue(result.success)
+        self.assertEqual(calls, 2)
+
+    def test_client_errors_are_not_retried(self):
+        result, calls = self.call([make_response(404), make_response(200)])
+        self.assertFalse(result.success)
+        self.assertEqual(calls, 1)
+
+    def test_post_is_not_retried(self):
+        result, calls = self.call(
+            [make_response(503), make_response(200)], method="POST"
+        )
+        self.assertFalse(result.success)
+        self.assertEqual(calls, 1)
+
+
+class AsyncRetryTest(unittest.TestCase):
+    def test_503_is_retried_then_succeeds(self):
+        statuses = iter([503, 200])
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(next(statuses), json={}, headers={"Retry-After": "0"})
+
+        client = AsyncLMSClient(BASE_URL, single_flight=False)
+
+        @retry_on_failure(max_retries=3, delay=0)
+        async def tool() -> AgentResponse:
+            try:
+                response = await client.get("retry-test-async/")
+                response.raise_for_status()
+                return AgentResponse(success=True, data=response.json())
+            except httpx.HTTPError as e:
+                return AgentResponse(success=False, error=str(e))
+
+        async def run():
+            loop = asyncio.get_running_loop()
+            client._clients[loop] = httpx.AsyncClient(
+                transport=httpx.MockTransport(handler)
+            )
+            return await tool()
+
+        self.assertTrue(asyncio.run(run()).success)
+        self.assertIsNone(next(statuses, None))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,45 @@
+"""Sync checkpoints."""
+
+import os
+import tempfile
+import unittest
+
+os.environ.setdefault("OPENAI_API_KEY", "test")
+
+from src.store.sync import SyncCheckpoints, SyncState
+
+
+class CheckpointTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.checkpoints = SyncCheckpoints(os.path.join(directory.name, "sync"))
+
+    def test_cursor_only_save_keeps_the_records_file(self):
+        records = [{"id": 1, "modified": "2026-01-01"}]
+        self.checkpoints.save(
+            SyncState("students", cursor="2026-01-01", synced_at=1.0), records
+        )
+        path = self.checkpoints._path("students")
+        written = os.stat(path)
+
+        self.checkpoints.save(SyncState("students", cursor="2026-01-01", synced_at=2.0))
+
+        self.assertEqual(os.stat(path).st_mtime_ns, written.st_mtime_ns)
+        checkpoint = self.checkpoints.load("students")
+        self.assertEqual(checkpoint["records"], records)
+        self.assertEqual(checkpoint["state"].synced_at, 2.0)
+
+    def test_files_are_private(self):
+        self.checkpoints.save(SyncState("grades", synced_at=1.0), [])
+        for path in (
+            self.checkpoints.directory,
+            self.checkpoints._path("grades"),
+            self.checkpoints._state_path("grades"),
+        ):
+            mode = os.stat(path).st_mode & 0o777
+            self.assertEqual(mode, 0o700 if os.path.isdir(path) else 0o600)
+
+
+if __name__ == "__main__":
+    unittest.main()